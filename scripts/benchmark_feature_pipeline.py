@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark FeatureEngineer cleaning/feature engineering per backend and PU_DO
+pair encoding on synthetic data shaped like the TLC yellow taxi monthly files.
+Reports cleaning and vectorization time and the memory held by the cleaned
+frame (where the per-trip PU_DO strings live).
+
+Usage: python scripts/benchmark_feature_pipeline.py [--months 1 3 12] [--rows-per-month 2900000]
+"""
+
+import sys
+import time
+import argparse
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.features.columnar_encoder import ColumnarEncoder  # noqa: E402
+from src.features.feature_pipeline import BACKENDS, PAIR_ENCODINGS, FeatureEngineer  # noqa: E402
+
+
+def synthetic_tlc_month(rows: int, month: int, seed: int) -> pa.Table:
+    """One month of trips with the yellow taxi schema and realistic dirt."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(f"2024-{month:02d}-01T00:00:00", "us")
+    pickup = start + rng.integers(0, 28 * 24 * 3600, rows).astype("timedelta64[s]")
+    # Mostly short trips, plus negative and multi-hour outliers
+    elapsed = rng.gamma(2.0, 420.0, rows) * rng.choice([1, -1, 20], rows, p=[0.97, 0.01, 0.02])
+    dropoff = pickup + elapsed.astype("timedelta64[s]")
+    fee = rng.choice([0.0, 1.75], rows)
+    fee[rng.random(rows) < 0.03] = np.nan
+
+    return pa.table({
+        "VendorID": pa.array(rng.integers(1, 3, rows), pa.int32()),
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": dropoff,
+        "passenger_count": rng.integers(0, 7, rows).astype(np.float64),
+        "trip_distance": rng.gamma(1.5, 2.0, rows).round(2),
+        "RatecodeID": rng.integers(1, 7, rows).astype(np.float64),
+        "store_and_fwd_flag": rng.choice(["N", "Y"], rows, p=[0.99, 0.01]),
+        "PULocationID": pa.array(rng.integers(1, 266, rows), pa.int32()),
+        "DOLocationID": pa.array(rng.integers(1, 266, rows), pa.int32()),
+        "payment_type": rng.integers(1, 5, rows),
+        "fare_amount": rng.gamma(2.0, 9.0, rows).round(2),
+        "tip_amount": rng.gamma(1.0, 3.0, rows).round(2),
+        "total_amount": rng.gamma(2.0, 12.0, rows).round(2),
+        "congestion_surcharge": rng.choice([0.0, 2.5], rows),
+        "Airport_fee": pa.array(fee, from_pandas=True),
+    })
+
+
+def benchmark(months: list, rows_per_month: int, input_format: str, pair_encodings: list):
+    backends = [b for b in BACKENDS if b != "polars" or importlib.util.find_spec("polars")]
+    # Keep the per-step log lines out of the measurement
+    logger.remove()
+
+    print(f"{'months':>6} {'rows':>12} {'backend':>8} {'pairs':>8} {'clean s':>8} {'encode s':>9} {'frame MiB':>10}")
+    for n_months in months:
+        table = pa.concat_tables([
+            synthetic_tlc_month(rows_per_month, month % 12 + 1, seed=month)
+            for month in range(n_months)
+        ])
+        data = table.to_pandas() if input_format == "pandas" else table
+
+        for backend in backends:
+            for pair_encoding in pair_encodings:
+                feature_engineer = FeatureEngineer(backend=backend, pair_encoding=pair_encoding)
+                started = time.perf_counter()
+                cleaned = feature_engineer._clean_and_engineer(data)
+                cleaned_at = time.perf_counter()
+                ColumnarEncoder(
+                    feature_engineer.categorical, feature_engineer.numerical,
+                    pair_codes=feature_engineer._pair_code_columns()
+                ).fit_transform(cleaned)
+                encoded_at = time.perf_counter()
+                frame_mib = cleaned.memory_usage(deep=True).sum() / 2**20
+                print(
+                    f"{n_months:>6} {table.num_rows:>12,} {backend:>8} {pair_encoding:>8} "
+                    f"{cleaned_at - started:>8.2f} {encoded_at - cleaned_at:>9.2f} {frame_mib:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 3, 12])
+    parser.add_argument("--rows-per-month", type=int, default=2_900_000)
+    parser.add_argument("--input", choices=["pandas", "arrow"], default="pandas",
+                        help="Hand the backends a pandas DataFrame (load_train_test) or a pyarrow Table")
+    parser.add_argument("--pair-encodings", nargs="+", choices=PAIR_ENCODINGS, default=list(PAIR_ENCODINGS))
+    args = parser.parse_args()
+    benchmark(args.months, args.rows_per_month, args.input, args.pair_encodings)
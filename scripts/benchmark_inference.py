@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for single-row feature engineering at inference time.
+Compares FeatureEngineer.inference (DataFrame + DictVectorizer) against the
+compiled FeatureEngineer.inference_raw path.
+
+Usage: python scripts/benchmark_inference.py [--rows 2000]
+"""
+
+import sys
+import timeit
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.features.feature_pipeline import FeatureEngineer  # noqa: E402
+
+
+def benchmark(rows: int):
+    feature_engineer = FeatureEngineer()
+    feature_engineer.compile_inference()
+
+    rng = np.random.default_rng(42)
+    pu_ids = [str(i) for i in rng.integers(1, 266, size=rows)]
+    do_ids = [str(i) for i in rng.integers(1, 266, size=rows)]
+    distances = rng.uniform(1.0, 30.0, size=rows).round(2).tolist()
+
+    def dataframe_path():
+        for pu, do, distance in zip(pu_ids, do_ids, distances):
+            feature_engineer.inference(pd.DataFrame({
+                "PULocationID": [pu],
+                "DOLocationID": [do],
+                "trip_distance": [distance]
+            }))
+
+    def compiled_path():
+        for pu, do, distance in zip(pu_ids, do_ids, distances):
+            feature_engineer.inference_raw([pu], [do], trip_distance=[distance])
+
+    # Keep the per-call log line out of the measurement
+    logger.remove()
+
+    for name, fn in (("inference", dataframe_path), ("inference_raw", compiled_path)):
+        seconds = min(timeit.repeat(fn, number=1, repeat=3))
+        print(f"{name:<15} {seconds / rows * 1e6:10.1f} us/row")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    benchmark(parser.parse_args().rows)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Precompute predicted durations for every (PULocationID, DOLocationID) zone
+pair with the deployed model and save them as a memory-mappable table that
+the API answers /predict from.
+
+Run from the repository root after the model artifacts are updated:
+    python scripts/build_duration_table.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.config.settings import settings  # noqa: E402
+from src.features.feature_pipeline import FeatureEngineer  # noqa: E402
+from src.inference.simple_predict import SimpleModelPredictor  # noqa: E402
+from src.inference.duration_table import build_duration_table, save_duration_table  # noqa: E402
+from src.features.zone_distance import ZoneDistanceProvider  # noqa: E402
+
+
+def main():
+    model_predictor = SimpleModelPredictor(feature_engineer=FeatureEngineer())
+    zone_distances = ZoneDistanceProvider.load(settings.ZONE_CENTROIDS_PATH)
+    durations = build_duration_table(model_predictor, zone_distances)
+    save_duration_table(
+        durations, settings.DURATION_TABLE_PATH,
+        model_fingerprint=model_predictor.model_fingerprint,
+        model_version=model_predictor.model_version,
+        distance_source=zone_distances.source
+    )
+    print(f"Duration table shape: {durations.shape}")
+
+
+if __name__ == "__main__":
+    main()
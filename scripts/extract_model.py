@@ -2,14 +2,55 @@
 """
 Script to extract model directly from MLflow artifacts and save as pickle.
 This bypasses MLflow tracking entirely.
+
+Linear models are also exported to the pickle-free artifact the API loads
+with memory mapping (src/artifacts/linear_model). To only re-export that
+artifact from the existing simple_model.pkl:
+    python scripts/extract_model.py --artifact-only
 """
 
 import os
+import sys
 import json
 import pickle
 import shutil
+import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.config.settings import settings  # noqa: E402
+from src.features.feature_pipeline import FeatureEngineer  # noqa: E402
+from src.inference.linear_scorer import is_linear_model  # noqa: E402
+from src.inference.model_artifact import export_linear_model  # noqa: E402
+
+
+def export_model_artifact(model, run_id):
+    """Export a linear model and the vectorizer vocabulary without pickle"""
+    if not is_linear_model(model):
+        print(f"{type(model).__name__} is not a linear model, skipping the pickle-free export")
+        return False
+
+    feature_engineer = FeatureEngineer()
+    export_linear_model(
+        model,
+        feature_engineer.compile_inference(),
+        feature_engineer._load_dv().feature_names_,
+        settings.MODEL_ARTIFACT_PATH,
+        model_version=run_id
+    )
+    print(f"Model exported without pickle to: {settings.MODEL_ARTIFACT_PATH}")
+    return True
+
+
+def export_existing_model():
+    """Export the already extracted simple_model.pkl"""
+    with open("src/artifacts/best_model.json") as f:
+        run_id = json.load(f)["run_id"]
+    with open("src/artifacts/simple_model.pkl", 'rb') as f:
+        model = pickle.load(f)
+    return export_model_artifact(model, run_id)
+
+
 def extract_model_from_mlflow():
     """Extract model directly from MLflow artifacts"""
     
@@ -71,6 +112,7 @@ def extract_model_from_mlflow():
         
         print(f"Model saved as pickle to: {output_path}")
         print(f"Model type: {type(model)}")
+        export_model_artifact(model, run_id)
         return True
         
     except Exception as e:
@@ -78,7 +120,12 @@ def extract_model_from_mlflow():
         return False
 
 if __name__ == "__main__":
-    success = extract_model_from_mlflow()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifact-only", action="store_true",
+                        help="Only export the pickle-free artifact from src/artifacts/simple_model.pkl")
+    args = parser.parse_args()
+
+    success = export_existing_model() if args.artifact_only else extract_model_from_mlflow()
     if success:
         print("✅ Model extraction successful!")
     else:
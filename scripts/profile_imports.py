@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Report the import-time cost of the serving entry point (the Lambda handler
+lives in src.app), broken down per package and per module.
+
+Usage: python scripts/profile_imports.py [module] [--top 15]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.utils.import_profile import format_report, profile_imports  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("module", nargs="?", default="src.app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(format_report(args.module, profile_imports(args.module), top=args.top))
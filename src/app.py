@@ -1,30 +1,95 @@
 from fastapi import FastAPI
-from .routes import base, taxi
+from .routes import admin, base, taxi
 from contextlib import asynccontextmanager
 # from config.config import config
 # from config.settings import settings
-from .features.feature_pipeline import FeatureEngineer
-from .inference.simple_predict import SimpleModelPredictor
+from .inference.model_manager import ModelManager, ServingModel
+from .inference.model_registry import ModelRegistry
+from .features.zone_distance import ZoneDistanceProvider
+from .inference.batching import PredictionCoalescer
+from .inference.executor import PredictionExecutor
+from .inference.prediction_cache import create_prediction_cache
+from .config.settings import settings
 from .utils.logging_config import setup_logging
 from mangum import Mangum
 import os
 import sys
 
 
+def serve_model(state, serving_model: ServingModel):
+    """Point request handlers at `serving_model`; in-flight requests keep the previous one."""
+    state.feature_engineer = serving_model.feature_engineer
+    state.model_predictor = serving_model.model_predictor
+    state.duration_table = serving_model.duration_table
+    state.model_registry = serving_model.model_registry
+    coalescer = getattr(state, "prediction_coalescer", None)
+    if coalescer is not None:
+        coalescer.model_predictor = serving_model.model_predictor
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()
-    app.state.feature_engineer = FeatureEngineer()
-    app.state.model_predictor = SimpleModelPredictor(
-        feature_engineer=app.state.feature_engineer
+    on_lambda = bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+    app.state.zone_distances = ZoneDistanceProvider.load(settings.ZONE_CENTROIDS_PATH)
+
+    # One prediction cache across model reloads; its keys include the model version
+    app.state.model_manager = ModelManager(
+        cache=create_prediction_cache(
+            settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL_SECONDS
+        ),
+        distance_source=app.state.zone_distances.source,
+        poll_interval=None if on_lambda else settings.MODEL_RELOAD_POLL_SECONDS
+    )
+    serving_model = app.state.model_manager.load_current()
+
+    # Challengers share the champion's FeatureEngineer (the same DictVectorizer);
+    # the model manager reloads them against every new champion it swaps in
+    if settings.MODEL_VARIANTS:
+        app.state.model_manager.attach_registry(ModelRegistry.load(
+            settings.MODEL_VARIANTS,
+            feature_engineer=serving_model.feature_engineer,
+            mlruns_dir=settings.MLRUNS_DIRECTORY,
+            traffic=settings.MODEL_TRAFFIC,
+            shadow=settings.MODEL_SHADOW
+        ))
+    serve_model(app.state, serving_model)
+
+    app.state.prediction_executor = PredictionExecutor(
+        app.state.model_predictor,
+        backend="inline" if on_lambda else settings.PREDICT_EXECUTOR,
+        max_workers=settings.PREDICT_EXECUTOR_WORKERS
     )
+    app.state.model_manager.executor = app.state.prediction_executor
+
+    app.state.prediction_coalescer = None
+    if settings.PREDICT_BATCHING_ENABLED and not on_lambda:
+        app.state.prediction_coalescer = PredictionCoalescer(
+            app.state.model_predictor,
+            max_batch_size=settings.PREDICT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.PREDICT_BATCH_MAX_WAIT_MS,
+            executor=app.state.prediction_executor
+        )
+        await app.state.prediction_coalescer.start()
+
+    app.state.model_manager.on_swap(lambda serving_model: serve_model(app.state, serving_model))
+    await app.state.model_manager.start()
+
     yield
 
+    await app.state.model_manager.stop()
+    if app.state.model_registry is not None:
+        await app.state.model_registry.stop()
+    if app.state.prediction_coalescer is not None:
+        await app.state.prediction_coalescer.stop()
+    app.state.prediction_executor.shutdown()
+
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(base.base_router)
 app.include_router(taxi.taxi_router)
+app.include_router(admin.admin_router)
 
 handler = Mangum(app)  # This is the AWS Lambda handler
 
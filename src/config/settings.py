@@ -1,15 +1,99 @@
 from dataclasses import dataclass
 from dataclasses import dataclass, field
+from typing import Optional
 
 
 @dataclass
 class AppSettings:
     RAW_DATA_DIRECTORY: str = "data/raw"
     PROCESSED_DATA_DIRECTORY: str = "data/processed"
+    # Rows per record batch when streaming raw parquet files into training
+    PARQUET_BATCH_SIZE: int = 1_000_000
+    # Cache cleaned features per month under PROCESSED_DATA_DIRECTORY/features,
+    # keyed by raw file hash and feature config
+    FEATURE_CACHE_ENABLED: bool = True
+    # Processed matrices are stored as CSR arrays in row shards; None keeps
+    # them uncompressed so they load memory-mapped, "zstd"/"lz4" shrink them
+    PROCESSED_DATA_COMPRESSION: Optional[str] = None
+    PROCESSED_DATA_SHARD_ROWS: int = 1_000_000
+
+    # Pickle-free model export (scripts/extract_model.py, or --artifact-only to
+    # re-export simple_model.pkl); the pickled model in src/artifacts is used
+    # when it is missing or stale
+    MODEL_ARTIFACT_PATH: str = "src/artifacts/linear_model"
+
+    DURATION_TABLE_PATH: str = "src/artifacts/duration_table.npy"
+    # Optional CSV of taxi zone centroids (LocationID, latitude, longitude).
+    # Without it the API uses reproducible synthetic zone distances.
+    ZONE_CENTROIDS_PATH: str = "src/artifacts/taxi_zone_centroids.csv"
+
+    # Micro-batching of concurrent /predict calls (not used on Lambda, which
+    # serves one request per container)
+    PREDICT_BATCHING_ENABLED: bool = True
+    PREDICT_BATCH_MAX_SIZE: int = 64
+    PREDICT_BATCH_MAX_WAIT_MS: float = 2.0
+
+    # Where model scoring runs: "inline" (event loop), "thread" or "process"
+    # pool. Lambda always scores inline.
+    PREDICT_EXECUTOR: str = "thread"
+    PREDICT_EXECUTOR_WORKERS: Optional[int] = None
+
+    # In-process LRU cache of predictions keyed by (PU, DO, distance, model
+    # version). A size of 0 disables it; TTL of None keeps entries until evicted.
+    PREDICTION_CACHE_SIZE: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: Optional[float] = None
+
+    # Poll the model files this often and swap in a changed model without a
+    # restart (None: only on POST /api/v1/admin/model/reload). Not on Lambda.
+    MODEL_RELOAD_POLL_SECONDS: Optional[float] = 10.0
+    # Required in the X-Admin-Token header of admin endpoints, which are
+    # disabled (404) while it is unset
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Challenger models served next to the deployed one, by name: a model.pkl
+    # path or the MLflow run ID that logged it under mlruns, e.g.
+    # {"challenger": "<run_id>"}. Requests pick one with the X-Model-Variant
+    # header; MODEL_TRAFFIC sends a percentage of the rest to each, pinned by
+    # X-Routing-Key when given. MODEL_SHADOW variants score every request
+    # after it is answered, for comparison only.
+    MODEL_VARIANTS: dict = field(default_factory=dict)
+    MODEL_TRAFFIC: dict = field(default_factory=dict)
+    MODEL_SHADOW: list = field(default_factory=list)
+    MLRUNS_DIRECTORY: str = "mlruns"
+
+    # Models in MultiModelTrainer.train_all are trained on this many
+    # processes; threads per job default to the CPU count split between them
+    TRAINING_JOBS: int = 1
+    TRAINING_THREADS_PER_JOB: Optional[int] = None
+    # Score training metrics on a random sample of this many rows instead
+    # of predicting the whole training set (None: all rows)
+    TRAIN_METRICS_SAMPLE_SIZE: Optional[int] = None
+    # Also run a Hyperband search for XGBoost (src/main.py)
+    HYPERPARAMETER_SEARCH_ENABLED: bool = False
+    # Train out of core instead of in memory (src/main.py): features are
+    # encoded month by month into processed shards, then an SGDRegressor
+    # (partial_fit) and XGBoost (external memory) train from them, so the
+    # full training matrix is never held
+    OUT_OF_CORE_TRAINING_ENABLED: bool = False
+    OUT_OF_CORE_EPOCHS: int = 5
+    # Best run per experiment, so best-model selection only searches runs
+    # that finished since the previous one. Runtime state, kept out of the
+    # source tree
+    MODEL_HISTORY_INDEX_PATH: Optional[str] = "data/run_index.json"
 
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
 
+    # Months are downloaded concurrently, streamed to "<file>.part" and
+    # resumed from there after interruptions. Dropped connections, 5xx
+    # responses and failed integrity checks are retried with exponential
+    # backoff starting at DOWNLOAD_BACKOFF_SECONDS
+    DOWNLOAD_WORKERS: int = 4
+    DOWNLOAD_RETRIES: int = 3
+    DOWNLOAD_BACKOFF_SECONDS: float = 1.0
+    DOWNLOAD_TIMEOUT_SECONDS: float = 60.0
+    DOWNLOAD_CHUNK_BYTES: int = 1 << 20
+
     DATA_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_{year_month}.parquet"
 
     TRAINING_DATA_DATE: dict = field(default_factory=lambda: {
@@ -1,16 +1,58 @@
-import pandas as pd
+import os
+import re
+import time
+import hashlib
+import requests
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.relativedelta import relativedelta
 from loguru import logger
 
+PARQUET_MAGIC = b"PAR1"
+
+
+class DownloadError(Exception):
+    """A download that failed or did not pass its integrity checks."""
+
+
+def _md5_etag(etag: Optional[str]) -> Optional[str]:
+    """The MD5 digest carried by an ETag, if it is a plain (single part) MD5."""
+    if not etag:
+        return None
+    etag = etag.strip('"')
+    return etag.lower() if re.fullmatch(r"[0-9a-fA-F]{32}", etag) else None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Dropped connections, server errors and failed integrity checks may succeed on retry."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout,
+                          requests.exceptions.ChunkedEncodingError, DownloadError)):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Full size of the resource from Content-Range or Content-Length."""
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None else None
+
+
 class DataDownloader:
-    def __init__(self, settings):
+    def __init__(self, settings, checksums: Optional[Dict[str, str]] = None):
         self.settings = settings
         self.train_dir = Path(settings.RAW_DATA_DIRECTORY) / "train"
         self.test_dir = Path(settings.RAW_DATA_DIRECTORY) / "test"
         self.train_dir.mkdir(parents=True, exist_ok=True)
         self.test_dir.mkdir(parents=True, exist_ok=True)
+        # Optional known SHA-256 digests by file name, checked after download
+        self.checksums = checksums or {}
 
     def generate_month_range(self, start: str, end: str):
 
@@ -20,7 +62,7 @@ class DataDownloader:
         # If start and end are the same, return just that month
         if start_date == end_date:
             return [start]
-        
+
         months = []
         current = start_date
         while current <= end_date:
@@ -28,24 +70,139 @@ class DataDownloader:
             current += relativedelta(months=1)
         return months
 
-    def download_and_save_parquet_file(self, url: str, output_dir: Path):
+    def download_and_save_parquet_file(self, url: str, output_dir: Path) -> Path:
+        """
+        Stream the file at `url` to `<name>.part` in `output_dir`, verify it
+        and atomically rename it into place. An interrupted download is
+        resumed from the partial file with an HTTP Range request, on retry or
+        on the next run. Interruptions, 5xx responses and failed integrity
+        checks are retried up to DOWNLOAD_RETRIES times with exponential
+        backoff; a file that failed its checks is fetched again from scratch.
+        """
         filename = url.split("/")[-1]
-        output_path = output_dir / filename
+        output_path = Path(output_dir) / filename
 
         if output_path.exists():
             logger.warning(f"⚠️ File already exists: {output_path}, skipping download.")
-            return
+            return output_path
+
+        attempts = self.settings.DOWNLOAD_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                self._download_to(url, output_path)
+                return output_path
+            except Exception as e:
+                # Network errors keep the partial file so the next attempt
+                # resumes it; a file that failed verification was discarded
+                if not _is_retryable(e):
+                    raise
+                if attempt == attempts:
+                    raise DownloadError(f"Giving up on {url} after {attempts} attempts: {e}") from e
+                delay = self.settings.DOWNLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.warning(
+                    f"⚠️ Download of {url} failed ({e}), retrying in {delay:.1f}s (attempt {attempt + 1}/{attempts})"
+                )
+                time.sleep(delay)
 
-        df = pd.read_parquet(url)
-        df.to_parquet(output_path)
+    def _download_to(self, url: str, output_path: Path):
+        partial_path = output_path.with_name(output_path.name + ".part")
+        etag_path = output_path.with_name(output_path.name + ".part.etag")
+
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        stored_etag = etag_path.read_text() if offset and etag_path.exists() else None
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if stored_etag:
+                # Only resume if the remote file is still the one we started on
+                headers["If-Range"] = stored_etag
+
+        with requests.get(url, headers=headers, stream=True,
+                          timeout=self.settings.DOWNLOAD_TIMEOUT_SECONDS) as response:
+            if offset and response.status_code == 416:
+                # Nothing left to fetch: the partial file should be complete
+                total_size = _total_size(response, offset) if "Content-Range" in response.headers else offset
+                etag = stored_etag
+            else:
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    logger.info(f"Server sent the whole file for {url}, restarting download")
+                    offset = 0
+                elif offset:
+                    logger.info(f"⏯️ Resuming {url} at byte {offset}")
+                total_size = _total_size(response, offset)
+                etag = response.headers.get("ETag") or (stored_etag if offset else None)
+                if not offset:
+                    etag_path.unlink(missing_ok=True)
+                    if etag:
+                        etag_path.write_text(etag)
+
+                with open(partial_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.settings.DOWNLOAD_CHUNK_BYTES):
+                        f.write(chunk)
+
+        try:
+            self._verify(partial_path, total_size, _md5_etag(etag), self.checksums.get(output_path.name))
+        except DownloadError:
+            # A corrupt partial file cannot be resumed, start over next time
+            partial_path.unlink(missing_ok=True)
+            etag_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(partial_path, output_path)
+        etag_path.unlink(missing_ok=True)
         logger.info(f"✅ Saved data to {output_path}")
 
-    def download_split(self, start: str, end: str, out_dir: Path):
+    def _verify(self, path: Path, expected_size: Optional[int], expected_md5: Optional[str],
+                expected_sha256: Optional[str]):
+        size = path.stat().st_size
+        if expected_size is not None and size != expected_size:
+            raise DownloadError(f"{path.name}: got {size} bytes, expected {expected_size}")
+        if size < 2 * len(PARQUET_MAGIC):
+            raise DownloadError(f"{path.name} is not a complete parquet file")
+
+        md5, sha256 = hashlib.md5(), hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.settings.DOWNLOAD_CHUNK_BYTES), b""):
+                md5.update(chunk)
+                sha256.update(chunk)
+        if expected_md5 is not None and md5.hexdigest() != expected_md5:
+            raise DownloadError(f"{path.name}: MD5 {md5.hexdigest()} does not match ETag {expected_md5}")
+        if expected_sha256 is not None and sha256.hexdigest() != expected_sha256.lower():
+            raise DownloadError(f"{path.name}: SHA-256 {sha256.hexdigest()} does not match {expected_sha256}")
+
+        with open(path, "rb") as f:
+            head = f.read(len(PARQUET_MAGIC))
+            f.seek(-len(PARQUET_MAGIC), os.SEEK_END)
+            tail = f.read()
+        if head != PARQUET_MAGIC or tail != PARQUET_MAGIC:
+            raise DownloadError(f"{path.name} is not a complete parquet file")
+
+    def download_split(self, start: str, end: str, out_dir: Path) -> List[Path]:
+        """
+        Download every month in [start, end] concurrently on a bounded
+        thread pool. All months are attempted; the first failure is raised
+        once the others have finished.
+        """
         months = self.generate_month_range(start, end)
-        for year_month in months:
-            url = self.settings.DATA_URL.format(year_month=year_month)
+        urls = [self.settings.DATA_URL.format(year_month=year_month) for year_month in months]
+        for url in urls:
             logger.info(f"⬇️ Downloading: {url}")
-            self.download_and_save_parquet_file(url, out_dir)
+
+        workers = max(1, min(self.settings.DOWNLOAD_WORKERS, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            futures = [pool.submit(self.download_and_save_parquet_file, url, out_dir) for url in urls]
+
+        paths, errors = [], []
+        for url, future in zip(urls, futures):
+            try:
+                paths.append(future.result())
+            except Exception as e:
+                logger.error(f"❌ Failed to download {url}: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return paths
 
     def download_all(self):
         logger.info("📥 Downloading training data...")
@@ -61,4 +218,3 @@ class DataDownloader:
             self.settings.TESTING_DATA_DATE["end"],
             self.test_dir
         )
-
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, Optional
+from loguru import logger
+from .read_data import iter_parquet_batches
+
+# Bump when the layout of cached shards changes
+CACHE_FORMAT = 1
+
+
+def file_fingerprint(path: Path, chunk_bytes: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Per-month cache of cleaned features, one parquet shard per raw file.
+
+    A shard is keyed by the SHA-256 of its raw file and by the parts of the
+    `FeatureEngineer` configuration that change cleaning output, so only new
+    or changed months are featurized again. Shards hold the cleaned columns
+    before vectorization: the vocabulary depends on every training month and
+    is fitted on the assembled shards with `fit_transform_cleaned`.
+    """
+
+    def __init__(self, cache_dir: Path, feature_engineer, batch_size: int = 1_000_000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.feature_engineer = feature_engineer
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def config_key(self) -> str:
+        """
+        Hash of the configuration that shapes cleaned features. The backend
+        and vectorizer are left out: every backend cleans to the same rows,
+        and vectorizing happens after the cache.
+        """
+        fe = self.feature_engineer
+        config = {
+            "format": CACHE_FORMAT,
+            "numerical": fe.numerical,
+            "categorical": fe.categorical,
+            "target": fe.target,
+            "pair_encoding": fe.pair_encoding,
+            "max_duration_minutes": fe.MAX_DURATION_MINUTES,
+            "input_columns": fe.input_columns,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    def shard_path(self, raw_path: Path, fingerprint: Optional[str] = None) -> Path:
+        fingerprint = fingerprint or file_fingerprint(raw_path)
+        return self.cache_dir / f"{Path(raw_path).stem}.{fingerprint[:16]}.{self.config_key}.parquet"
+
+    def month(self, raw_path: Path) -> pd.DataFrame:
+        """Cleaned features of one raw file, from the cache when it is current."""
+        raw_path = Path(raw_path)
+        shard = self.shard_path(raw_path)
+        if shard.exists():
+            self.hits += 1
+            logger.info(f"♻️ Using cached features for {raw_path.name}")
+            return pd.read_parquet(shard)
+
+        self.misses += 1
+        logger.info(f"⚙️ Featurizing {raw_path.name}")
+        fe = self.feature_engineer
+        df = fe.clean_stream(iter_parquet_batches(
+            raw_path, columns=fe.input_columns, filter=fe.scan_filter(), batch_size=self.batch_size
+        ))
+
+        # Write to a temporary name and rename, so an interrupted run never
+        # leaves a truncated shard behind
+        partial = shard.with_name(shard.name + ".part")
+        df.to_parquet(partial, index=False)
+        os.replace(partial, shard)
+        self._remove_stale(raw_path, keep=shard)
+        return df
+
+    def _remove_stale(self, raw_path: Path, keep: Path):
+        """Drop shards of an earlier version of the same raw file."""
+        for shard in self.cache_dir.glob(f"{raw_path.stem}.*.{self.config_key}.parquet"):
+            if shard != keep:
+                logger.info(f"Removing stale feature shard {shard.name}")
+                shard.unlink(missing_ok=True)
+
+    def folder(self, folder_path: Path) -> Iterator[pd.DataFrame]:
+        """Cleaned features of every parquet file in a folder, in name order."""
+        files = sorted(Path(folder_path).glob("*.parquet"))
+        if not files:
+            raise FileNotFoundError(f"No parquet files in {folder_path}")
+        for path in files:
+            yield self.month(path)
+        logger.info(f"📦 Feature cache for {folder_path}: {self.hits} hits, {self.misses} misses so far")
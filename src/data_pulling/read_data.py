@@ -1,47 +1,225 @@
 import pandas as pd
 from pathlib import Path
-import os
 import numpy as np
 from loguru import logger
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
 
-def load_and_concat_parquet_files(folder_path: Path) -> pd.DataFrame:
-    dataframes = []
-    for file in os.listdir(folder_path):
-        if file.endswith(".parquet"):
-            full_path = folder_path / file
-            df = pd.read_parquet(full_path)
-            dataframes.append(df)
-    return pd.concat(dataframes, ignore_index=True)
 
+@dataclass
+class ReadReport:
+    """Bytes a scan reads from a folder of parquet files vs. their size on disk."""
+    folder: str
+    files: int = 0
+    rows: int = 0
+    bytes_on_disk: int = 0
+    bytes_read: int = 0
 
-def load_train_test(raw_data_directory: str):
+    @property
+    def read_fraction(self) -> float:
+        return self.bytes_read / self.bytes_on_disk if self.bytes_on_disk else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.folder}: read {self.bytes_read / 2**20:.1f} MiB of "
+            f"{self.bytes_on_disk / 2**20:.1f} MiB on disk ({self.read_fraction:.1%}), "
+            f"{self.rows} rows from {self.files} files"
+        )
+
+
+def _bytes_scanned(dataset: "ds.FileSystemDataset", columns: Optional[List[str]],
+                   filter: Optional["ds.Expression"]) -> int:
+    """
+    Compressed size, from the parquet footers, of the column chunks a scan
+    decodes: the projected columns (all when `columns` is None) of the row
+    groups whose statistics do not rule out `filter`. Columns referenced
+    only by `filter` are not counted.
+    """
+    wanted = set(columns) if columns is not None else None
+    total = 0
+    for fragment in dataset.get_fragments():
+        row_groups = (
+            fragment.split_by_row_group(filter, schema=dataset.schema) if filter is not None else [fragment]
+        )
+        metadata = fragment.metadata
+        for row_group_fragment in row_groups:
+            for info in row_group_fragment.row_groups:
+                row_group = metadata.row_group(info.id)
+                for i in range(row_group.num_columns):
+                    chunk = row_group.column(i)
+                    if wanted is None or chunk.path_in_schema.split(".")[0] in wanted:
+                        total += chunk.total_compressed_size
+    return total
+
+
+def _parquet_dataset(folder_path: Path, columns: Optional[List[str]] = None,
+                     filter: Optional["ds.Expression"] = None) -> Tuple["ds.Dataset", ReadReport]:
+    """
+    A pyarrow dataset over the parquet files of a folder (in name order), or
+    over a single parquet file, and a ReadReport of what scanning `columns`
+    with `filter` reads. Files are read with pyarrow's native threaded I/O.
+    The schemas of all files are unified, so columns missing from some
+    months come back as nulls and integer/float drift is promoted.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    folder_path = Path(folder_path)
+    files = [folder_path] if folder_path.is_file() else sorted(folder_path.glob("*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"No parquet files in {folder_path}")
+
+    schema = pa.unify_schemas([pq.read_schema(path) for path in files], promote_options="permissive")
+    dataset = ds.dataset([str(path) for path in files], schema=schema, format="parquet")
+
+    report = ReadReport(folder=str(folder_path), files=len(files))
+    report.bytes_on_disk = sum(path.stat().st_size for path in files)
+    report.bytes_read = _bytes_scanned(dataset, columns, filter)
+    return dataset, report
+
+
+def scan_parquet_folder(folder_path: Path, columns: Optional[List[str]] = None,
+                        filter: Optional["ds.Expression"] = None) -> Tuple["pa.Table", ReadReport]:
+    """
+    Read the parquet files of a folder into one Arrow table. Only `columns`
+    are decoded and `filter` is applied during the scan, so row groups ruled
+    out by their statistics are never read.
+    """
+    dataset, report = _parquet_dataset(folder_path, columns=columns, filter=filter)
+    table = dataset.to_table(columns=columns, filter=filter)
+    report.rows = table.num_rows
+    return table, report
+
+
+def load_and_concat_parquet_files(folder_path: Path, columns: Optional[List[str]] = None,
+                                  filter: Optional["ds.Expression"] = None) -> pd.DataFrame:
+    table, report = scan_parquet_folder(folder_path, columns=columns, filter=filter)
+    logger.info(f"📥 Loaded {report}")
+    return table.to_pandas().reset_index(drop=True)
+
+
+def load_train_test(raw_data_directory: str, feature_engineer=None):
+    """
+    Load the train and test folders. With a `feature_engineer`, only the
+    columns it uses are read and its cleaning filters are applied at scan
+    time (`FeatureEngineer.input_columns` / `scan_filter`).
+    """
     train_data = Path(raw_data_directory) / "train"
     test_data = Path(raw_data_directory) / "test"
 
-    train_df = load_and_concat_parquet_files(train_data)
-    test_df = load_and_concat_parquet_files(test_data)
+    columns, filter = None, None
+    if feature_engineer is not None:
+        columns, filter = feature_engineer.input_columns, feature_engineer.scan_filter()
+
+    train_df = load_and_concat_parquet_files(train_data, columns=columns, filter=filter)
+    test_df = load_and_concat_parquet_files(test_data, columns=columns, filter=filter)
 
     return train_df, test_df
 
 def save_processed_data(X, y,
                       filename: str,
-                      output_dir: Path):
-
-    output_path = output_dir / filename
+                      output_dir: Path,
+                      compression: Optional[str] = None,
+                      shard_rows: Optional[int] = None):
+    """
+    Save a feature matrix and target as a sparse-native store directory
+    (`sparse_store.save_sparse`): CSR arrays and `y` without pickling,
+    optionally zstd/lz4 compressed and split into row shards.
+    """
+    from .sparse_store import save_sparse
 
-    np.savez_compressed(output_path, X=X, y=y)
+    output_path = Path(output_dir) / filename
+    save_sparse(output_path, X, y, compression=compression, shard_rows=shard_rows)
     logger.info(f"✅ Saved processed data to {output_path}")
 
 
+def save_processed_shards(frames: Iterable[pd.DataFrame], feature_engineer,
+                          filename: str,
+                          output_dir: Path,
+                          compression: Optional[str] = None,
+                          shard_rows: Optional[int] = None) -> Path:
+    """
+    Encode cleaned frames (e.g. `FeatureCache` months) one at a time with a
+    fitted `feature_engineer` and append each to a sparse-native store, so
+    the full feature matrix is never built. Rows keep the frame order and
+    are sorted by pickup time within each frame. Read the result with
+    `sparse_store.SparseStore`, e.g. for out-of-core training.
+    """
+    from .sparse_store import SparseStoreWriter
+
+    output_path = Path(output_dir) / filename
+    writer = SparseStoreWriter(
+        output_path, len(feature_engineer._load_dv().feature_names_),
+        compression=compression, shard_rows=shard_rows
+    )
+    for frame in frames:
+        if frame.empty:
+            continue
+        X, y = feature_engineer.transform_cleaned([frame])
+        writer.append(X, y)
+        logger.info(f"Appended {X.shape[0]} rows to {output_path} ({writer.n_rows} so far)")
+    writer.close()
+    logger.info(f"✅ Saved processed shards to {output_path}")
+    return output_path
+
+
 def load_processed_data(filename: str, output_dir: Path):
-    input_path = output_dir / filename
-    data = np.load(input_path)
-    
-    X = data["X"]
-    y = data["y"]
-    
-    logger.info(f"📥 Loaded processed data from {input_path}")
+    """
+    Load data saved by `save_processed_data`; uncompressed single-shard
+    stores come back memory-mapped. Older `.npz` files are still read.
+    """
+    from .sparse_store import SparseStore
+
+    input_path = Path(output_dir) / filename
+    if input_path.is_file():
+        # Legacy np.savez_compressed output, where a sparse X is a pickled object array
+        data = np.load(input_path, allow_pickle=True)
+        X = data["X"]
+        X = X.item() if X.dtype == object and X.shape == () else X
+        y = data["y"]
+    else:
+        X, y = SparseStore(input_path).load()
 
-    #X_train, y_train = load_processed_data("train_processed.npz", output_dir)
+    logger.info(f"📥 Loaded processed data from {input_path}")
     return X, y
+
+
+def iter_parquet_batches(folder_path: Path, columns: Optional[List[str]] = None,
+                         filter: Optional["ds.Expression"] = None,
+                         batch_size: int = 1_000_000) -> Iterator["pa.RecordBatch"]:
+    """
+    Stream the parquet files of a folder (or a single parquet file) as record
+    batches instead of loading them whole. Only `columns` are read and
+    `filter` is pushed into the scan: row groups whose statistics rule it
+    out are skipped and the remaining rows are filtered before they are
+    handed out. Files are read in name order and batches keep the file order.
+    """
+    dataset, report = _parquet_dataset(folder_path, columns=columns, filter=filter)
+    for batch in dataset.to_batches(columns=columns, filter=filter, batch_size=batch_size):
+        if batch.num_rows:
+            report.rows += batch.num_rows
+            yield batch
+    logger.info(f"📥 Streamed {report}")
+
+
+def stream_train_test(raw_data_directory: str, feature_engineer, batch_size: int = 1_000_000):
+    """
+    Streaming counterpart of `load_train_test`: batch iterators over the
+    train and test files, reading only the columns `feature_engineer` needs
+    and pre-filtered with its cleaning rules. Feed them to
+    `FeatureEngineer.fit_transform_stream` / `transform_stream`.
+    """
+    def batches(folder):
+        return iter_parquet_batches(
+            Path(raw_data_directory) / folder,
+            columns=feature_engineer.input_columns,
+            filter=feature_engineer.scan_filter(),
+            batch_size=batch_size
+        )
+
+    return batches("train"), batches("test")
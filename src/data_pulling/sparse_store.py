@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import os
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+STORE_FORMAT = "sparse-csr/1"
+HEADER_FILE = "header.json"
+
+# Codecs come from pyarrow, so no extra dependency is needed. None stores
+# plain .npy files, which load memory-mapped.
+COMPRESSIONS = (None, "zstd", "lz4")
+
+
+def _array_file(shard: int, name: str, compression: Optional[str]) -> str:
+    return f"shard-{shard:05d}.{name}.{compression or 'npy'}"
+
+
+class SparseStoreWriter:
+    """
+    Writes a `SparseStore` directory shard by shard, so a matrix larger than
+    memory can be saved from chunks: `append(X, y)` writes the rows of each
+    chunk as one or more shards of at most `shard_rows` rows, and `close`
+    writes the header and moves the store into place. Chunks must all have
+    `n_features` columns.
+    """
+
+    def __init__(self, path: Path, n_features: int, compression: Optional[str] = None,
+                 shard_rows: Optional[int] = None, compression_level: Optional[int] = None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        self.path = Path(path)
+        self.n_features = n_features
+        self.compression = compression
+        self.shard_rows = shard_rows
+        self.codec = None
+        if compression is not None:
+            import pyarrow as pa
+
+            self.codec = pa.Codec(compression, compression_level=compression_level)
+
+        self.partial = self.path.with_name(self.path.name + ".part")
+        shutil.rmtree(self.partial, ignore_errors=True)
+        self.partial.mkdir(parents=True)
+        self.shards = []
+        self.n_rows = 0
+        self.nnz = 0
+        self.dtypes = None
+
+    def append(self, X, y):
+        import scipy.sparse as sp
+
+        X = sp.csr_matrix(X)
+        y = np.asarray(y)
+        n_rows = X.shape[0]
+        if len(y) != n_rows:
+            raise ValueError(f"X has {n_rows} rows but y has {len(y)}.")
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, the store has {self.n_features}.")
+        dtypes = {
+            "data": X.data.dtype.str,
+            "indices": X.indices.dtype.str,
+            "indptr": X.indptr.dtype.str,
+            "y": y.dtype.str,
+        }
+        if self.dtypes is not None and dtypes != self.dtypes:
+            raise ValueError(f"Chunk dtypes {dtypes} differ from the store's {self.dtypes}.")
+        self.dtypes = dtypes
+
+        shard_rows = self.shard_rows or max(n_rows, 1)
+        for start in range(0, max(n_rows, 1), shard_rows):
+            stop = min(start + shard_rows, n_rows)
+            self._write_shard(X, y, start, stop)
+
+    def _write_shard(self, X, y, start: int, stop: int):
+        i = len(self.shards)
+        nnz_start, nnz_stop = int(X.indptr[start]), int(X.indptr[stop])
+        # indptr is stored local to the shard, starting at 0
+        arrays = {
+            "data": X.data[nnz_start:nnz_stop],
+            "indices": X.indices[nnz_start:nnz_stop],
+            "indptr": (X.indptr[start:stop + 1] - nnz_start).astype(X.indptr.dtype),
+            "y": y[start:stop],
+        }
+        for name, array in arrays.items():
+            file_path = self.partial / _array_file(i, name, self.compression)
+            if self.codec is None:
+                np.save(file_path, np.ascontiguousarray(array))
+            else:
+                with open(file_path, "wb") as f:
+                    f.write(self.codec.compress(np.ascontiguousarray(array), asbytes=True))
+        rows = stop - start
+        self.shards.append({"rows": [self.n_rows, self.n_rows + rows], "nnz": nnz_stop - nnz_start})
+        self.n_rows += rows
+        self.nnz += nnz_stop - nnz_start
+
+    def close(self) -> Path:
+        if self.dtypes is None:
+            raise ValueError("No rows have been appended to the store.")
+        with open(self.partial / HEADER_FILE, "w") as f:
+            json.dump({
+                "format": STORE_FORMAT,
+                "shape": [self.n_rows, self.n_features],
+                "nnz": self.nnz,
+                "compression": self.compression,
+                "dtypes": self.dtypes,
+                "shards": self.shards,
+            }, f, indent=4)
+
+        # Replace any earlier save in one step, so readers never see a mix
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        os.replace(self.partial, self.path)
+        return self.path
+
+
+def save_sparse(path: Path, X, y, compression: Optional[str] = None,
+                shard_rows: Optional[int] = None, compression_level: Optional[int] = None) -> Path:
+    """
+    Save a CSR matrix and its target as a directory of flat arrays: the CSR
+    `data`, `indices` and `indptr` and `y`, split into shards of
+    `shard_rows` rows (one shard by default), plus a JSON header. Nothing is
+    pickled. With `compression` ("zstd" or "lz4") every array is compressed
+    on its own so a shard can be read without the others.
+    """
+    writer = SparseStoreWriter(path, X.shape[1], compression=compression, shard_rows=shard_rows,
+                               compression_level=compression_level)
+    writer.append(X, y)
+    return writer.close()
+
+
+class SparseStore:
+    """
+    Reader for a directory written by `save_sparse`. Uncompressed stores are
+    memory-mapped, so loading is instant and shard or row-range reads only
+    touch the pages they need; compressed stores decompress one shard at a
+    time.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        header_path = self.path / HEADER_FILE
+        if not header_path.exists():
+            raise FileNotFoundError(f"No processed data at {self.path}")
+        with open(header_path) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != STORE_FORMAT:
+            raise ValueError(f"{self.path} has unknown format {self.header.get('format')}")
+        self.shape = tuple(self.header["shape"])
+        self.compression = self.header["compression"]
+        self.shards = self.header["shards"]
+
+    @property
+    def n_rows(self) -> int:
+        return self.shape[0]
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.shards)
+
+    def _array(self, shard: int, name: str, length: int) -> np.ndarray:
+        file_path = self.path / _array_file(shard, name, self.compression)
+        if self.compression is None:
+            return np.load(file_path, mmap_mode="r")
+
+        import pyarrow as pa
+
+        dtype = np.dtype(self.header["dtypes"][name])
+        with open(file_path, "rb") as f:
+            compressed = f.read()
+        buffer = pa.Codec(self.compression).decompress(compressed, decompressed_size=length * dtype.itemsize)
+        return np.frombuffer(buffer, dtype=dtype)
+
+    def shard(self, i: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """Rows of shard `i` as (X, y)."""
+        import scipy.sparse as sp
+
+        start, stop = self.shards[i]["rows"]
+        n_rows, nnz = stop - start, self.shards[i]["nnz"]
+        X = sp.csr_matrix((
+            self._array(i, "data", nnz),
+            self._array(i, "indices", nnz),
+            self._array(i, "indptr", n_rows + 1),
+        ), shape=(n_rows, self.shape[1]))
+        return X, self._array(i, "y", n_rows)
+
+    def iter_shards(self) -> Iterator[Tuple[sp.csr_matrix, np.ndarray]]:
+        for i in range(self.n_shards):
+            yield self.shard(i)
+
+    def rows(self, start: int, stop: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """Rows [start, stop) as (X, y), reading only the shards they span."""
+        import scipy.sparse as sp
+
+        start, stop = max(start, 0), min(stop, self.n_rows)
+        parts = []
+        for i, shard in enumerate(self.shards):
+            shard_start, shard_stop = shard["rows"]
+            if shard_stop <= start or shard_start >= stop:
+                continue
+            X, y = self.shard(i)
+            lo, hi = max(start, shard_start) - shard_start, min(stop, shard_stop) - shard_start
+            parts.append((X[lo:hi], y[lo:hi]))
+
+        if not parts:
+            return sp.csr_matrix((0, self.shape[1])), np.empty(0, dtype=self.header["dtypes"]["y"])
+        if len(parts) == 1:
+            return parts[0]
+        return sp.vstack([X for X, _ in parts], format="csr"), np.concatenate([y for _, y in parts])
+
+    def load(self) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """
+        The whole matrix. A single uncompressed shard is returned
+        memory-mapped without copying; otherwise shards are concatenated.
+        """
+        if self.n_shards == 1:
+            return self.shard(0)
+        return self.rows(0, self.n_rows)
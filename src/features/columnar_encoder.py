@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+from .compiled_inference import parse_zone_ids, zone_number
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import scipy.sparse as sp
+    from sklearn.feature_extraction import DictVectorizer
+
+# Integer PU_DO encoding: pu * PAIR_BASE + do, for zone IDs below PAIR_BASE
+PAIR_BASE = 1000
+
+
+def encode_pairs(pu_ids, do_ids) -> np.ndarray:
+    """
+    Integer PU_DO codes for raw pickup/dropoff IDs (ints or decimal strings).
+    Pairs that have no "<pu>_<do>" equivalent in range get -1 (unknown).
+    """
+    pu = parse_zone_ids(pu_ids)
+    do = parse_zone_ids(do_ids)
+    valid = (pu >= 0) & (do >= 0) & (pu < PAIR_BASE) & (do < PAIR_BASE)
+    return np.where(valid, pu * PAIR_BASE + do, -1)
+
+
+def format_pair(code: int) -> str:
+    """The "<pu>_<do>" string value of a PU_DO code."""
+    return f"{code // PAIR_BASE}_{code % PAIR_BASE}"
+
+
+def parse_pair(value: str) -> Optional[int]:
+    """The PU_DO code of a "<pu>_<do>" string value, None if it has none."""
+    pu, _, do = value.partition("_")
+    pu, do = zone_number(pu), zone_number(do)
+    if pu is None or do is None or pu >= PAIR_BASE or do >= PAIR_BASE:
+        return None
+    return pu * PAIR_BASE + do
+
+
+class ColumnarEncoder:
+    """
+    DictVectorizer-compatible one-hot encoder that works on DataFrame columns.
+
+    Categorical columns are factorized to integer codes and the CSR matrix is
+    assembled from NumPy arrays, instead of turning every row into a Python
+    dict first. The vocabulary, column order and output match a
+    DictVectorizer fitted on `df[categorical + numerical].to_dict("records")`,
+    and convert to and from a fitted DictVectorizer so the saved
+    `dict_vectorizer.pkl` layout is unchanged.
+
+    Columns listed in `pair_codes` hold integer PU_DO codes (`encode_pairs`)
+    instead of "<pu>_<do>" strings; they are named in the vocabulary exactly
+    like their string form.
+    """
+
+    def __init__(self, categorical: List[str], numerical: List[str], separator: str = "=",
+                 pair_codes: Sequence[str] = ()):
+        self.categorical = list(categorical)
+        self.numerical = list(numerical)
+        self.separator = separator
+        self.pair_codes = list(pair_codes)
+        self.feature_names_: List[str] = []
+        self.vocabulary_: Dict[str, int] = {}
+        # Per categorical column: the known values and their feature columns
+        self._categories: Dict[str, pd.Index] = {}
+        self._category_columns: Dict[str, np.ndarray] = {}
+
+    def _prefix(self, column: str) -> str:
+        return f"{column}{self.separator}"
+
+    def _set_vocabulary(self, feature_names: List[str]):
+        import pandas as pd
+
+        self.feature_names_ = list(feature_names)
+        self.vocabulary_ = {name: i for i, name in enumerate(self.feature_names_)}
+
+        for column in self.categorical:
+            prefix = self._prefix(column)
+            values, columns = [], []
+            for name, i in self.vocabulary_.items():
+                if not name.startswith(prefix):
+                    continue
+                value = name[len(prefix):]
+                if column in self.pair_codes:
+                    # Values without an integer code can never be matched
+                    value = parse_pair(value)
+                    if value is None:
+                        continue
+                values.append(value)
+                columns.append(i)
+            dtype = np.int64 if column in self.pair_codes else object
+            self._categories[column] = pd.Index(values, dtype=dtype)
+            self._category_columns[column] = np.asarray(columns, dtype=np.int64)
+
+    def _feature_names(self, df: pd.DataFrame) -> set:
+        import pandas as pd
+
+        names = set(self.numerical)
+        for column in self.categorical:
+            if column in self.pair_codes:
+                codes = pd.unique(df[column].to_numpy(dtype=np.int64))
+                values = [format_pair(code) for code in codes[codes >= 0]]
+            else:
+                values = pd.unique(df[column].to_numpy(dtype=object))
+            names.update(f"{self._prefix(column)}{value}" for value in values)
+        return names
+
+    def fit(self, df: pd.DataFrame) -> "ColumnarEncoder":
+        return self.fit_stream([df])
+
+    def fit_stream(self, frames: Iterable[pd.DataFrame]) -> "ColumnarEncoder":
+        """
+        Fit the vocabulary of all `frames` seen one at a time, without
+        holding them together. Same result as `fit` on their concatenation.
+        """
+        names = set(self.numerical)
+        for df in frames:
+            names.update(self._feature_names(df))
+        # DictVectorizer(sort=True) orders features by name
+        self._set_vocabulary(sorted(names))
+        return self
+
+    def fit_transform(self, df: pd.DataFrame) -> sp.csr_matrix:
+        return self.fit(df).transform(df)
+
+    def transform(self, df: pd.DataFrame) -> sp.csr_matrix:
+        """
+        Encode rows; categories and features unseen during fit are dropped,
+        like DictVectorizer.transform.
+        """
+        import scipy.sparse as sp
+
+        n_rows = len(df)
+        if n_rows == 0:
+            raise ValueError("Sample sequence X is empty.")
+
+        n_fields = len(self.categorical) + len(self.numerical)
+        columns = np.empty((n_rows, n_fields), dtype=np.int64)
+        values = np.empty((n_rows, n_fields), dtype=np.float64)
+
+        for i, column in enumerate(self.categorical):
+            dtype = np.int64 if column in self.pair_codes else object
+            codes = self._categories[column].get_indexer(df[column].to_numpy(dtype=dtype))
+            known = self._category_columns[column]
+            columns[:, i] = np.where(codes >= 0, known[np.maximum(codes, 0)] if known.size else -1, -1)
+            values[:, i] = 1.0
+
+        for i, name in enumerate(self.numerical, start=len(self.categorical)):
+            columns[:, i] = self.vocabulary_.get(name, -1)
+            values[:, i] = df[name].to_numpy(dtype=np.float64)
+
+        # DictVectorizer sorts the column indices within each row
+        order = np.argsort(columns, axis=1, kind="stable")
+        columns = np.take_along_axis(columns, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+
+        present = columns >= 0
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+
+        return sp.csr_matrix(
+            (values[present], columns[present], indptr),
+            shape=(n_rows, len(self.feature_names_))
+        )
+
+    def to_dict_vectorizer(self) -> DictVectorizer:
+        """A fitted DictVectorizer with the same vocabulary."""
+        from sklearn.feature_extraction import DictVectorizer
+
+        dv = DictVectorizer(separator=self.separator)
+        dv.feature_names_ = list(self.feature_names_)
+        dv.vocabulary_ = dict(self.vocabulary_)
+        return dv
+
+    @classmethod
+    def from_dict_vectorizer(cls, dv: DictVectorizer, categorical: List[str],
+                             numerical: List[str], pair_codes: Sequence[str] = ()) -> "ColumnarEncoder":
+        encoder = cls(categorical, numerical, separator=dv.separator, pair_codes=pair_codes)
+        encoder._set_vocabulary(dv.feature_names_)
+        return encoder
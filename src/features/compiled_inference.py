@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+
+def parse_zone_ids(values) -> np.ndarray:
+    """
+    Convert raw zone IDs (ints or their decimal strings) into an int64 array.
+    Anything the string path would not match exactly (e.g. "007", "7.0",
+    "abc") is mapped to -1 so it is treated as an unknown zone.
+    """
+    ids = np.asarray(values)
+    if ids.dtype.kind in "iu":
+        return ids.astype(np.int64, copy=False)
+
+    ids = ids.astype(str)
+    canonical = np.char.isdigit(ids) & ~(
+        np.char.startswith(ids, "0") & (np.char.str_len(ids) > 1)
+    )
+    parsed = np.full(ids.shape, -1, dtype=np.int64)
+    parsed[canonical] = ids[canonical].astype(np.int64)
+    return parsed
+
+
+def zone_number(zone_id) -> Optional[int]:
+    """
+    Scalar counterpart of `parse_zone_ids`: the integer zone for a canonical
+    decimal ID, otherwise None.
+    """
+    if isinstance(zone_id, (int, np.integer)):
+        return int(zone_id) if zone_id >= 0 else None
+    zone_id = str(zone_id)
+    if not zone_id.isdigit() or (zone_id.startswith("0") and len(zone_id) > 1):
+        return None
+    return int(zone_id)
+
+
+class CompiledInference:
+    """
+    Inference lookup compiled once from a fitted DictVectorizer.
+
+    The `PU_DO=<pu>_<do>` vocabulary is turned into a dense integer table
+    indexed by (PU, DO) that holds the feature column, so feature vectors can
+    be emitted straight from raw IDs without building dicts or a DataFrame.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], pair_feature: str,
+                 numerical: List[str], separator: str = "="):
+        self.numerical = list(numerical)
+        self.n_features = len(vocabulary)
+
+        prefix = f"{pair_feature}{separator}"
+        pairs = []
+        for name, column in vocabulary.items():
+            if not name.startswith(prefix):
+                continue
+            pu, _, do = name[len(prefix):].partition("_")
+            if not (pu.isdigit() and do.isdigit()):
+                raise ValueError(f"Feature '{name}' is not an integer zone pair.")
+            if str(int(pu)) != pu or str(int(do)) != do:
+                raise ValueError(f"Feature '{name}' is not an integer zone pair.")
+            pairs.append((int(pu), int(do), column))
+
+        max_id = max((max(pu, do) for pu, do, _ in pairs), default=0)
+        self.pair_columns = np.full((max_id + 1, max_id + 1), -1, dtype=np.int32)
+        for pu, do, column in pairs:
+            self.pair_columns[pu, do] = column
+
+        # Numerical features missing from the vocabulary are dropped, just
+        # like DictVectorizer.transform drops unseen feature names
+        self.numerical_columns = np.array(
+            [vocabulary.get(name, -1) for name in self.numerical], dtype=np.int64
+        )
+
+    @classmethod
+    def from_vectorizer(cls, dv, pair_feature: str, numerical: List[str]):
+        return cls(dv.vocabulary_, pair_feature, numerical, separator=dv.separator)
+
+    def lookup(self, pu_ids, do_ids) -> np.ndarray:
+        """
+        Return the PU_DO feature column for each (PU, DO) pair, -1 if unknown.
+        """
+        pu = parse_zone_ids(pu_ids)
+        do = parse_zone_ids(do_ids)
+        size = self.pair_columns.shape[0]
+        known = (pu >= 0) & (pu < size) & (do >= 0) & (do < size)
+
+        columns = np.full(pu.shape, -1, dtype=np.int64)
+        columns[known] = self.pair_columns[pu[known], do[known]]
+        return columns
+
+    def transform(self, pu_ids, do_ids, numerical_values: Sequence) -> sp.csr_matrix:
+        """
+        Build the same CSR matrix DictVectorizer.transform would produce for
+        rows of {PU_DO: "<pu>_<do>", <numerical>: value}.
+        """
+        import scipy.sparse as sp
+
+        pair_columns = self.lookup(pu_ids, do_ids)
+        n_rows = pair_columns.shape[0]
+
+        columns = np.empty((n_rows, 1 + len(self.numerical)), dtype=np.int64)
+        values = np.empty(columns.shape, dtype=np.float64)
+        columns[:, 0] = pair_columns
+        values[:, 0] = 1.0
+        for i, column_values in enumerate(numerical_values, start=1):
+            columns[:, i] = self.numerical_columns[i - 1]
+            values[:, i] = np.asarray(column_values, dtype=np.float64)
+
+        # DictVectorizer sorts the column indices within each row
+        order = np.argsort(columns, axis=1, kind="stable")
+        columns = np.take_along_axis(columns, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+
+        present = columns >= 0
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+
+        return sp.csr_matrix(
+            (values[present], columns[present], indptr),
+            shape=(n_rows, self.n_features)
+        )
@@ -1,8 +1,31 @@
-import pandas as pd
+from __future__ import annotations
+
 from loguru import logger
-from typing import List, Optional
-from sklearn.feature_extraction import DictVectorizer
-import joblib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+from .columnar_encoder import ColumnarEncoder, encode_pairs
+from .compiled_inference import CompiledInference
+
+# pandas, scikit-learn and joblib are imported where they are used so that
+# the serving app can import this module without paying for them
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow.dataset as ds
+    from sklearn.feature_extraction import DictVectorizer
+
+# Dataframe engines for cleaning and feature engineering. "arrow" uses
+# pyarrow.compute; "polars" needs the optional polars package and runs as a
+# lazy, multi-threaded query. All backends return the same rows and features.
+BACKENDS = ("pandas", "arrow", "polars")
+
+# How training features are vectorized: "columnar" builds the CSR matrix
+# straight from the columns, "dict" goes through per-row dicts and
+# DictVectorizer. Both produce the same matrix and dict_vectorizer.pkl.
+VECTORIZERS = ("columnar", "dict")
+
+# How PU_DO is represented between cleaning and vectorization: "<pu>_<do>"
+# strings, or integer codes pu * 1000 + do that avoid building a Python
+# string per trip. The saved vocabulary is the same either way.
+PAIR_ENCODINGS = ("string", "integer")
 
 class FeatureEngineer:
     """
@@ -18,21 +41,72 @@ class FeatureEngineer:
     PU_DO = "PU_DO"
     DURATION = "duration"
 
+    # Trips kept by `_clean_and_engineer`: 0 < duration <= MAX_DURATION_MINUTES
+    MAX_DURATION_MINUTES = 90
+
     def __init__(
         self,
         numerical: List[str] = None,
         categorical: List[str] = None,
         target: str = DURATION,
         dv_path: str = "src/artifacts/dict_vectorizer.pkl",  # Path to save the DictVectorizer
+        backend: str = "pandas",
+        vectorizer: str = "columnar",
+        pair_encoding: str = "string",
     ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown feature backend '{backend}', expected one of {BACKENDS}")
+        if vectorizer not in VECTORIZERS:
+            raise ValueError(f"Unknown vectorizer '{vectorizer}', expected one of {VECTORIZERS}")
+        if pair_encoding not in PAIR_ENCODINGS:
+            raise ValueError(f"Unknown pair encoding '{pair_encoding}', expected one of {PAIR_ENCODINGS}")
+        if pair_encoding == "integer" and vectorizer != "columnar":
+            raise ValueError("Integer pair encoding needs the columnar vectorizer.")
+        self.backend = backend
+        self.vectorizer = vectorizer
+        self.pair_encoding = pair_encoding
         self.numerical = numerical or ["trip_distance"]
         self.categorical = categorical or [self.PU_DO]
         self.target = target
         self.cols = self.numerical + self.categorical + [self.target]
         self.dv: Optional[DictVectorizer] = None
         self.dv_path = dv_path
+        self.compiled: Optional[CompiledInference] = None
+        self.encoder: Optional[ColumnarEncoder] = None
+
+    def _load_dv(self):
+        if not self.dv:
+            import joblib
+
+            # Load the saved DictVectorizer if not already loaded
+            try:
+                self.dv = joblib.load(self.dv_path)
+                logger.info(f"DictVectorizer loaded from {self.dv_path}")
+            except FileNotFoundError:
+                logger.error(f"DictVectorizer not found at {self.dv_path}. Please run fit_transform first.")
+                raise ValueError(f"DictVectorizer not found. Please run fit_transform first.")
+        return self.dv
+
+    def _clean_and_engineer(self, df, extra_columns: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Drop invalid trips, add the duration target and the PU_DO feature and
+        sort by pickup time with the configured backend. Accepts a pandas
+        DataFrame or a pyarrow Table/RecordBatch and returns a pandas
+        DataFrame of `cols` followed by `extra_columns`.
+        """
+        columns = self.cols + list(extra_columns)
+        if self.backend == "arrow":
+            return self._clean_and_engineer_arrow(df, columns)
+        if self.backend == "polars":
+            return self._clean_and_engineer_polars(df, columns)
+        return self._clean_and_engineer_pandas(df, columns)
+
+    def _clean_and_engineer_pandas(self, df, columns: List[str]) -> pd.DataFrame:
+        import pandas as pd
+
+        if not isinstance(df, pd.DataFrame):
+            df = df.to_pandas()
 
-    def _clean_and_engineer(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
 
         logger.info("Dropping rows with missing airport fee...")
@@ -48,62 +122,299 @@ class FeatureEngineer:
         ).dt.total_seconds() / 60
 
         logger.info("Filtering out trips with invalid durations...")
-        df = df.query("duration > 0 and duration <= 90").reset_index(drop=True)
+        df = df[(df[self.target] > 0) & (df[self.target] <= self.MAX_DURATION_MINUTES)].reset_index(drop=True)
 
         logger.info("Creating PU_DO categorical feature...")
-        df[self.PU] = df[self.PU].astype(str)
-        df[self.DO] = df[self.DO].astype(str)
-        df[self.PU_DO] = df[self.PU] + "_" + df[self.DO]
+        if self.pair_encoding == "integer":
+            df[self.PU_DO] = encode_pairs(df[self.PU].to_numpy(), df[self.DO].to_numpy())
+        else:
+            df[self.PU] = df[self.PU].astype(str)
+            df[self.DO] = df[self.DO].astype(str)
+            df[self.PU_DO] = df[self.PU] + "_" + df[self.DO]
 
         logger.info("Sorting dataframe by pickup datetime...")
-        df = df.sort_values(self.PICKUP_DATETIME)
+        # Stable sort so trips with the same pickup time keep their input
+        # order. The default quicksort left ties in an arbitrary order that
+        # the arrow/polars backends and chunked streaming cannot reproduce.
+        df = df.sort_values(self.PICKUP_DATETIME, kind="stable")
+
+        return df[columns]
 
-        return df[self.cols]
+    def _clean_and_engineer_arrow(self, df, columns: List[str]) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if isinstance(df, pa.RecordBatch):
+            table = pa.Table.from_batches([df])
+        elif isinstance(df, pa.Table):
+            table = df
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+
+        logger.info("Dropping rows with missing airport fee...")
+        table = table.filter(pc.invert(pc.is_null(table[self.AIRPORT_FEE], nan_is_null=True)))
+
+        logger.info("Calculating trip duration in minutes...")
+        # Nanosecond counts divided by 1e9 give the same floats as pandas'
+        # total_seconds for any source resolution
+        pickup = pc.cast(table[self.PICKUP_DATETIME], pa.timestamp("ns"))
+        dropoff = pc.cast(table[self.DROPOFF_DATETIME], pa.timestamp("ns"))
+        elapsed_ns = pc.cast(pc.subtract(dropoff, pickup), pa.int64())
+        duration = pc.divide(pc.divide(pc.cast(elapsed_ns, pa.float64()), 1e9), 60.0)
+        table = table.set_column(table.schema.get_field_index(self.PICKUP_DATETIME), self.PICKUP_DATETIME, pickup)
+        table = table.append_column(self.target, duration)
+
+        logger.info("Filtering out trips with invalid durations...")
+        duration = table[self.target]
+        table = table.filter(pc.and_(pc.greater(duration, 0), pc.less_equal(duration, self.MAX_DURATION_MINUTES)))
+
+        logger.info("Creating PU_DO categorical feature...")
+        if self.pair_encoding == "integer":
+            pu_do = pa.array(encode_pairs(table[self.PU].to_numpy(), table[self.DO].to_numpy()))
+        else:
+            pu_do = pc.binary_join_element_wise(
+                pc.cast(table[self.PU], pa.string()), pc.cast(table[self.DO], pa.string()), "_"
+            )
+        table = table.append_column(self.PU_DO, pu_do)
+
+        logger.info("Sorting by pickup datetime...")
+        # sort_indices is stable, like the pandas backend
+        table = table.take(pc.sort_indices(table, sort_keys=[(self.PICKUP_DATETIME, "ascending")]))
+
+        return table.select(columns).to_pandas()
+
+    def _clean_and_engineer_polars(self, df, columns: List[str]) -> pd.DataFrame:
+        try:
+            import polars as pl
+        except ImportError as e:
+            raise ImportError("The polars feature backend needs `pip install polars`.") from e
+
+        frame = pl.from_arrow(df) if not hasattr(df, "iloc") else pl.from_pandas(df)
+        airport_fee = pl.col(self.AIRPORT_FEE)
+        if frame.schema[self.AIRPORT_FEE].is_float():
+            airport_fee = airport_fee.fill_nan(None)
+
+        def timestamp(name):
+            column = pl.col(name)
+            if frame.schema[name] == pl.String:
+                column = column.str.to_datetime()
+            return column.cast(pl.Datetime("ns"))
+
+        elapsed_ns = (timestamp(self.DROPOFF_DATETIME) - timestamp(self.PICKUP_DATETIME)).cast(pl.Int64)
+        if self.pair_encoding == "integer":
+            # Zone IDs are carried through and coded in NumPy, the same way
+            # as the other backends
+            pu_do = []
+            selected = [name for name in columns if name != self.PU_DO] + [self.PU, self.DO]
+        else:
+            pu_do = [pl.concat_str(
+                [pl.col(self.PU).cast(pl.String), pl.col(self.DO).cast(pl.String)], separator="_"
+            ).alias(self.PU_DO)]
+            selected = columns
+
+        logger.info("Cleaning and engineering features with a lazy polars query...")
+        # Durations stay integer nanoseconds inside the query: polars divides
+        # floats by multiplying with the reciprocal, which is not bit-identical
+        # to pandas. 0 < ns <= 90 minutes selects exactly the same trips.
+        result = (
+            frame.lazy()
+            .filter(airport_fee.is_not_null())
+            .with_columns(timestamp(self.PICKUP_DATETIME), elapsed_ns.alias(self.target))
+            .filter((pl.col(self.target) > 0) & (pl.col(self.target) <= self.MAX_DURATION_MINUTES * 60 * 10**9))
+            .with_columns(*pu_do)
+            .sort(self.PICKUP_DATETIME, maintain_order=True, nulls_last=True)
+            .select(selected)
+            .collect()
+            .to_pandas()
+        )
+        result[self.target] = result[self.target].to_numpy() / 1e9 / 60
+        if self.pair_encoding == "integer":
+            result[self.PU_DO] = encode_pairs(result.pop(self.PU).to_numpy(), result.pop(self.DO).to_numpy())
+        return result[columns]
+
+    def _pair_code_columns(self) -> List[str]:
+        return [self.PU_DO] if self.pair_encoding == "integer" and self.PU_DO in self.categorical else []
+
+    def _columnar_encoder(self) -> ColumnarEncoder:
+        if self.encoder is None:
+            self.encoder = ColumnarEncoder.from_dict_vectorizer(
+                self._load_dv(), categorical=self.categorical, numerical=self.numerical,
+                pair_codes=self._pair_code_columns()
+            )
+        return self.encoder
 
     def fit_transform(self, df: pd.DataFrame):
         logger.info("Fitting and transforming training data...")
-        df = self._clean_and_engineer(df)
-        self.dv = DictVectorizer()
-        features = df[self.categorical + self.numerical].to_dict(orient="records")
-        X = self.dv.fit_transform(features)
+        return self._fit_vectorize(self._clean_and_engineer(df))
+
+    def transform(self, df: pd.DataFrame):
+        logger.info("Transforming new data...")
+        self._load_dv()
+        return self._vectorize(self._clean_and_engineer(df))
+
+    def fit_transform_stream(self, batches: Iterable):
+        """
+        `fit_transform` over an iterable of chunks (DataFrames or pyarrow
+        record batches, e.g. from `read_data.iter_parquet_batches`). Only the
+        cleaned feature columns of each chunk are kept, so peak memory is
+        bounded by the features rather than the raw files. Output is the same
+        as `fit_transform` on all chunks concatenated.
+        """
+        logger.info("Fitting and transforming streamed training data...")
+        return self._fit_vectorize(self._clean_and_engineer_stream(batches))
+
+    def transform_stream(self, batches: Iterable):
+        """`transform` counterpart of `fit_transform_stream`."""
+        logger.info("Transforming streamed data...")
+        self._load_dv()
+        return self._vectorize(self._clean_and_engineer_stream(batches))
+
+    def fit_transform_cleaned(self, frames: Iterable[pd.DataFrame]):
+        """
+        `fit_transform` over frames that are already cleaned, e.g. the
+        per-month shards of a `FeatureCache`. Each frame holds `cols` plus the
+        pickup time, as returned by `clean_stream`.
+        """
+        logger.info("Fitting and transforming cleaned training data...")
+        return self._fit_vectorize(self._sort_cleaned(frames))
+
+    def transform_cleaned(self, frames: Iterable[pd.DataFrame]):
+        """`transform` counterpart of `fit_transform_cleaned`."""
+        logger.info("Transforming cleaned data...")
+        self._load_dv()
+        return self._vectorize(self._sort_cleaned(frames))
+
+    def fit_vocabulary_cleaned(self, frames: Iterable[pd.DataFrame]):
+        """
+        Fit and save the vocabulary over cleaned frames (e.g. `FeatureCache`
+        months) one frame at a time, without building the training matrix.
+        The frames can then be encoded one by one with `transform_cleaned`,
+        e.g. by `read_data.save_processed_shards`.
+        """
+        import joblib
+
+        logger.info("Fitting the vocabulary of cleaned training data...")
+        encoder = ColumnarEncoder(
+            self.categorical, self.numerical, pair_codes=self._pair_code_columns()
+        ).fit_stream(frames)
+        # Same vocabulary and layout as a DictVectorizer fitted on all rows
+        self.dv = encoder.to_dict_vectorizer()
+        self.encoder = encoder if self.vectorizer == "columnar" else None
+        self.compiled = None
+
+        joblib.dump(self.dv, self.dv_path)
+        logger.info(f"DictVectorizer saved to {self.dv_path} ({len(self.dv.feature_names_)} features)")
+        return self
+
+    def clean_stream(self, batches: Iterable) -> pd.DataFrame:
+        """
+        Clean and engineer each chunk of `batches` and return them
+        concatenated and sorted by pickup time. The pickup time is kept next
+        to `cols` so that cleaned frames can be merged in order later.
+        """
+        import pandas as pd
+
+        chunks = []
+        n_rows = 0
+        for batch in batches:
+            chunk = self._clean_and_engineer(batch, extra_columns=[self.PICKUP_DATETIME])
+            n_rows += len(chunk)
+            chunks.append(chunk)
+            logger.info(f"Cleaned chunk {len(chunks)} ({n_rows} trips so far)")
+        if not chunks:
+            raise ValueError("No data to transform.")
+
+        # Chunks are sorted and concatenated in input order, so a stable sort
+        # gives the same order as sorting all rows at once
+        df = pd.concat(chunks, ignore_index=True)
+        del chunks
+        return df.sort_values(self.PICKUP_DATETIME, kind="stable", ignore_index=True)
+
+    def _clean_and_engineer_stream(self, batches: Iterable) -> pd.DataFrame:
+        return self.clean_stream(batches)[self.cols]
+
+    def _sort_cleaned(self, frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        import pandas as pd
+
+        frames = list(frames)
+        if not frames:
+            raise ValueError("No data to transform.")
+        df = pd.concat(frames, ignore_index=True)
+        del frames
+        return df.sort_values(self.PICKUP_DATETIME, kind="stable")[self.cols]
+
+    def _fit_vectorize(self, df: pd.DataFrame):
+        import joblib
+        from sklearn.feature_extraction import DictVectorizer
+
+        if self.vectorizer == "columnar":
+            self.encoder = ColumnarEncoder(
+                self.categorical, self.numerical, pair_codes=self._pair_code_columns()
+            )
+            X = self.encoder.fit_transform(df)
+            self.dv = self.encoder.to_dict_vectorizer()
+        else:
+            self.dv = DictVectorizer()
+            features = df[self.categorical + self.numerical].to_dict(orient="records")
+            X = self.dv.fit_transform(features)
+            self.encoder = None
         y = df[self.target].values
         logger.info("Training data transformation complete.")
 
+        # A previously compiled lookup belongs to the old vocabulary
+        self.compiled = None
+
         # Save the DictVectorizer after fitting
         joblib.dump(self.dv, self.dv_path)
         logger.info(f"DictVectorizer saved to {self.dv_path}")
 
         return X, y
 
-    def transform(self, df: pd.DataFrame):
-        logger.info("Transforming new data...")
-        if not self.dv:
-            # Load the saved DictVectorizer if not already loaded
-            try:
-                self.dv = joblib.load(self.dv_path)
-                logger.info(f"DictVectorizer loaded from {self.dv_path}")
-            except FileNotFoundError:
-                logger.error(f"DictVectorizer not found at {self.dv_path}. Please run fit_transform first.")
-                raise ValueError(f"DictVectorizer not found. Please run fit_transform first.")
-        
-        df = self._clean_and_engineer(df)
-        features = df[self.categorical + self.numerical].to_dict(orient="records")
-        X = self.dv.transform(features)
+    def _vectorize(self, df: pd.DataFrame):
+        if self.vectorizer == "columnar":
+            X = self._columnar_encoder().transform(df)
+        else:
+            features = df[self.categorical + self.numerical].to_dict(orient="records")
+            X = self.dv.transform(features)
         y = df[self.target].values
         logger.info("Data transformation complete.")
         return X, y
 
+    @property
+    def input_columns(self) -> List[str]:
+        """Raw columns `_clean_and_engineer` reads; everything else can be skipped."""
+        return [
+            self.PICKUP_DATETIME, self.DROPOFF_DATETIME, self.AIRPORT_FEE, self.PU, self.DO
+        ] + [name for name in self.numerical if name != self.target]
+
+    def scan_filter(self) -> ds.Expression:
+        """
+        The row filters of `_clean_and_engineer` as a pyarrow dataset
+        expression, so scans drop missing airport fees and invalid durations
+        before rows are materialized.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        from datetime import timedelta
+
+        elapsed = pc.field(self.DROPOFF_DATETIME) - pc.field(self.PICKUP_DATETIME)
+        return (
+            ~pc.field(self.AIRPORT_FEE).is_null(nan_is_null=True)
+            & (elapsed > pa.scalar(timedelta(0)))
+            & (elapsed <= pa.scalar(timedelta(minutes=self.MAX_DURATION_MINUTES)))
+        )
+
     def inference(self, df: pd.DataFrame):
         logger.info("Transforming new data for inference...")
-        if not self.dv:
-            # Load the saved DictVectorizer if not already loaded
-            try:
-                self.dv = joblib.load(self.dv_path)
-                logger.info(f"DictVectorizer loaded from {self.dv_path}")
-            except FileNotFoundError:
-                logger.error(f"DictVectorizer not found at {self.dv_path}. Please run fit_transform first.")
-                raise ValueError(f"DictVectorizer not found. Please run fit_transform first.")
-        
+        self._load_dv()
+
+        if self.pair_encoding == "integer" and self._numerical_is_numeric(df):
+            df[self.PU_DO] = encode_pairs(df[self.PU].to_numpy(), df[self.DO].to_numpy())
+            X = self._columnar_encoder().transform(df)
+            logger.info("Data transformation complete.")
+            return X
+
+        # Non-numeric feature values are vectorized as-is by DictVectorizer
         df[self.PU] = df[self.PU].astype(str)
         df[self.DO] = df[self.DO].astype(str)
         df[self.PU_DO] = df[self.PU] + "_" + df[self.DO]
@@ -111,4 +422,38 @@ class FeatureEngineer:
 
         X = self.dv.transform(features)
         logger.info("Data transformation complete.")
-        return X
\ No newline at end of file
+        return X
+
+    def _numerical_is_numeric(self, df: pd.DataFrame) -> bool:
+        import pandas as pd
+
+        return all(pd.api.types.is_numeric_dtype(df[name]) for name in self.numerical)
+
+    def compile_inference(self) -> CompiledInference:
+        """
+        Compile the fitted DictVectorizer vocabulary into an integer (PU, DO)
+        lookup table used by `inference_raw`. Only done once per vocabulary.
+        """
+        if self.compiled is None:
+            if self.categorical != [self.PU_DO]:
+                raise ValueError(f"Compiled inference needs categorical=['{self.PU_DO}'], got {self.categorical}.")
+            self.compiled = CompiledInference.from_vectorizer(
+                self._load_dv(), pair_feature=self.PU_DO, numerical=self.numerical
+            )
+            logger.info(f"Compiled inference lookup for {self.compiled.n_features} features")
+        return self.compiled
+
+    def inference_raw(self, pu_ids, do_ids, **numerical):
+        """
+        DataFrame-free inference: build the feature matrix straight from raw
+        pickup/dropoff IDs and numerical columns passed by name, e.g.
+        `inference_raw(pu_ids, do_ids, trip_distance=distances)`.
+        The result is identical to `inference` on the equivalent DataFrame.
+        """
+        compiled = self.compile_inference()
+        missing = [name for name in self.numerical if name not in numerical]
+        if missing:
+            raise ValueError(f"Missing numerical features for inference: {missing}")
+        return compiled.transform(
+            pu_ids, do_ids, [numerical[name] for name in self.numerical]
+        )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from loguru import logger
+from .compiled_inference import parse_zone_ids, zone_number
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# NYC TLC taxi zones are numbered 1..265
+N_ZONES = 265
+
+MIN_SYNTHETIC_DISTANCE = 1.0
+MAX_SYNTHETIC_DISTANCE = 30.0
+EARTH_RADIUS_MILES = 3958.8
+
+
+def _mix64(keys: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: a fixed, process-independent 64-bit hash."""
+    keys = keys.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        keys ^= keys >> np.uint64(30)
+        keys *= np.uint64(0xBF58476D1CE4E5B9)
+        keys ^= keys >> np.uint64(27)
+        keys *= np.uint64(0x94D049BB133111EB)
+        keys ^= keys >> np.uint64(31)
+    return keys
+
+
+def _pair_keys(pu_ids, do_ids) -> np.ndarray:
+    """
+    Stable 64-bit key per (PU, DO) pair. Integer IDs are packed directly;
+    anything else is hashed with blake2b, never with the salted built-in hash().
+    """
+    pu = parse_zone_ids(pu_ids)
+    do = parse_zone_ids(do_ids)
+    keys = (pu.astype(np.uint64) << np.uint64(32)) | do.astype(np.uint64)
+
+    raw_pu, raw_do = np.asarray(pu_ids), np.asarray(do_ids)
+    for i in np.flatnonzero((pu < 0) | (do < 0)):
+        pair = f"{raw_pu[i]}-{raw_do[i]}".encode()
+        keys[i] = int.from_bytes(hashlib.blake2b(pair, digest_size=8).digest(), "little")
+    return keys
+
+
+def synthetic_distances(pu_ids, do_ids) -> np.ndarray:
+    """
+    Fictional but reproducible distances in miles, uniform in [1, 30).
+    The same pair gives the same distance in every process and worker.
+    """
+    unit = (_mix64(_pair_keys(pu_ids, do_ids)) >> np.uint64(11)) / float(1 << 53)
+    span = MAX_SYNTHETIC_DISTANCE - MIN_SYNTHETIC_DISTANCE
+    return np.round(MIN_SYNTHETIC_DISTANCE + span * unit, 2)
+
+
+def centroid_distances(centroids: pd.DataFrame, n_zones: int = N_ZONES) -> np.ndarray:
+    """
+    Great-circle distances in miles between zone centroids. `centroids` needs
+    `LocationID`, `latitude` and `longitude` columns; zones missing from it
+    get NaN rows/columns.
+    """
+    lat = np.full(n_zones, np.nan)
+    lon = np.full(n_zones, np.nan)
+    zones = centroids["LocationID"].to_numpy(dtype=np.int64)
+    in_range = (zones >= 1) & (zones <= n_zones)
+    lat[zones[in_range] - 1] = np.radians(centroids["latitude"].to_numpy()[in_range])
+    lon[zones[in_range] - 1] = np.radians(centroids["longitude"].to_numpy()[in_range])
+
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return np.round(2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a)), 2)
+
+
+class ZoneDistanceProvider:
+    """
+    Pairwise zone distances computed once at startup and answered by array
+    lookup. Entry [pu - 1, do - 1] holds the distance from `pu` to `do`.
+    """
+
+    def __init__(self, distances: np.ndarray, source: str):
+        self.distances = distances
+        self.n_zones = distances.shape[0]
+        self.source = source
+
+    @classmethod
+    def synthetic(cls, n_zones: int = N_ZONES) -> "ZoneDistanceProvider":
+        zones = np.arange(1, n_zones + 1)
+        distances = synthetic_distances(
+            np.repeat(zones, n_zones), np.tile(zones, n_zones)
+        ).reshape(n_zones, n_zones)
+        return cls(distances, source="synthetic")
+
+    @classmethod
+    def from_centroids_file(cls, path: str, n_zones: int = N_ZONES) -> "ZoneDistanceProvider":
+        import pandas as pd
+
+        distances = centroid_distances(pd.read_csv(path), n_zones=n_zones)
+        return cls(distances, source=f"centroids:{Path(path).name}")
+
+    @classmethod
+    def load(cls, centroids_path: Optional[str] = None, n_zones: int = N_ZONES) -> "ZoneDistanceProvider":
+        """
+        Use zone centroid distances when a local centroid file exists,
+        otherwise the reproducible synthetic distances.
+        """
+        if centroids_path and Path(centroids_path).exists():
+            provider = cls.from_centroids_file(centroids_path, n_zones=n_zones)
+        else:
+            provider = cls.synthetic(n_zones=n_zones)
+        logger.info(f"Zone distances ready ({provider.n_zones} zones, source: {provider.source})")
+        return provider
+
+    def distances_for(self, pu_ids, do_ids) -> np.ndarray:
+        """
+        Vectorized lookup. Pairs outside the table, or with no centroid data,
+        fall back to the synthetic distance so every pair gets an answer.
+        """
+        pu = parse_zone_ids(pu_ids)
+        do = parse_zone_ids(do_ids)
+        known = (pu >= 1) & (pu <= self.n_zones) & (do >= 1) & (do <= self.n_zones)
+
+        distances = np.full(pu.shape, np.nan)
+        distances[known] = self.distances[pu[known] - 1, do[known] - 1]
+
+        missing = np.isnan(distances)
+        if missing.any():
+            distances[missing] = synthetic_distances(
+                np.asarray(pu_ids)[missing], np.asarray(do_ids)[missing]
+            )
+        return distances
+
+    def distance(self, pu_id: str, do_id: str) -> float:
+        pu, do = zone_number(pu_id), zone_number(do_id)
+        if pu and do and pu <= self.n_zones and do <= self.n_zones:
+            distance = self.distances[pu - 1, do - 1]
+            if not np.isnan(distance):
+                return float(distance)
+        return float(self.distances_for([pu_id], [do_id])[0])
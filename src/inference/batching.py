@@ -0,0 +1,183 @@
+import asyncio
+from typing import List, Optional, Tuple
+from loguru import logger
+
+
+Row = Tuple[str, str, float]
+
+
+def score_rows(model_predictor, rows: List[Row]) -> list:
+    """
+    Score (PULocationID, DOLocationID, trip_distance) rows in one model call.
+    If the batch call fails, rows are re-scored one by one so a single bad row
+    only fails its own slot. Returns a float or an Exception per row.
+    """
+    def predict(chunk):
+        pu_ids, do_ids, distances = zip(*chunk)
+        return model_predictor.predict_trips(pu_ids, do_ids, trip_distance=distances)
+
+    try:
+        return [float(p) for p in predict(rows)]
+    except Exception as e:
+        logger.warning(f"Batch scoring failed, falling back to per-row scoring: {e}")
+
+    results = []
+    for row in rows:
+        try:
+            results.append(float(predict([row])[0]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class BatchingMetrics:
+    """
+    Counters describing how well micro-batches fill up, used to tune the
+    batch size / wait window tradeoff.
+    """
+
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.requests = 0
+        self.full_batches = 0
+        self.timed_out_batches = 0
+        # batch_size -> number of batches flushed with that size
+        self.size_histogram = {}
+
+    def record(self, batch_size: int):
+        self.batches += 1
+        self.requests += batch_size
+        self.size_histogram[batch_size] = self.size_histogram.get(batch_size, 0) + 1
+        if batch_size >= self.max_batch_size:
+            self.full_batches += 1
+        else:
+            self.timed_out_batches += 1
+
+    def as_dict(self) -> dict:
+        mean_size = self.requests / self.batches if self.batches else 0.0
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "full_batches": self.full_batches,
+            "timed_out_batches": self.timed_out_batches,
+            "mean_batch_size": mean_size,
+            "mean_fill_ratio": mean_size / self.max_batch_size,
+            "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+        }
+
+
+class PredictionCoalescer:
+    """
+    Coalesces concurrent single-trip predictions into micro-batches.
+
+    Requests are queued and flushed to the model predictor once
+    `max_batch_size` requests are waiting or `max_wait_ms` has passed since
+    the first one arrived, whichever comes first. Each caller awaits its own
+    future. With an `executor`, batches are scored off the event loop and the
+    next batch is collected while the previous one is still scoring.
+    """
+
+    def __init__(self, model_predictor, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor=None):
+        self.model_predictor = model_predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self.metrics = BatchingMetrics(max_batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushes = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Prediction coalescer started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000})"
+        )
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Let batches already handed to the model finish
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction coalescer stopped"))
+        logger.info("Prediction coalescer stopped")
+
+    async def predict(self, pu_id: str, do_id: str, trip_distance: float) -> float:
+        if self._task is None:
+            raise RuntimeError("Prediction coalescer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((pu_id, do_id, trip_distance), future))
+        return await future
+
+    async def _collect(self, batch: list):
+        """
+        Fill `batch` with queued requests. It is filled in place, so the
+        requests already taken off the queue are still there if this is
+        cancelled.
+        """
+        batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+            except asyncio.CancelledError:
+                # Stopping: score the partial batch too, `stop` waits for it
+                if batch:
+                    self._start_flush(batch)
+                raise
+            self._start_flush(batch)
+
+    def _start_flush(self, batch: list):
+        self.metrics.record(len(batch))
+        flush = asyncio.create_task(self._flush(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        try:
+            if self.executor is not None:
+                results = await self.executor.score_rows(rows)
+            else:
+                results = score_rows(self.model_predictor, rows)
+        except Exception as e:
+            results = [e] * len(rows)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,112 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+from ..features.compiled_inference import zone_number
+from ..features.zone_distance import N_ZONES, ZoneDistanceProvider
+
+
+def _metadata_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def build_duration_table(model_predictor, zone_distances: ZoneDistanceProvider,
+                         n_zones: int = N_ZONES) -> np.ndarray:
+    """
+    Predict the duration of every (PU, DO) zone pair in a single batch.
+    Entry [pu - 1, do - 1] holds the prediction for pickup `pu`, dropoff `do`.
+    """
+    zones = np.arange(1, n_zones + 1)
+    pu_ids = np.repeat(zones, n_zones).astype(str)
+    do_ids = np.tile(zones, n_zones).astype(str)
+    distances = zone_distances.distances_for(pu_ids, do_ids)
+
+    logger.info(f"Predicting durations for {len(distances)} zone pairs...")
+    predictions = model_predictor.predict_trips(pu_ids, do_ids, trip_distance=distances)
+    return np.asarray(predictions, dtype=np.float64).reshape(n_zones, n_zones)
+
+
+def save_duration_table(durations: np.ndarray, path: str, model_fingerprint: Optional[str],
+                        model_version: Optional[str] = None,
+                        distance_source: Optional[str] = None):
+    """
+    Save the table as a raw .npy file (memory-mappable) with a JSON sidecar
+    recording the model files and zone distances it was built from.
+    """
+    path = Path(path)
+    np.save(path, durations)
+    with open(_metadata_path(path), "w") as f:
+        json.dump({
+            "model_fingerprint": model_fingerprint,
+            "model_version": model_version,
+            "distance_source": distance_source,
+            "n_zones": durations.shape[0]
+        }, f, indent=4)
+    logger.info(f"✅ Saved duration table to {path}")
+
+
+class DurationTable:
+    """
+    Precomputed zone-to-zone duration predictions answered by array index.
+    """
+
+    def __init__(self, durations: np.ndarray, model_version: Optional[str] = None):
+        self.durations = durations
+        self.n_zones = durations.shape[0]
+        self.model_version = model_version
+
+    @classmethod
+    def load(cls, path: str, model_fingerprint: Optional[str],
+             distance_source: Optional[str]) -> Optional["DurationTable"]:
+        """
+        Memory-map a saved table. Returns None when the file or its metadata
+        is missing or unreadable, or when it was built from different model
+        files (by content hash) or zone distances, so callers fall back to
+        the model. An unknown (None) fingerprint or distance source never
+        matches.
+        """
+        path = Path(path)
+        if not path.exists():
+            logger.info(f"No duration table at {path}, predictions will use the model")
+            return None
+        if model_fingerprint is None or distance_source is None:
+            logger.warning(
+                f"Model files or zone distances are unknown, ignoring the duration table at {path}"
+            )
+            return None
+
+        try:
+            with open(_metadata_path(path)) as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read duration table metadata for {path}: {str(e)}; ignoring it")
+            return None
+        if not isinstance(metadata, dict):
+            logger.warning(f"Duration table metadata for {path} is malformed; ignoring it")
+            return None
+        if metadata.get("model_fingerprint") != model_fingerprint:
+            logger.warning(
+                f"Duration table at {path} was built from model files {metadata.get('model_fingerprint')}, "
+                f"current model files are {model_fingerprint}; ignoring it"
+            )
+            return None
+        if metadata.get("distance_source") != distance_source:
+            logger.warning(
+                f"Duration table at {path} was built with {metadata.get('distance_source')} distances, "
+                f"current distances are {distance_source}; ignoring it"
+            )
+            return None
+
+        durations = np.load(path, mmap_mode="r")
+        logger.info(f"Duration table loaded from {path} ({durations.shape[0]} zones)")
+        return cls(durations, model_version=metadata.get("model_version"))
+
+    def lookup(self, pu_id: str, do_id: str) -> Optional[float]:
+        """
+        Return the precomputed duration, or None if the pair is not covered.
+        """
+        pu, do = zone_number(pu_id), zone_number(do_id)
+        if not (pu and do and pu <= self.n_zones and do <= self.n_zones):
+            return None
+        return float(self.durations[pu - 1, do - 1])
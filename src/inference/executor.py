@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+from loguru import logger
+from .batching import Row, score_rows
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+BACKENDS = ("inline", "thread", "process")
+
+# Model loaded once per process-pool worker by `_init_worker`
+_worker_predictor = None
+
+
+def _init_worker():
+    global _worker_predictor
+    from ..config.settings import settings
+    from ..features.feature_pipeline import FeatureEngineer
+    from .prediction_cache import create_prediction_cache
+    from .simple_predict import SimpleModelPredictor
+
+    # Each worker keeps its own prediction cache next to its own model
+    _worker_predictor = SimpleModelPredictor(
+        feature_engineer=FeatureEngineer(),
+        cache=create_prediction_cache(
+            settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL_SECONDS
+        )
+    )
+
+
+def _warm_worker() -> int:
+    return os.getpid()
+
+
+def _score_rows_in_worker(rows: List[Row]) -> list:
+    return score_rows(_worker_predictor, rows)
+
+
+def _predict_in_worker(data: pd.DataFrame) -> list:
+    return _worker_predictor.predict(data)
+
+
+class PredictionExecutor:
+    """
+    Runs SimpleModelPredictor scoring off the event loop.
+
+    Backends:
+        inline:  score on the event loop (no overhead, blocks other requests)
+        thread:  score on a thread pool sharing the in-process model
+        process: score on a process pool; every worker preloads its own model
+    """
+
+    def __init__(self, model_predictor, backend: str = "thread", max_workers: Optional[int] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown executor backend '{backend}', expected one of {BACKENDS}")
+        self.model_predictor = model_predictor
+        self.backend = backend
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+
+        if backend == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="predict")
+        elif backend == "process":
+            self._pool = self._process_pool()
+        logger.info(f"Prediction executor ready (backend={backend}, max_workers={max_workers})")
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+    def prepare_pool(self) -> Optional[Executor]:
+        """
+        Start the pool to pass to `swap` after a model reload. For the
+        process backend this is a new process pool whose workers load the
+        model now on disk; it blocks until every worker has started, so
+        call it off the event loop. Other backends share the in-process
+        predictor and return None.
+        """
+        if self.backend != "process":
+            return None
+        pool = self._process_pool()
+        n_workers = self.max_workers or os.cpu_count() or 1
+        for future in [pool.submit(_warm_worker) for _ in range(n_workers)]:
+            future.result()
+        return pool
+
+    def swap(self, model_predictor, pool: Optional[Executor] = None):
+        """
+        Score new calls with `model_predictor` (and `pool`, from
+        `prepare_pool`). Calls already submitted finish on the previous
+        predictor and pool, which is then shut down.
+        """
+        self.model_predictor = model_predictor
+        if pool is not None:
+            old_pool, self._pool = self._pool, pool
+            if old_pool is not None:
+                old_pool.shutdown(wait=False)
+
+    async def _run(self, thread_fn, worker_fn, payload):
+        if self._pool is None:
+            return thread_fn(payload)
+        loop = asyncio.get_running_loop()
+        if self.backend == "process":
+            return await loop.run_in_executor(self._pool, worker_fn, payload)
+        return await loop.run_in_executor(self._pool, thread_fn, payload)
+
+    async def predict(self, data: pd.DataFrame) -> list:
+        return await self._run(self.model_predictor.predict, _predict_in_worker, data)
+
+    async def score_rows(self, rows: List[Row]) -> list:
+        """Async counterpart of `batching.score_rows`."""
+        # Bound now, so a model swapped in meanwhile doesn't score this call
+        model_predictor = self.model_predictor
+        return await self._run(
+            lambda chunk: score_rows(model_predictor, chunk), _score_rows_in_worker, rows
+        )
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+        logger.info(f"Prediction executor stopped (backend={self.backend})")
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import Sequence
+from ..features.compiled_inference import CompiledInference, parse_zone_ids
+
+
+# scikit-learn regressors whose prediction is the identity link
+# `X @ coef_ + intercept_`. Generalized linear models (Poisson, Gamma, Tweedie)
+# share coef_/intercept_ but predict through a log link, so they are left out.
+_IDENTITY_LINK_REGRESSORS = frozenset({
+    "LinearRegression",
+    "Ridge", "RidgeCV",
+    "Lasso", "LassoCV", "LassoLars", "LassoLarsCV", "LassoLarsIC",
+    "ElasticNet", "ElasticNetCV",
+    "Lars", "LarsCV",
+    "OrthogonalMatchingPursuit", "OrthogonalMatchingPursuitCV",
+    "BayesianRidge", "ARDRegression",
+    "SGDRegressor", "PassiveAggressiveRegressor",
+    "HuberRegressor", "QuantileRegressor", "TheilSenRegressor",
+})
+
+
+def is_linear_model(model) -> bool:
+    """
+    True for fitted single-output scikit-learn linear regressors, whose
+    prediction is exactly `X @ coef_ + intercept_`.
+    """
+    model_type = type(model)
+    if not (model_type.__module__.startswith("sklearn.linear_model")
+            and model_type.__name__ in _IDENTITY_LINK_REGRESSORS):
+        return False
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    return (
+        coef is not None and intercept is not None
+        and np.ndim(coef) == 1 and np.size(intercept) == 1
+    )
+
+
+class LinearScorer:
+    """
+    Closed-form scorer for a linear model over one-hot PU_DO plus numerical
+    features. The PU_DO coefficients are laid out in a dense table indexed by
+    (PU, DO), so a prediction is one table lookup plus a few multiply-adds:
+
+        prediction = coef[PU_DO] + sum(coef[num] * value) + intercept
+    """
+
+    def __init__(self, pair_coef: np.ndarray, numerical_coef: np.ndarray,
+                 intercept: float, pair_position: int = 0):
+        self.pair_coef = pair_coef
+        self.numerical_coef = numerical_coef
+        self.intercept = intercept
+        # Where the PU_DO term falls among the numerical terms when summed in
+        # column order, which keeps results identical to the sparse dot product
+        self.pair_position = pair_position
+
+    @classmethod
+    def from_model(cls, model, compiled: CompiledInference) -> "LinearScorer":
+        """
+        Export a fitted linear model and the compiled vocabulary into tables.
+        """
+        if not is_linear_model(model):
+            raise ValueError(f"{type(model).__name__} is not a fitted linear model.")
+
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.shape[0] != compiled.n_features:
+            raise ValueError(
+                f"Model has {coef.shape[0]} coefficients but the vectorizer has {compiled.n_features} features."
+            )
+
+        pair_columns = compiled.pair_columns
+        pair_coef = np.where(pair_columns >= 0, coef[np.maximum(pair_columns, 0)], 0.0)
+
+        numerical_columns = compiled.numerical_columns
+        numerical_coef = np.where(numerical_columns >= 0, coef[np.maximum(numerical_columns, 0)], 0.0)
+
+        known_pairs = pair_columns[pair_columns >= 0]
+        first_pair_column = known_pairs.min() if known_pairs.size else -1
+        pair_position = int(np.sum(
+            (numerical_columns >= 0) & (numerical_columns < first_pair_column)
+        ))
+
+        return cls(
+            pair_coef=pair_coef,
+            numerical_coef=numerical_coef,
+            intercept=float(np.ravel(model.intercept_)[0]),
+            pair_position=pair_position,
+        )
+
+    def predict(self, pu_ids, do_ids, numerical_values: Sequence) -> np.ndarray:
+        pu = parse_zone_ids(pu_ids)
+        do = parse_zone_ids(do_ids)
+        size = self.pair_coef.shape[0]
+        known = (pu >= 0) & (pu < size) & (do >= 0) & (do < size)
+
+        pair_terms = np.zeros(pu.shape, dtype=np.float64)
+        pair_terms[known] = self.pair_coef[pu[known], do[known]]
+
+        terms = [
+            self.numerical_coef[i] * np.asarray(values, dtype=np.float64)
+            for i, values in enumerate(numerical_values)
+        ]
+        terms.insert(self.pair_position, pair_terms)
+
+        predictions = np.zeros(pu.shape, dtype=np.float64)
+        for term in terms:
+            predictions += term
+        return predictions + self.intercept
@@ -0,0 +1,116 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from loguru import logger
+from ..features.compiled_inference import CompiledInference
+from .linear_scorer import LinearScorer
+
+ARTIFACT_FORMAT = "linear-model/1"
+HEADER_FILE = "header.json"
+
+# Every array is a raw .npy file rather than one .npz archive: np.load can
+# only memory-map plain .npy files, and mapped pages are shared by all
+# uvicorn workers on the host.
+ARRAY_FILES = {
+    "coef": "coef.npy",                      # model coefficients in feature column order
+    "feature_names": "feature_names.npy",    # DictVectorizer vocabulary, column order
+    "pair_coef": "pair_coef.npy",            # PU_DO coefficients as a dense [pu, do] table
+    "numerical_coef": "numerical_coef.npy",  # coefficients of the numerical features
+}
+
+
+def export_linear_model(model, compiled: CompiledInference, feature_names: List[str],
+                        path: str, model_version: Optional[str]):
+    """
+    Save a fitted linear model and its vectorizer vocabulary as a directory of
+    .npy arrays plus a JSON header. Loading it needs only numpy.
+    """
+    scorer = LinearScorer.from_model(model, compiled)
+    if len(feature_names) != compiled.n_features:
+        raise ValueError(
+            f"Got {len(feature_names)} feature names for {compiled.n_features} features."
+        )
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "coef": np.asarray(model.coef_, dtype=np.float64),
+        "feature_names": np.asarray(feature_names, dtype=str),
+        "pair_coef": np.ascontiguousarray(scorer.pair_coef, dtype=np.float64),
+        "numerical_coef": np.asarray(scorer.numerical_coef, dtype=np.float64),
+    }
+    for name, array in arrays.items():
+        np.save(path / ARRAY_FILES[name], array)
+
+    with open(path / HEADER_FILE, "w") as f:
+        json.dump({
+            "format": ARTIFACT_FORMAT,
+            "model_version": model_version,
+            "model_type": type(model).__name__,
+            "intercept": scorer.intercept,
+            "pair_position": scorer.pair_position,
+            "numerical": compiled.numerical,
+            "n_features": compiled.n_features,
+        }, f, indent=4)
+    logger.info(f"✅ Exported {type(model).__name__} to {path}")
+
+
+class LinearModelArtifact:
+    """
+    A memory-mapped linear model exported by `export_linear_model`.
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.model_version = header.get("model_version")
+        self.coef = arrays["coef"]
+        self.feature_names = arrays["feature_names"]
+        self.pair_coef = arrays["pair_coef"]
+        self.numerical_coef = arrays["numerical_coef"]
+
+    @classmethod
+    def load(cls, path: str, model_version: Optional[str] = None,
+             numerical: Optional[List[str]] = None) -> Optional["LinearModelArtifact"]:
+        """
+        Memory-map a saved artifact. Returns None when it is missing, in an
+        unknown format, or exported for a different model version or
+        numerical features, so callers fall back to the pickled model.
+        """
+        path = Path(path)
+        if not (path / HEADER_FILE).exists():
+            logger.info(f"No model artifact at {path}, loading the pickled model")
+            return None
+
+        with open(path / HEADER_FILE) as f:
+            header = json.load(f)
+        if header.get("format") != ARTIFACT_FORMAT:
+            logger.warning(f"Model artifact at {path} has unknown format {header.get('format')}; ignoring it")
+            return None
+        if model_version is not None and header.get("model_version") != model_version:
+            logger.warning(
+                f"Model artifact at {path} is for model {header.get('model_version')}, "
+                f"current model is {model_version}; ignoring it"
+            )
+            return None
+        if numerical is not None and header.get("numerical") != list(numerical):
+            logger.warning(
+                f"Model artifact at {path} was exported for features {header.get('numerical')}, "
+                f"current features are {list(numerical)}; ignoring it"
+            )
+            return None
+
+        arrays = {
+            name: np.load(path / file_name, mmap_mode="r")
+            for name, file_name in ARRAY_FILES.items()
+        }
+        logger.info(f"Model artifact loaded from {path} ({header.get('n_features')} features)")
+        return cls(header, arrays)
+
+    def scorer(self) -> LinearScorer:
+        return LinearScorer(
+            pair_coef=self.pair_coef,
+            numerical_coef=self.numerical_coef,
+            intercept=self.header["intercept"],
+            pair_position=self.header["pair_position"],
+        )
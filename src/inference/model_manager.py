@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional
+from loguru import logger
+from .batching import score_rows
+from .duration_table import DurationTable
+from .model_artifact import HEADER_FILE
+from .prediction_cache import PredictionCache
+from .simple_predict import SimpleModelPredictor
+from ..config.settings import settings
+
+if TYPE_CHECKING:
+    from ..features.feature_pipeline import FeatureEngineer
+    from .executor import PredictionExecutor
+    from .model_registry import ModelRegistry
+
+
+# Trip scored by every newly loaded model before it serves requests
+WARMUP_ROW = ("1", "1", 1.0)
+
+
+@dataclass
+class ServingModel:
+    """A loaded model and what requests read alongside it."""
+    feature_engineer: FeatureEngineer
+    model_predictor: SimpleModelPredictor
+    duration_table: Optional[DurationTable]
+    model_version: Optional[str]
+    # Challengers bound to this model's FeatureEngineer, if any are served
+    model_registry: Optional[ModelRegistry] = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+class ModelManager:
+    """
+    Loads the deployed model and swaps in new ones without a restart.
+
+    `reload` builds a FeatureEngineer (with its DictVectorizer), predictor
+    and duration table from the files on disk on a background thread,
+    scores a warm-up trip, and hands the new ServingModel to the `on_swap`
+    callbacks on the event loop in one step. Requests keep reading the
+    current predictor directly, so serving does no extra work. Requests
+    that already hold the previous predictor finish on it. With an
+    attached ModelRegistry, the challengers are reloaded against every
+    new model's FeatureEngineer and swapped in along with it.
+
+    With a `poll_interval`, `start` watches the metadata, model,
+    vectorizer, artifact and duration table files and reloads once a
+    change has been stable for one poll, so half-written files are not
+    loaded.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[PredictionCache] = None,
+        distance_source: Optional[str] = None,
+        metadata_path: str = "src/artifacts/best_model.json",
+        model_path: str = "src/artifacts/simple_model.pkl",
+        dv_path: str = "src/artifacts/dict_vectorizer.pkl",
+        artifact_path: str = settings.MODEL_ARTIFACT_PATH,
+        duration_table_path: str = settings.DURATION_TABLE_PATH,
+        poll_interval: Optional[float] = None,
+        executor: Optional[PredictionExecutor] = None
+    ):
+        self.cache = cache
+        self.distance_source = distance_source
+        self.metadata_path = metadata_path
+        self.model_path = model_path
+        self.dv_path = dv_path
+        self.artifact_path = artifact_path
+        self.duration_table_path = duration_table_path
+        self.poll_interval = poll_interval
+        # Gets a new worker pool with each model (process backend)
+        self.executor = executor
+        self.current: Optional[ServingModel] = None
+        self.model_registry: Optional[ModelRegistry] = None
+        self.reloads = 0
+        self._on_swap: List[Callable[[ServingModel], None]] = []
+        self._signature: Optional[tuple] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def watched_paths(self) -> List[Path]:
+        duration_table = Path(self.duration_table_path)
+        return [
+            Path(self.metadata_path),
+            Path(self.model_path),
+            Path(self.dv_path),
+            Path(self.artifact_path) / HEADER_FILE,
+            duration_table,
+            duration_table.with_suffix(".json"),
+        ]
+
+    def signature(self) -> tuple:
+        """(mtime, size) of every watched file, None for missing ones."""
+        signature = []
+        for path in self.watched_paths():
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load(self, strict: bool = True) -> ServingModel:
+        """
+        Load and warm up the model on disk, without serving it. A failed
+        warm-up raises, unless `strict` is off.
+        """
+        from ..features.feature_pipeline import FeatureEngineer
+
+        feature_engineer = FeatureEngineer(dv_path=self.dv_path)
+        model_predictor = SimpleModelPredictor(
+            feature_engineer=feature_engineer,
+            artifact_path=self.artifact_path,
+            metadata_path=self.metadata_path,
+            model_path=self.model_path
+        )
+        # Warmed up before it is given the shared prediction cache, so the
+        # warm-up trip is really scored
+        warmup = score_rows(model_predictor, [WARMUP_ROW])[0]
+        if isinstance(warmup, Exception):
+            if strict:
+                raise RuntimeError(f"Model failed its warm-up prediction: {warmup}") from warmup
+            logger.warning(f"Model failed its warm-up prediction: {warmup}")
+        model_predictor.cache = self.cache
+
+        duration_table = DurationTable.load(
+            self.duration_table_path,
+            model_fingerprint=model_predictor.model_fingerprint,
+            distance_source=self.distance_source
+        )
+        # Challengers share the FeatureEngineer, so they are rebuilt on the new vocabulary
+        model_registry = None
+        if self.model_registry is not None:
+            model_registry = self.model_registry.rebind(feature_engineer)
+        return ServingModel(
+            feature_engineer=feature_engineer,
+            model_predictor=model_predictor,
+            duration_table=duration_table,
+            model_version=model_predictor.model_version,
+            model_registry=model_registry
+        )
+
+    def load_current(self) -> ServingModel:
+        """
+        Load the model on disk and serve it, e.g. at startup. Like the
+        predictor on its own, a model that fails to warm up is still served.
+        """
+        signature = self.signature()
+        self.current = self.load(strict=False)
+        self._signature = signature
+        return self.current
+
+    def attach_registry(self, model_registry: ModelRegistry):
+        """
+        Serve `model_registry`'s challengers with the current model, whose
+        FeatureEngineer they must have been loaded with, and rebind them on
+        every later swap.
+        """
+        self.model_registry = model_registry
+        if self.current is not None:
+            self.current.model_registry = model_registry
+
+    def on_swap(self, callback: Callable[[ServingModel], None]):
+        """Call `callback(serving_model)` on the event loop after every swap."""
+        self._on_swap.append(callback)
+
+    async def reload(self) -> bool:
+        """
+        Load the model on disk in the background and swap it in. Returns
+        False, and keeps serving the current model, if it fails to load.
+        """
+        async with self._lock:
+            # Taken first: files changed while loading trigger another reload
+            signature = self.signature()
+            self._signature = signature
+            try:
+                serving_model, pool = await asyncio.to_thread(self._prepare)
+            except Exception as e:
+                logger.error(f"❌ Model reload failed, still serving {self._version()}: {e}")
+                return False
+            self._swap(serving_model, pool)
+            return True
+
+    def _prepare(self) -> tuple:
+        serving_model = self.load()
+        pool = self.executor.prepare_pool() if self.executor is not None else None
+        return serving_model, pool
+
+    def _swap(self, serving_model: ServingModel, pool=None):
+        # No awaits from here on: requests see either the old model or the new one
+        previous = self.current
+        self.current = serving_model
+        self.model_registry = serving_model.model_registry
+        if self.executor is not None:
+            self.executor.swap(serving_model.model_predictor, pool)
+        if self.cache is not None and previous is not None and previous.model_version == serving_model.model_version:
+            # Same version key, new files: cached predictions may be stale
+            self.cache.clear()
+        for callback in self._on_swap:
+            callback(serving_model)
+        self.reloads += 1
+        logger.info(
+            f"🔄 Swapped model {previous.model_version if previous else None} for {serving_model.model_version}"
+        )
+
+    def _version(self) -> Optional[str]:
+        return self.current.model_version if self.current else None
+
+    def status(self) -> dict:
+        return {
+            "model_version": self._version(),
+            "loaded_at": self.current.loaded_at if self.current else None,
+            "reloads": self.reloads,
+            "watching": self._task is not None,
+        }
+
+    async def start(self):
+        if not self.poll_interval:
+            return
+        self._task = asyncio.create_task(self._watch())
+        logger.info(f"Watching model files every {self.poll_interval}s for changes")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _watch(self):
+        pending = None
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            signature = self.signature()
+            if signature == self._signature:
+                pending = None
+            elif signature != pending:
+                # Changed since the last poll; wait for writes to settle
+                pending = signature
+            else:
+                pending = None
+                await self.reload()
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+from .batching import Row, score_rows
+from .simple_predict import SimpleModelPredictor, TripFeatures
+
+# Request headers: an explicit variant, or a key (e.g. a user ID) that
+# pins percentage routing so the same caller always gets the same variant
+VARIANT_HEADER = "X-Model-Variant"
+ROUTING_KEY_HEADER = "X-Routing-Key"
+
+# The deployed model served by ModelManager; every other variant is a challenger
+CHAMPION = "champion"
+
+
+def find_run_model(run_id: str, mlruns_dir: str = "mlruns") -> Path:
+    """The pickled model logged by MLflow run `run_id` under `mlruns_dir`."""
+    for model_path in sorted(Path(mlruns_dir).glob(f"*/{run_id}/artifacts/*/model.pkl")):
+        return model_path
+    raise FileNotFoundError(f"No model.pkl logged by run {run_id} under {mlruns_dir}")
+
+
+def load_challenger(source: str, feature_engineer, mlruns_dir: str = "mlruns") -> SimpleModelPredictor:
+    """
+    Load a challenger from a pickled model file or from the MLflow run ID
+    that logged it. It shares `feature_engineer` with the champion, so it
+    must have been trained on the same DictVectorizer. Unlike the champion,
+    a challenger that cannot be unpickled or does not record its feature
+    count fails to load rather than falling back to an unfitted model.
+    """
+    if Path(source).is_file():
+        model_path, model_version = Path(source), source
+    else:
+        model_path, model_version = find_run_model(source, mlruns_dir), source
+
+    predictor = SimpleModelPredictor(
+        feature_engineer=feature_engineer,
+        # Challengers have no pickle-free export
+        artifact_path=str(model_path.parent / "linear_model"),
+        model_path=str(model_path),
+        model_version=model_version,
+        strict=True
+    )
+    n_features = getattr(predictor.model, "n_features_in_", None)
+    expected = feature_engineer.compile_inference().n_features
+    if n_features is None:
+        raise ValueError(f"Model {model_version} is not fitted or does not record its number of features.")
+    if n_features != expected:
+        raise ValueError(
+            f"Model {model_version} has {n_features} features but the vectorizer has {expected}."
+        )
+    return predictor
+
+
+class VariantMetrics:
+    """
+    Requests served per variant, and how far each shadow variant's
+    predictions are from the ones served for the same trips.
+    """
+
+    def __init__(self):
+        self.served = {}
+        self.shadow = {}
+        # Shadow results are recorded from worker threads
+        self._lock = threading.Lock()
+
+    def record_served(self, variant: str, n_trips: int):
+        self.served[variant] = self.served.get(variant, 0) + n_trips
+
+    def _shadow(self, variant: str) -> dict:
+        return self.shadow.setdefault(
+            variant, {"scored": 0, "errors": 0, "dropped": 0, "sum_absolute_difference": 0.0}
+        )
+
+    def record_shadow(self, variant: str, predictions: list, served: list):
+        differences = [
+            abs(float(prediction) - served_prediction)
+            for prediction, served_prediction in zip(predictions, served)
+            if not isinstance(served_prediction, Exception) and math.isfinite(served_prediction)
+        ]
+        with self._lock:
+            stats = self._shadow(variant)
+            stats["scored"] += len(differences)
+            stats["sum_absolute_difference"] += sum(differences)
+
+    def record_shadow_error(self, variant: str, key: str = "errors"):
+        with self._lock:
+            self._shadow(variant)[key] += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            shadow = {variant: dict(stats) for variant, stats in self.shadow.items()}
+        return {
+            "served": dict(self.served),
+            "shadow": {
+                variant: {
+                    "scored": stats["scored"],
+                    "errors": stats["errors"],
+                    "dropped": stats["dropped"],
+                    "mean_absolute_difference": (
+                        stats["sum_absolute_difference"] / stats["scored"] if stats["scored"] else None
+                    ),
+                }
+                for variant, stats in shadow.items()
+            },
+        }
+
+
+class ModelRegistry:
+    """
+    Challenger models served next to the champion for A/B tests.
+
+    `select` routes a request: by the `X-Model-Variant` header if given,
+    else by `traffic` percentages (hashing `X-Routing-Key` when present,
+    so callers stick to a variant). Champion requests keep the usual path
+    (duration table, micro-batching, executor). Challenger requests are
+    scored with `score`.
+
+    `shadow` variants score every request after the response is sent,
+    and only their difference from the served predictions is recorded.
+    Challengers share the champion's FeatureEngineer, and every model
+    scoring one request reuses the same feature matrix, so an extra model
+    costs only its own scoring time. When the champion is swapped for one
+    with a new vectorizer, `rebind` reloads the challengers against it.
+    """
+
+    def __init__(self, challengers: Dict[str, SimpleModelPredictor],
+                 traffic: Optional[Dict[str, float]] = None,
+                 shadow: Optional[List[str]] = None,
+                 max_pending_shadow: int = 64,
+                 random_state: Optional[int] = None,
+                 sources: Optional[Dict[str, str]] = None,
+                 mlruns_dir: str = "mlruns"):
+        self.challengers = dict(challengers)
+        self.traffic = dict(traffic or {})
+        self.shadow_variants = list(shadow or [])
+        self.max_pending_shadow = max_pending_shadow
+        # Where each challenger was loaded from, so `rebind` can reload it
+        self.sources = dict(sources or {})
+        self.mlruns_dir = mlruns_dir
+        self.metrics = VariantMetrics()
+        self._random = random.Random(random_state)
+        self._pending = set()
+
+        if CHAMPION in self.challengers:
+            raise ValueError(f"'{CHAMPION}' is reserved for the deployed model.")
+        unknown = [name for name in [*self.traffic, *self.shadow_variants] if name not in self.challengers]
+        if unknown:
+            raise ValueError(f"Unknown model variants {unknown}, expected one of {list(self.challengers)}")
+        if sum(self.traffic.values()) > 100:
+            raise ValueError(f"Traffic percentages add up to {sum(self.traffic.values())}, more than 100.")
+
+    @classmethod
+    def load(cls, sources: Dict[str, str], feature_engineer, mlruns_dir: str = "mlruns",
+             **kwargs) -> "ModelRegistry":
+        """Load challengers by name from model files or MLflow run IDs; see `load_challenger`."""
+        challengers = {
+            name: load_challenger(source, feature_engineer, mlruns_dir=mlruns_dir)
+            for name, source in sources.items()
+        }
+        logger.info(f"Model registry loaded challengers {list(challengers)}")
+        return cls(challengers, sources=sources, mlruns_dir=mlruns_dir, **kwargs)
+
+    def rebind(self, feature_engineer) -> "ModelRegistry":
+        """
+        A registry with every challenger reloaded and re-validated against
+        `feature_engineer`, e.g. the one of a newly swapped in champion.
+        Challengers that no longer fit it, or have no known source, are left
+        out (their traffic goes to the champion). Metrics and pending shadow
+        scoring carry over.
+        """
+        challengers = {}
+        for name in self.challengers:
+            if name not in self.sources:
+                logger.error(f"❌ Challenger {name} has no known source, no longer serving it")
+                continue
+            try:
+                challengers[name] = load_challenger(self.sources[name], feature_engineer, mlruns_dir=self.mlruns_dir)
+            except Exception as e:
+                logger.error(f"❌ Challenger {name} does not fit the new champion, no longer serving it: {e}")
+
+        registry = ModelRegistry(
+            challengers,
+            traffic={name: percentage for name, percentage in self.traffic.items() if name in challengers},
+            shadow=[name for name in self.shadow_variants if name in challengers],
+            max_pending_shadow=self.max_pending_shadow,
+            sources=self.sources,
+            mlruns_dir=self.mlruns_dir
+        )
+        registry.metrics = self.metrics
+        registry._random = self._random
+        registry._pending = self._pending
+        logger.info(f"Model registry reloaded challengers {list(challengers)} for the new champion")
+        return registry
+
+    def variants(self) -> List[str]:
+        return [CHAMPION, *self.challengers]
+
+    def select(self, variant: Optional[str] = None, routing_key: Optional[str] = None) -> str:
+        """
+        The variant serving a request. Raises KeyError for an unknown
+        explicit variant.
+        """
+        if variant:
+            if variant != CHAMPION and variant not in self.challengers:
+                raise KeyError(variant)
+            return variant
+        if not self.traffic:
+            return CHAMPION
+
+        if routing_key:
+            point = zlib.crc32(routing_key.encode()) % 10_000 / 100
+        else:
+            point = self._random.random() * 100
+        cumulative = 0.0
+        for name, percentage in self.traffic.items():
+            cumulative += percentage
+            if point < cumulative:
+                return name
+        return CHAMPION
+
+    def score(self, variant: str, rows: List[Row], features: Optional[TripFeatures] = None) -> list:
+        """
+        Score rows with a challenger in one call, falling back to per-row
+        scoring like `batching.score_rows`. Returns a float or an
+        Exception per row.
+        """
+        predictor = self.challengers[variant]
+        try:
+            return [float(p) for p in predictor.score_features(features or TripFeatures.from_rows(rows))]
+        except Exception as e:
+            logger.warning(f"Batch scoring with {variant} failed, falling back to per-row scoring: {e}")
+            return score_rows(predictor, rows)
+
+    async def score_async(self, variant: str, rows: List[Row]) -> list:
+        """
+        Score rows with a challenger off the event loop, then shadow-score
+        them with the same feature matrix.
+        """
+        features = TripFeatures.from_rows(rows)
+        results = await asyncio.to_thread(self.score, variant, rows, features)
+        self.record(variant, rows, results, features)
+        return results
+
+    def record(self, variant: str, rows: List[Row], served: list,
+               features: Optional[TripFeatures] = None):
+        """
+        Count the served predictions and start shadow scoring in the
+        background; returns at once.
+        """
+        self.metrics.record_served(variant, len(rows))
+        names = [name for name in self.shadow_variants if name != variant]
+        if not names:
+            return
+        if len(self._pending) >= self.max_pending_shadow:
+            # Shadow traffic is best effort: never queue behind live requests
+            for name in names:
+                self.metrics.record_shadow_error(name, key="dropped")
+            return
+        task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self._score_shadow, names, rows, served, features)
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _score_shadow(self, names: List[str], rows: List[Row], served: list,
+                      features: Optional[TripFeatures]):
+        features = features or TripFeatures.from_rows(rows)
+        for name in names:
+            try:
+                predictions = self.challengers[name].score_features(features)
+            except Exception as e:
+                logger.warning(f"Shadow scoring with {name} failed: {e}")
+                self.metrics.record_shadow_error(name)
+                continue
+            self.metrics.record_shadow(name, predictions, served)
+
+    async def stop(self):
+        """Wait for shadow scoring still running."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
@@ -1,15 +1,66 @@
+from __future__ import annotations
+
 import os 
+import json
 import pickle
-import pandas as pd
+import hashlib
+from pathlib import Path
 from loguru import logger
-from sklearn.linear_model import LinearRegression
+from typing import TYPE_CHECKING, Iterable, Optional
+from .linear_scorer import LinearScorer, is_linear_model
+from .model_artifact import ARRAY_FILES, HEADER_FILE, LinearModelArtifact
+from .prediction_cache import PredictionCache
+from ..config.settings import settings
+
+# Serving predicts from raw IDs (`predict_trips`), so pandas and scikit-learn
+# are only imported when a DataFrame or the fallback model is actually needed
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _fallback_model():
+    from sklearn.linear_model import LinearRegression
+
+    return LinearRegression()
+
+
+def load_model_version(metadata_path: str = "src/artifacts/best_model.json"):
+    """Return the run_id of the deployed model, or None if it is unknown."""
+    try:
+        with open(metadata_path) as f:
+            return json.load(f).get("run_id")
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read model metadata from {metadata_path}: {str(e)}")
+        return None
+
+
+def files_fingerprint(paths: Iterable[Path], chunk_bytes: int = 1 << 20) -> Optional[str]:
+    """SHA-256 over the contents of `paths` in order, or None if one is missing."""
+    digest = hashlib.sha256()
+    try:
+        for path in paths:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_bytes), b""):
+                    digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
 
 
-def load_simple_model():
-    """Load model from pickle file - no MLflow dependencies"""
+def load_simple_model(model_path: str = "src/artifacts/simple_model.pkl", strict: bool = False):
+    """
+    Load model from pickle file - no MLflow dependencies. With `strict`, a
+    missing or unreadable pickle raises instead of falling back to an
+    unfitted LinearRegression.
+    """
+    if strict:
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        logger.info("Model loaded from pickle file successfully!")
+        return model
+
     try:
         # Try to load from pickle file
-        model_path = "src/artifacts/simple_model.pkl"
         if os.path.exists(model_path):
             with open(model_path, 'rb') as f:
                 model = pickle.load(f)
@@ -18,14 +69,49 @@ def load_simple_model():
         else:
             # Create a simple fallback model
             logger.warning("No pickle model found, creating simple fallback model")
-            model = LinearRegression()
+            model = _fallback_model()
             logger.info("Created simple fallback model")
             return model
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         # Ultimate fallback - create a new model
         logger.info("Creating new LinearRegression model as ultimate fallback")
-        return LinearRegression()
+        return _fallback_model()
+
+
+class TripFeatures:
+    """
+    Trips of one request as raw IDs and numerical columns by name. The
+    feature matrix is built at most once per FeatureEngineer, so several
+    models scoring the same request share the transform.
+    """
+
+    def __init__(self, pu_ids, do_ids, numerical: dict):
+        self.pu_ids = pu_ids
+        self.do_ids = do_ids
+        self.numerical = numerical
+        self._matrices = {}
+
+    @classmethod
+    def from_rows(cls, rows) -> "TripFeatures":
+        """From (PULocationID, DOLocationID, trip_distance) rows."""
+        pu_ids, do_ids, distances = zip(*rows)
+        return cls(pu_ids, do_ids, {"trip_distance": distances})
+
+    def __len__(self) -> int:
+        return len(self.pu_ids)
+
+    def columns(self, names) -> list:
+        return [self.numerical[name] for name in names]
+
+    def matrix(self, feature_engineer):
+        key = id(feature_engineer)
+        if key not in self._matrices:
+            # Kept next to its matrix, so the id can't be reused meanwhile
+            self._matrices[key] = (feature_engineer, feature_engineer.inference_raw(
+                self.pu_ids, self.do_ids, **self.numerical
+            ))
+        return self._matrices[key][1]
 
 
 class SimpleModelPredictor:
@@ -33,12 +119,64 @@ class SimpleModelPredictor:
     Simple model predictor that doesn't use MLflow - just works!
     """
 
-    def __init__(self, feature_engineer):
+    def __init__(self, feature_engineer, cache: Optional[PredictionCache] = None,
+                 artifact_path: Optional[str] = None,
+                 metadata_path: str = "src/artifacts/best_model.json",
+                 model_path: str = "src/artifacts/simple_model.pkl",
+                 model_version: Optional[str] = None,
+                 strict: bool = False):
         logger.info("Initializing SimpleModelPredictor")
-        self.model = load_simple_model()
+        # An explicit version (e.g. the MLflow run of a challenger model)
+        # overrides the deployed model's metadata
+        self.model_version = model_version or load_model_version(metadata_path)
         self.feature_engineer = feature_engineer
+        self.cache = cache
+        self.model_path = model_path
+        self.strict = strict
+        self._model = None
+
+        # Prefer the pickle-free artifact: it is memory-mapped and needs
+        # neither pickle nor scikit-learn. The pickled model is then only
+        # loaded if a prediction actually needs it.
+        artifact = LinearModelArtifact.load(
+            artifact_path or settings.MODEL_ARTIFACT_PATH,
+            model_version=self.model_version,
+            numerical=feature_engineer.numerical
+        )
+        if artifact is not None:
+            self.scorer = artifact.scorer()
+            served_files = [Path(artifact_path or settings.MODEL_ARTIFACT_PATH) / name
+                            for name in [HEADER_FILE, *ARRAY_FILES.values()]]
+        else:
+            self._model = load_simple_model(model_path, strict=strict)
+            self.scorer = self._build_scorer()
+            served_files = [Path(model_path)]
+        # Identifies the files predictions actually come from, unlike
+        # model_version, which is whatever run the metadata names
+        self.model_fingerprint = files_fingerprint(served_files)
         logger.info("SimpleModelPredictor initialized successfully!")
 
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_simple_model(self.model_path, strict=self.strict)
+        return self._model
+
+    def _build_scorer(self):
+        """
+        Build a closed-form LinearScorer when the loaded model is linear, so
+        predictions skip feature vectorization and sklearn entirely.
+        """
+        if not is_linear_model(self.model):
+            return None
+        try:
+            scorer = LinearScorer.from_model(self.model, self.feature_engineer.compile_inference())
+            logger.info("Using closed-form LinearScorer for predictions")
+            return scorer
+        except Exception as e:
+            logger.warning(f"LinearScorer unavailable, using model.predict: {str(e)}")
+            return None
+
     def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Preprocess the data using the FeatureEngineer object.
@@ -49,10 +187,62 @@ class SimpleModelPredictor:
         """
         Preprocess the input data, make predictions using the model, and return the results.
         """
-        # Preprocess the input data
+        import pandas as pd
+
+        fe = self.feature_engineer
+        if all(pd.api.types.is_numeric_dtype(data[name]) for name in fe.numerical):
+            return self.predict_trips(
+                data[fe.PU].to_numpy(), data[fe.DO].to_numpy(),
+                **{name: data[name].to_numpy() for name in fe.numerical}
+            )
+
+        # Non-numeric feature values go through the DictVectorizer as-is,
+        # so preprocess the input data with the DataFrame pipeline
         processed_data = self.preprocess_data(data)
         
         # Make predictions using the model
         predictions = self.model.predict(processed_data)
         
-        return list(predictions) 
\ No newline at end of file
+        return list(predictions)
+
+    def predict_trips(self, pu_ids, do_ids, **numerical) -> list:
+        """
+        DataFrame-free prediction from raw pickup/dropoff IDs and numerical
+        features passed by name, e.g. `predict_trips(pu, do, trip_distance=d)`.
+        Trips already in the prediction cache skip feature engineering and scoring.
+        """
+        columns = [numerical[name] for name in self.feature_engineer.numerical]
+        if self.cache is None:
+            return self._score(pu_ids, do_ids, columns)
+
+        keys = [
+            (str(pu), str(do), *values, self.model_version)
+            for pu, do, *values in zip(pu_ids, do_ids, *columns)
+        ]
+        predictions = [self.cache.get(key) for key in keys]
+        misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if misses:
+            computed = self._score(
+                [pu_ids[i] for i in misses], [do_ids[i] for i in misses],
+                [[values[i] for i in misses] for values in columns]
+            )
+            for i, prediction in zip(misses, computed):
+                predictions[i] = prediction
+                self.cache.put(keys[i], prediction)
+        return predictions
+
+    def _score(self, pu_ids, do_ids, columns: list) -> list:
+        fe = self.feature_engineer
+        return self.score_features(TripFeatures(pu_ids, do_ids, dict(zip(fe.numerical, columns))))
+
+    def score_features(self, features: TripFeatures) -> list:
+        """
+        Score trips without the prediction cache. Models that need the
+        feature matrix reuse the one `features` already built for this
+        FeatureEngineer.
+        """
+        if self.scorer is not None:
+            return list(self.scorer.predict(
+                features.pu_ids, features.do_ids, features.columns(self.feature_engineer.numerical)
+            ))
+        return list(self.model.predict(features.matrix(self.feature_engineer)))
\ No newline at end of file
@@ -1,11 +1,16 @@
 from config.settings import settings
 from data_pulling.download_data import DataDownloader
 from features.feature_pipeline import FeatureEngineer
-from data_pulling.read_data import load_train_test, save_processed_data
+from data_pulling.read_data import (
+    iter_parquet_batches, save_processed_data, save_processed_shards, stream_train_test
+)
+from data_pulling.feature_cache import FeatureCache
+from data_pulling.sparse_store import SparseStore
 from pathlib import Path
 from training.multi_model_trainer import MultiModelTrainer
+from training.hyperparameter_search import HyperparameterSearch
 from training.model_history import ModelHistory
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import LinearRegression, SGDRegressor
 from loguru import logger
 from utils.logging_config import setup_logging
 
@@ -18,51 +23,146 @@ if __name__ == "__main__":
     downloader = DataDownloader(settings=settings)
     downloader.download_all()
 
-    # Loading Data
-    train_df, test_df = load_train_test(
-        raw_data_directory=settings.RAW_DATA_DIRECTORY
-    )
-
     # Feature Engineering
     numerical = ["trip_distance"]
     categorical = ["PU_DO"]
     target = "duration"
 
-    preprocessor = FeatureEngineer()
-    # Use Polars for scalability becasue each month has like 2.5 - 3 Million records!
+    # Each month has like 2.5 - 3 Million records, so clean with Arrow
+    # (backend="polars" is faster still when polars is installed) and keep
+    # PU_DO as integer codes instead of one Python string per trip
+    preprocessor = FeatureEngineer(backend="arrow", pair_encoding="integer")
 
-    # Train and test df assumed to be loaded
-    X_train, y_train = preprocessor.fit_transform(train_df)
-    X_test, y_test = preprocessor.transform(test_df)
-    
+    raw_dir = Path(settings.RAW_DATA_DIRECTORY)
     processed_dir = Path(settings.PROCESSED_DATA_DIRECTORY)
-    # Saving the processed data
-    save_processed_data(
-        X=X_train,
-        y=y_train,
-        filename="train_processed_data.npz",
-        output_dir=processed_dir
-    )
+    feature_cache = None
+    if settings.FEATURE_CACHE_ENABLED:
+        # Only months whose raw file (or the feature config) changed since
+        # the last run are featurized; the rest come from cached shards
+        feature_cache = FeatureCache(
+            cache_dir=processed_dir / "features",
+            feature_engineer=preprocessor,
+            batch_size=settings.PARQUET_BATCH_SIZE
+        )
 
-    save_processed_data(
-        X=X_test,
-        y=y_test,
-        filename="test_processed_data.npz",
-        output_dir=processed_dir
+    trainer = MultiModelTrainer(
+        experiment_name=experiment_name, train_metrics_sample_size=settings.TRAIN_METRICS_SAMPLE_SIZE
     )
 
-    # Training Experiments
-    # Train Model using MLflow
-    models = {
-        "LinearRegression": (LinearRegression, {}),
-        # "XGBoost": (XGBRegressor, {"n_estimators": 100, "max_depth": 5, "learning_rate": 0.1}),
-        # "LightGBM": (LGBMRegressor, {"n_estimators": 100, "num_leaves": 31})
-    }
+    if settings.OUT_OF_CORE_TRAINING_ENABLED:
+        # The full feature matrix is never built: the vocabulary is fitted
+        # over the cleaned months one at a time, every month is then encoded
+        # and appended as its own shards, and models train shard by shard
+        def cleaned_frames(folder):
+            if feature_cache is not None:
+                return feature_cache.folder(raw_dir / folder)
+            return (
+                preprocessor.clean_stream([batch])
+                for batch in iter_parquet_batches(
+                    raw_dir / folder,
+                    columns=preprocessor.input_columns,
+                    filter=preprocessor.scan_filter(),
+                    batch_size=settings.PARQUET_BATCH_SIZE
+                )
+            )
+
+        preprocessor.fit_vocabulary_cleaned(cleaned_frames("train"))
+        shards = {}
+        for split in ("train", "test"):
+            shards[split] = SparseStore(save_processed_shards(
+                cleaned_frames(split),
+                feature_engineer=preprocessor,
+                filename=f"{split}_processed_data",
+                output_dir=processed_dir,
+                compression=settings.PROCESSED_DATA_COMPRESSION,
+                shard_rows=settings.PROCESSED_DATA_SHARD_ROWS
+            ))
+
+        from xgboost import XGBRegressor
+
+        out_of_core_models = {
+            # partial_fit over shuffled shards, OUT_OF_CORE_EPOCHS passes
+            "SGDRegressor": SGDRegressor(random_state=42),
+            # Quantized pages built from one shard at a time, cached on disk
+            "XGBoost": XGBRegressor(n_estimators=100, max_depth=5, learning_rate=0.1),
+        }
+        for model_name, model in out_of_core_models.items():
+            trainer.model_trainer.train_out_of_core(
+                model=model,
+                model_name=model_name,
+                train_shards=shards["train"],
+                test_shards=shards["test"],
+                epochs=settings.OUT_OF_CORE_EPOCHS
+            )
+    else:
+        if feature_cache is not None:
+            X_train, y_train = preprocessor.fit_transform_cleaned(feature_cache.folder(raw_dir / "train"))
+            X_test, y_test = preprocessor.transform_cleaned(feature_cache.folder(raw_dir / "test"))
+        else:
+            # Loading Data: stream record batches with only the needed columns and
+            # invalid trips filtered out in the scan, instead of loading whole months
+            train_batches, test_batches = stream_train_test(
+                raw_data_directory=settings.RAW_DATA_DIRECTORY,
+                feature_engineer=preprocessor,
+                batch_size=settings.PARQUET_BATCH_SIZE
+            )
+
+            X_train, y_train = preprocessor.fit_transform_stream(train_batches)
+            X_test, y_test = preprocessor.transform_stream(test_batches)
+
+        # Saving the processed data
+        save_processed_data(
+            X=X_train,
+            y=y_train,
+            filename="train_processed_data",
+            output_dir=processed_dir,
+            compression=settings.PROCESSED_DATA_COMPRESSION,
+            shard_rows=settings.PROCESSED_DATA_SHARD_ROWS
+        )
+
+        save_processed_data(
+            X=X_test,
+            y=y_test,
+            filename="test_processed_data",
+            output_dir=processed_dir,
+            compression=settings.PROCESSED_DATA_COMPRESSION,
+            shard_rows=settings.PROCESSED_DATA_SHARD_ROWS
+        )
+
+        # Training Experiments
+        # Train Model using MLflow
+        models = {
+            "LinearRegression": (LinearRegression, {}),
+            # "XGBoost": (XGBRegressor, {"n_estimators": 100, "max_depth": 5, "learning_rate": 0.1}),
+            # "LightGBM": (LGBMRegressor, {"n_estimators": 100, "num_leaves": 31})
+        }
+
+        trainer.train_all(
+            models=models, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
+            n_jobs=settings.TRAINING_JOBS, threads_per_job=settings.TRAINING_THREADS_PER_JOB
+        )
+
+        if settings.HYPERPARAMETER_SEARCH_ENABLED:
+            # Hyperband over boosting rounds: every trial is a nested run with
+            # val_* metrics, the winner is refit and logged with test_* metrics
+            from scipy.stats import loguniform, randint
+            from xgboost import XGBRegressor
 
-    trainer = MultiModelTrainer(experiment_name=experiment_name)
-    trainer.train_all(models=models, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+            search = HyperparameterSearch(
+                model_trainer=trainer.model_trainer,
+                model_name="XGBoost",
+                model_cls=XGBRegressor,
+                param_distributions={
+                    "learning_rate": loguniform(0.01, 0.3),
+                    "max_depth": randint(3, 10),
+                    "min_child_weight": loguniform(1, 100),
+                },
+                resource="n_estimators", min_resource=20, max_resource=540,
+                n_jobs=settings.TRAINING_JOBS, threads_per_job=settings.TRAINING_THREADS_PER_JOB
+            )
+            search.fit(X_train, y_train, X_test, y_test)
 
-    model_history = ModelHistory(experiment_name)
+    model_history = ModelHistory(experiment_name, index_path=settings.MODEL_HISTORY_INDEX_PATH)
 
     # Save best model based on `test_mean_absolute_error`
     model_history.save_best_model_metadata()
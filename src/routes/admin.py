@@ -0,0 +1,56 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from ..config.settings import settings
+
+
+admin_router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"]
+)
+
+
+def _check_token(request: Request) -> Optional[JSONResponse]:
+    """
+    Error response for a request that may not use the admin endpoints, or
+    None when it may. Without a configured ADMIN_TOKEN they are disabled.
+    """
+    if settings.ADMIN_TOKEN is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": "Admin endpoints are disabled"}
+        )
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"error": "Invalid admin token"}
+        )
+    return None
+
+
+@admin_router.get("/model")
+async def model_status(request: Request):
+    """Version and load time of the model being served."""
+    error = _check_token(request)
+    if error is not None:
+        return error
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=request.app.state.model_manager.status()
+    )
+
+
+@admin_router.post("/model/reload")
+async def reload_model(request: Request):
+    """Load the model now on disk and swap it in without a restart."""
+    error = _check_token(request)
+    if error is not None:
+        return error
+    model_manager = request.app.state.model_manager
+    reloaded = await model_manager.reload()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if reloaded else status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"reloaded": reloaded, **model_manager.status()}
+    )
@@ -1,8 +1,11 @@
-import random
-import pandas as pd
+import math
+from typing import Optional, Tuple
 from fastapi import APIRouter, Request, status, Request
 from fastapi.responses import JSONResponse
-from ..schemas.taxi_schema import DistanceInput, PredictionInput
+from pydantic import ValidationError
+from ..schemas.taxi_schema import BatchPredictionInput, DistanceInput, PredictionInput
+from ..inference.batching import score_rows
+from ..inference.model_registry import CHAMPION, ROUTING_KEY_HEADER, VARIANT_HEADER, ModelRegistry
 from loguru import logger
 
 
@@ -12,40 +15,86 @@ taxi_router = APIRouter(
 )
 
 
-def calculate_fake_distance(pu_id: str, do_id: str) -> float:
-    """Simulates a fictional distance between pickup and dropoff locations."""
-    seed = hash(f"{pu_id}-{do_id}") % 1000
-    random.seed(seed)
-    return round(random.uniform(1.0, 30.0), 2)
+def _select_variant(request: Request) -> Tuple[Optional[ModelRegistry], str]:
+    """The model registry, if any, and the variant it routes this request to."""
+    registry = getattr(request.app.state, "model_registry", None)
+    if registry is None:
+        return None, CHAMPION
+    return registry, registry.select(
+        request.headers.get(VARIANT_HEADER), request.headers.get(ROUTING_KEY_HEADER)
+    )
+
+
+def _unknown_variant(e: KeyError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"error": f"Unknown model variant {e}"}
+    )
+
+
+def _variant_headers(registry: Optional[ModelRegistry], variant: str) -> Optional[dict]:
+    return {VARIANT_HEADER: variant} if registry is not None else None
+
+
+async def _score_champion(request: Request, rows: list) -> list:
+    executor = getattr(request.app.state, "prediction_executor", None)
+    if executor is not None:
+        return await executor.score_rows(rows)
+    return score_rows(request.app.state.model_predictor, rows)
 
 
 @taxi_router.post("/predict")
 async def predict(request: Request, input_data: PredictionInput):
     """Make a prediction with the ML model."""
+    try:
+        registry, variant = _select_variant(request)
+    except KeyError as e:
+        return _unknown_variant(e)
 
     pu_location_id = input_data.PULocationID
     du_location_id = input_data.DOLocationID
 
+    duration_table = getattr(request.app.state, "duration_table", None)
+    if duration_table is not None and variant == CHAMPION:
+        duration_prediction = duration_table.lookup(pu_location_id, du_location_id)
+        if duration_prediction is not None:
+            if registry is not None:
+                trip_distance = request.app.state.zone_distances.distance(pu_location_id, du_location_id)
+                registry.record(variant, [(pu_location_id, du_location_id, trip_distance)], [duration_prediction])
+            return JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={
+                    "duration": duration_prediction,
+                },
+                headers=_variant_headers(registry, variant)
+            )
+
     # This should be later calculated through an API
-    trip_distance = calculate_fake_distance(pu_location_id, du_location_id) 
+    trip_distance = request.app.state.zone_distances.distance(pu_location_id, du_location_id)
 
     try:
-        new_data = {
-            "PULocationID": [pu_location_id],
-            "DOLocationID": [du_location_id],
-            "trip_distance": [trip_distance]
-        }
-        new_data_df = pd.DataFrame(new_data)
-
-        # Predict using the model
-        duration_prediction = request.app.state.model_predictor.predict(new_data_df)
-        duration_prediction = float(duration_prediction[0])
+        row = (pu_location_id, du_location_id, trip_distance)
+        coalescer = getattr(request.app.state, "prediction_coalescer", None)
+        if variant != CHAMPION:
+            # Challengers score off the event loop, then feed shadow scoring
+            duration_prediction = (await registry.score_async(variant, [row]))[0]
+        elif coalescer is not None:
+            # Scored together with other concurrent requests in one micro-batch
+            duration_prediction = await coalescer.predict(pu_location_id, du_location_id, trip_distance)
+        else:
+            # Predict using the model
+            duration_prediction = (await _score_champion(request, [row]))[0]
+        if isinstance(duration_prediction, Exception):
+            raise duration_prediction
+        if registry is not None and variant == CHAMPION:
+            registry.record(variant, [row], [duration_prediction])
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "duration": duration_prediction,
-            }
+            },
+            headers=_variant_headers(registry, variant)
         )
 
     except Exception as e:
@@ -58,11 +107,74 @@ async def predict(request: Request, input_data: PredictionInput):
         )
 
 
+@taxi_router.post("/predict/batch")
+async def predict_batch(request: Request, input_data: BatchPredictionInput):
+    """Make predictions for many trips with a single model call, in input order."""
+    try:
+        registry, variant = _select_variant(request)
+    except KeyError as e:
+        return _unknown_variant(e)
+
+    results = [None] * len(input_data.trips)
+    positions, rows = [], []
+    # Trips answered from the duration table, still passed to shadow models
+    table_rows, table_durations = [], []
+    duration_table = getattr(request.app.state, "duration_table", None) if variant == CHAMPION else None
+    zone_distances = request.app.state.zone_distances
+
+    for position, trip in enumerate(input_data.trips):
+        try:
+            trip = PredictionInput.model_validate(trip)
+            if duration_table is not None:
+                duration = duration_table.lookup(trip.PULocationID, trip.DOLocationID)
+                if duration is not None:
+                    results[position] = {"duration": duration}
+                    if registry is not None:
+                        trip_distance = zone_distances.distance(trip.PULocationID, trip.DOLocationID)
+                        table_rows.append((trip.PULocationID, trip.DOLocationID, trip_distance))
+                        table_durations.append(duration)
+                    continue
+            trip_distance = zone_distances.distance(trip.PULocationID, trip.DOLocationID)
+        except ValidationError as e:
+            results[position] = {"error": f"Invalid trip: {e.errors()[0]['msg']}"}
+            continue
+        except Exception as e:
+            logger.error(str(e))
+            results[position] = {"error": "No answer could be generated"}
+            continue
+        positions.append(position)
+        rows.append((trip.PULocationID, trip.DOLocationID, trip_distance))
+
+    scores = []
+    if rows:
+        if variant != CHAMPION:
+            scores = await registry.score_async(variant, rows)
+        else:
+            scores = await _score_champion(request, rows)
+        for position, score in zip(positions, scores):
+            if isinstance(score, Exception) or not math.isfinite(score):
+                logger.error(f"Trip {position} could not be scored: {score}")
+                results[position] = {"error": "No answer could be generated"}
+            else:
+                results[position] = {"duration": score}
+
+    if registry is not None and variant == CHAMPION and (rows or table_rows):
+        registry.record(variant, rows + table_rows, list(scores) + table_durations)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"predictions": results},
+        headers=_variant_headers(registry, variant)
+    )
+
+
 @taxi_router.post("/measure_distance")
-async def measure_distance(input_data: DistanceInput):
+async def measure_distance(request: Request, input_data: DistanceInput):
     """Measure fictional distance between locations."""
     try:
-        distance = calculate_fake_distance(input_data.PULocationID, input_data.DOLocationID)
+        distance = request.app.state.zone_distances.distance(
+            input_data.PULocationID, input_data.DOLocationID
+        )
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -75,3 +187,18 @@ async def measure_distance(input_data: DistanceInput):
             content={"error": "No answer could be generated"}
         )
 
+
+@taxi_router.get("/predict/metrics")
+async def prediction_metrics(request: Request):
+    """Micro-batching fill, prediction cache and model variant metrics."""
+    coalescer = getattr(request.app.state, "prediction_coalescer", None)
+    cache = request.app.state.model_predictor.cache
+    registry = getattr(request.app.state, "model_registry", None)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "batching": coalescer.metrics.as_dict() if coalescer else None,
+            "cache": cache.stats() if cache else None,
+            "variants": registry.metrics.as_dict() if registry else None
+        }
+    )
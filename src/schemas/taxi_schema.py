@@ -1,9 +1,15 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
 
 class PredictionInput(BaseModel):
     PULocationID: str
     DOLocationID: str
 
+class BatchPredictionInput(BaseModel):
+    # Items are validated one by one in the route so a malformed trip is
+    # reported in its own slot instead of rejecting the whole batch.
+    trips: List[Dict[str, Any]] = Field(..., max_length=10000)
+
 class DistanceInput(BaseModel):
     PULocationID: str
     DOLocationID: str
@@ -0,0 +1,362 @@
+import os
+import math
+import time
+import tempfile
+import multiprocessing
+import numpy as np
+from pathlib import Path
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from .multi_model_trainer import THREAD_ENV_VARS, _build_model
+from .trainer import ModelTrainer
+
+METHODS = ("halving", "hyperband")
+
+# Budget of a trial given as a number of training rows instead of a
+# hyperparameter such as n_estimators
+N_SAMPLES = "n_samples"
+
+# (X_fit, y_fit, X_val, y_val, sample_order), memory-mapped once per
+# process-pool worker by `_init_worker`
+_worker_data = None
+
+
+def successive_halving_schedule(n_candidates: int, min_resource: float, max_resource: float,
+                                eta: int = 3) -> List[Tuple[int, float]]:
+    """
+    (candidates, resource) per rung of one successive halving bracket: each
+    rung keeps the best 1/eta of the previous one and gives them eta times
+    the resource, up to `max_resource`. The last candidate standing always
+    gets `max_resource`.
+    """
+    rungs = []
+    n, resource = n_candidates, min_resource
+    while True:
+        resource = max_resource if n <= 1 else min(resource, max_resource)
+        rungs.append((n, resource))
+        if n <= 1 or resource >= max_resource:
+            return rungs
+        n, resource = max(1, n // eta), resource * eta
+
+
+def hyperband_brackets(min_resource: float, max_resource: float, eta: int = 3) -> List[Tuple[int, float]]:
+    """
+    (candidates, starting resource) of every Hyperband bracket, from many
+    cheap candidates to a few trained on the full resource.
+    """
+    s_max = int(math.floor(math.log(max_resource / min_resource, eta) + 1e-9))
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), max_resource / eta ** s)
+        for s in range(s_max, -1, -1)
+    ]
+
+
+@dataclass
+class Trial:
+    trial_id: int
+    params: Dict[str, Any]
+    bracket: int
+    run_id: Optional[str] = None
+    # (resource, validation MAE) per rung the trial reached
+    scores: List[Tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def resource(self) -> float:
+        return self.scores[-1][0] if self.scores else 0
+
+    @property
+    def val_mae(self) -> float:
+        return self.scores[-1][1] if self.scores else math.inf
+
+
+@dataclass
+class SearchResult:
+    run_id: str
+    refit_run_id: Optional[str]
+    best_params: Dict[str, Any]
+    best_val_mae: float
+    trials: List[Trial]
+    # Sum of the resource spent on every evaluation
+    total_resource: float
+
+
+def _init_worker(data_path: str, tracking_uri: str, threads_per_job: int):
+    global _worker_data
+    import joblib
+    import mlflow
+
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads_per_job)
+    _worker_data = joblib.load(data_path, mmap_mode="r")
+    mlflow.set_tracking_uri(tracking_uri)
+
+
+def _evaluate_in_worker(task: dict) -> Tuple[float, str]:
+    return _evaluate(task, _worker_data)
+
+
+def _evaluate(task: dict, data: tuple) -> Tuple[float, str]:
+    """
+    Fit one trial with the given resource, score it on the validation rows
+    and log the scores to the trial's MLflow run (created on its first rung
+    as a child of the search run). Returns (validation MAE, run ID).
+    """
+    from mlflow import MlflowClient
+    from mlflow.entities import Metric, Param
+    from mlflow.utils.autologging_utils import disable_autologging
+    from threadpoolctl import threadpool_limits
+    from .mlflow_utils import evaluate_model
+
+    X_fit, y_fit, X_val, y_val, sample_order = data
+    params = dict(task["params"])
+    resource = task["resource"]
+    if task["resource_name"] == N_SAMPLES:
+        # Nested subsamples: every rung adds rows to the previous ones
+        rows = np.sort(sample_order[:int(resource)])
+        X, y = X_fit[rows], y_fit[rows]
+    else:
+        params[task["resource_name"]] = int(round(resource))
+        X, y = X_fit, y_fit
+
+    threads = task["threads"]
+    model = _build_model(task["model_cls"], params, threads)
+    # Trials are logged by hand; autologging would save a model per fit
+    with disable_autologging(), (threadpool_limits(limits=threads) if threads else nullcontext()):
+        model.fit(X, y)
+        metrics = evaluate_model(model, X_val, y_val).metrics(n_features=X.shape[1])
+
+    client = MlflowClient()
+    run_id = task["run_id"]
+    params_to_log = []
+    if run_id is None:
+        run_id = client.create_run(
+            task["experiment_id"],
+            run_name=f"{task['model_name']}-trial-{task['trial_id']}",
+            tags={"mlflow.parentRunId": task["parent_run_id"], "trial_id": str(task["trial_id"]),
+                  "bracket": str(task["bracket"])},
+        ).info.run_id
+        params_to_log = [Param(name, str(value)) for name, value in task["params"].items()]
+    else:
+        client.update_run(run_id, status="RUNNING")
+
+    timestamp, step = int(time.time() * 1000), task["rung"]
+    client.log_batch(run_id, params=params_to_log, metrics=[
+        Metric("resource", float(resource), timestamp, step),
+        *[Metric(f"val_{name}", float(value), timestamp, step) for name, value in metrics.items()],
+    ])
+    client.set_terminated(run_id)
+    return metrics["mean_absolute_error"], run_id
+
+
+class HyperparameterSearch:
+    """
+    Budgeted hyperparameter search on top of ModelTrainer.
+
+    Candidates are sampled from `param_distributions` (lists or scipy.stats
+    distributions, as in sklearn's ParameterSampler) and raced with
+    successive halving: all start on a small budget, the best 1/eta move on
+    with eta times more, until `max_resource`. "hyperband" runs several such
+    brackets trading candidate count against starting budget. The budget is
+    either a hyperparameter (e.g. `resource="n_estimators"`) or a number of
+    training rows (`resource="n_samples"`).
+
+    Trials are scored on a validation split cut from the end of the
+    (time-ordered) training data, run in parallel on a process pool with
+    `n_jobs` > 1, and logged as child runs of one search run with `val_*`
+    metrics per rung. The best candidate is then refit on all training data
+    by ModelTrainer and logged as a child run with the usual `test_*`
+    metrics, which `ModelHistory.get_best_model(parent_run_id=...)` picks.
+    """
+
+    def __init__(
+        self,
+        model_trainer: ModelTrainer,
+        model_name: str,
+        model_cls,
+        param_distributions: Dict[str, Any],
+        resource: str = N_SAMPLES,
+        min_resource: Optional[float] = None,
+        max_resource: Optional[float] = None,
+        method: str = "hyperband",
+        n_candidates: int = 27,
+        eta: int = 3,
+        validation_fraction: float = 0.2,
+        n_jobs: int = 1,
+        threads_per_job: Optional[int] = None,
+        random_state: int = 42,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown search method '{method}', expected one of {METHODS}")
+        if resource != N_SAMPLES and max_resource is None:
+            raise ValueError(f"max_resource is required when the resource is '{resource}'.")
+        self.model_trainer = model_trainer
+        self.model_name = model_name
+        self.model_cls = model_cls
+        self.param_distributions = param_distributions
+        self.resource = resource
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.method = method
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.validation_fraction = validation_fraction
+        self.n_jobs = n_jobs
+        self.threads_per_job = threads_per_job
+        self.random_state = random_state
+
+    def _resources(self, n_fit_rows: int) -> Tuple[float, float]:
+        max_resource = self.max_resource or n_fit_rows
+        if self.resource == N_SAMPLES:
+            max_resource = min(max_resource, n_fit_rows)
+        min_resource = self.min_resource or max(1, max_resource / self.eta ** 3)
+        return min_resource, max_resource
+
+    def _brackets(self, min_resource: float, max_resource: float) -> List[Tuple[int, float]]:
+        if self.method == "halving":
+            return [(self.n_candidates, min_resource)]
+        return hyperband_brackets(min_resource, max_resource, self.eta)
+
+    def fit(self, X_train, y_train, X_test, y_test) -> SearchResult:
+        import joblib
+        import mlflow
+        from sklearn.model_selection import ParameterSampler
+
+        n_rows = X_train.shape[0]
+        n_fit = n_rows - int(n_rows * self.validation_fraction)
+        min_resource, max_resource = self._resources(n_fit)
+        brackets = self._brackets(min_resource, max_resource)
+        rng = np.random.default_rng(self.random_state)
+        data = (X_train[:n_fit], y_train[:n_fit], X_train[n_fit:], y_train[n_fit:], rng.permutation(n_fit))
+
+        n_jobs = max(1, self.n_jobs)
+        threads = self.threads_per_job or (max(1, (os.cpu_count() or 1) // n_jobs) if n_jobs > 1 else None)
+
+        with mlflow.start_run(run_name=f"{self.model_name}-search") as search_run, \
+                tempfile.TemporaryDirectory(prefix="search-data-") as tmpdir:
+            mlflow.log_params({
+                "search_method": self.method, "search_resource": self.resource, "eta": self.eta,
+                "min_resource": min_resource, "max_resource": max_resource,
+                "validation_fraction": self.validation_fraction,
+            })
+
+            pool = None
+            if n_jobs > 1:
+                # Matrices are memory-mapped by every worker, as in MultiModelTrainer
+                data_path = str(Path(tmpdir) / "data.joblib")
+                joblib.dump(data, data_path)
+                pool = ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(data_path, mlflow.get_tracking_uri(), threads)
+                )
+
+            trials, total_resource = [], 0.0
+            try:
+                for bracket, (n_candidates, bracket_min) in enumerate(brackets):
+                    sampler = ParameterSampler(
+                        self.param_distributions, n_iter=n_candidates,
+                        random_state=self.random_state + bracket
+                    )
+                    candidates = [
+                        Trial(trial_id=len(trials) + i, params=params, bracket=bracket)
+                        for i, params in enumerate(sampler)
+                    ]
+                    trials.extend(candidates)
+                    rungs = successive_halving_schedule(len(candidates), bracket_min, max_resource, self.eta)
+                    logger.info(
+                        f"🔎 {self.model_name} bracket {bracket}: {len(candidates)} candidates, "
+                        f"rungs {[(n, round(r, 1)) for n, r in rungs]}"
+                    )
+
+                    survivors = candidates
+                    for rung, (n_keep, resource) in enumerate(rungs):
+                        survivors = sorted(survivors, key=lambda trial: trial.val_mae)[:n_keep]
+                        tasks = [self._task(trial, rung, resource, search_run, threads) for trial in survivors]
+                        for trial, (val_mae, run_id) in zip(survivors, self._run(tasks, pool, data)):
+                            trial.run_id = run_id or trial.run_id
+                            trial.scores.append((resource, val_mae))
+                        total_resource += resource * len(tasks)
+                        logger.info(
+                            f"🔎 Rung {rung} ({resource:.0f}): best val MAE "
+                            f"{min(trial.val_mae for trial in survivors):.4f}"
+                        )
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+            # Trials cut before the full budget keep a record of where they stopped
+            client = mlflow.MlflowClient()
+            for trial in trials:
+                if trial.run_id and trial.resource < max_resource:
+                    client.set_tag(trial.run_id, "stopped_at_resource", str(trial.resource))
+
+            finalists = [trial for trial in trials if trial.scores and trial.resource >= max_resource]
+            best = min(finalists or trials, key=lambda trial: trial.val_mae)
+            if not math.isfinite(best.val_mae):
+                # Raised inside the run, so it is recorded as failed
+                raise RuntimeError(
+                    f"{self.model_name} search: none of its {len(trials)} trials produced a finite "
+                    f"validation score; check the parameter distributions and the trial logs"
+                )
+            best_params = dict(best.params)
+            if self.resource != N_SAMPLES:
+                best_params[self.resource] = int(round(max_resource))
+
+            mlflow.log_metric("best_val_mean_absolute_error", best.val_mae)
+            mlflow.log_metric("total_resource", total_resource)
+            mlflow.log_params({f"best_{name}": value for name, value in best_params.items()})
+            mlflow.set_tag("best_trial_run_id", best.run_id)
+            logger.info(f"🏆 {self.model_name} search: best val MAE {best.val_mae:.4f} with {best_params}")
+
+            # The winner is refit on all training rows and evaluated on the test set
+            refit_run_id = self.model_trainer.train(
+                model=_build_model(self.model_cls, best_params, self.threads_per_job),
+                model_name=self.model_name,
+                X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
+                run_name=self.model_name, nested=True
+            )
+
+        return SearchResult(
+            run_id=search_run.info.run_id,
+            refit_run_id=refit_run_id,
+            best_params=best_params,
+            best_val_mae=best.val_mae,
+            trials=trials,
+            total_resource=total_resource,
+        )
+
+    def _task(self, trial: Trial, rung: int, resource: float, search_run, threads) -> dict:
+        return {
+            "model_cls": self.model_cls,
+            "model_name": self.model_name,
+            "params": trial.params,
+            "resource_name": self.resource,
+            "resource": resource,
+            "trial_id": trial.trial_id,
+            "bracket": trial.bracket,
+            "rung": rung,
+            "run_id": trial.run_id,
+            "parent_run_id": search_run.info.run_id,
+            "experiment_id": search_run.info.experiment_id,
+            "threads": threads,
+        }
+
+    def _run(self, tasks: List[dict], pool, data) -> List[Tuple[float, Optional[str]]]:
+        """Evaluate tasks in order; a failed trial scores inf and is dropped next rung."""
+        if pool is None:
+            futures = None
+        else:
+            futures = [pool.submit(_evaluate_in_worker, task) for task in tasks]
+
+        results = []
+        for i, task in enumerate(tasks):
+            try:
+                results.append(futures[i].result() if futures else _evaluate(task, data))
+            except Exception as e:
+                logger.warning(f"⚠️ Trial {task['trial_id']} failed with {task['params']}: {e}")
+                results.append((math.inf, None))
+        return results
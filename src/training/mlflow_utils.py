@@ -1,42 +1,148 @@
 import mlflow
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, mean_absolute_percentage_error
 import numpy as np
+from typing import Optional
+
+# Rows predicted and scored at a time by `evaluate_model`
+PREDICTION_CHUNK_ROWS = 1_000_000
+
+# Same guard against division by zero as sklearn's mean_absolute_percentage_error
+_MAPE_EPSILON = np.finfo(np.float64).eps
+
+
+class RegressionMetricsAccumulator:
+    """
+    Running sums for MAE, RMSE, MAPE, R2 and adjusted R2, updated one chunk
+    of (y_true, predictions) at a time. Accumulators over separate chunks
+    can be merged, so chunked or parallel prediction gives the same
+    metrics as scoring all rows at once.
+
+    The target's mean and sum of squared deviations are tracked with
+    Chan's pairwise update rather than raw sums of y and y^2, which keeps
+    R2 stable for long runs of large trip durations.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sum_absolute_error = 0.0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_percentage_error = 0.0
+        self.mean_y = 0.0
+        self.sum_squared_deviation_y = 0.0
+
+    def update(self, y_true, predictions) -> "RegressionMetricsAccumulator":
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        predictions = np.asarray(predictions, dtype=np.float64).ravel()
+        if y_true.shape != predictions.shape:
+            raise ValueError(f"y_true has {y_true.size} values but predictions has {predictions.size}.")
+        if y_true.size == 0:
+            return self
+
+        absolute_error = np.abs(predictions - y_true)
+        chunk = RegressionMetricsAccumulator()
+        chunk.n = y_true.size
+        chunk.sum_absolute_error = float(absolute_error.sum())
+        chunk.sum_squared_error = float(np.dot(absolute_error, absolute_error))
+        chunk.sum_absolute_percentage_error = float(
+            (absolute_error / np.maximum(np.abs(y_true), _MAPE_EPSILON)).sum()
+        )
+        chunk.mean_y = float(y_true.mean())
+        deviation = y_true - chunk.mean_y
+        chunk.sum_squared_deviation_y = float(np.dot(deviation, deviation))
+        return self.merge(chunk)
+
+    def merge(self, other: "RegressionMetricsAccumulator") -> "RegressionMetricsAccumulator":
+        """Add `other`'s rows to this accumulator in place."""
+        n = self.n + other.n
+        if other.n == 0:
+            return self
+        delta = other.mean_y - self.mean_y
+        self.sum_squared_deviation_y += other.sum_squared_deviation_y + delta * delta * self.n * other.n / n
+        self.mean_y += delta * other.n / n
+        self.n = n
+        self.sum_absolute_error += other.sum_absolute_error
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_percentage_error += other.sum_absolute_percentage_error
+        return self
+
+    def metrics(self, n_features=None) -> dict:
+        """
+        Regression metrics by name, without the prefix used when logging.
+        Adjusted R2 is only included when `n_features` is given, and is nan
+        when there are not more rows than features plus one.
+        """
+        if self.n == 0:
+            raise ValueError("No rows have been added to the accumulator.")
+
+        if self.sum_squared_deviation_y > 0:
+            r2 = 1 - self.sum_squared_error / self.sum_squared_deviation_y
+        else:
+            # Constant target: sklearn's r2_score convention
+            r2 = 1.0 if self.sum_squared_error == 0 else 0.0
+
+        metrics = {
+            "mean_absolute_error": self.sum_absolute_error / self.n,
+            "root_mean_squared_error": float(np.sqrt(self.sum_squared_error / self.n)),
+            "mean_absolute_percentage_error": self.sum_absolute_percentage_error / self.n,
+            "r2": r2,
+        }
+
+        # Adjusted R-squared (Adjusted R2), requires the number of features
+        if n_features is not None:
+            degrees_of_freedom = self.n - n_features - 1
+            metrics["adjusted_r2"] = (
+                1 - (1 - r2) * (self.n - 1) / degrees_of_freedom if degrees_of_freedom > 0 else float("nan")
+            )
+        return metrics
+
+
+def regression_metrics(y_true, predictions, n_features=None) -> dict:
+    """
+    Regression metrics by name, without the prefix used when logging.
+    Adjusted R2 is only included when `n_features` is given.
+    """
+    return RegressionMetricsAccumulator().update(y_true, predictions).metrics(n_features=n_features)
+
+
+def evaluate_model(model, X, y, sample_size: Optional[int] = None, random_state: int = 0,
+                   chunk_rows: int = PREDICTION_CHUNK_ROWS) -> RegressionMetricsAccumulator:
+    """
+    Predict `X` `chunk_rows` rows at a time and accumulate metrics against
+    `y`, so the full prediction vector is never held. With `sample_size`,
+    only a fixed-size random sample of rows (drawn with `random_state`) is
+    scored, e.g. to keep training metrics cheap on large windows.
+    """
+    y = np.asarray(y)
+    rows = None
+    if sample_size is not None and sample_size < X.shape[0]:
+        rng = np.random.default_rng(random_state)
+        rows = np.sort(rng.choice(X.shape[0], size=sample_size, replace=False))
+
+    accumulator = RegressionMetricsAccumulator()
+    n_rows = X.shape[0] if rows is None else rows.size
+    for start in range(0, n_rows, chunk_rows):
+        if rows is None:
+            index = slice(start, start + chunk_rows)
+        else:
+            index = rows[start:start + chunk_rows]
+        accumulator.update(y[index], model.predict(X[index]))
+    return accumulator
+
+
+def log_regression_metrics(metrics: dict, prefix="test"):
+    """Log already computed metrics for the current MLflow run as `{prefix}_{name}`."""
+    mlflow.log_metrics({f"{prefix}_{name}": value for name, value in metrics.items()})
+    return metrics
+
 
 def log_regression_metrics_run(y_true, predictions, prefix="test", n_features=None):
     """
     Logs multiple regression metrics for the current MLflow run.
-    
+
     Args:
     y_true (array-like): True target values.
     predictions (array-like): Predicted target values.
     prefix (str): Prefix for the metric name (e.g., 'train', 'test').
     n_features (int): Number of features used in the model (required for Adjusted R2).
     """
-    # Mean Absolute Error (MAE)
-    mae = mean_absolute_error(y_true, predictions)
-
-    # Root Mean Squared Error (RMSE)
-    rmse = np.sqrt(mean_squared_error(y_true, predictions))
-
-    # Mean Absolute Percentage Error (MAPE)
-    mape = mean_absolute_percentage_error(y_true, predictions)
-
-    # R-squared (R2)
-    r2 = r2_score(y_true, predictions)
-
-    # Adjusted R-squared (Adjusted R2)
-    if n_features is not None:
-        n_samples = len(y_true)
-        adj_r2 = 1 - (1 - r2) * (n_samples - 1) / (n_samples - n_features - 1)
-    else:
-        adj_r2 = None  # Adjusted R2 requires number of features
-    
-    # Log metrics to MLflow
-    mlflow.log_metric(f"{prefix}_mean_absolute_error", mae)
-    mlflow.log_metric(f"{prefix}_root_mean_squared_error", rmse)
-    mlflow.log_metric(f"{prefix}_mean_absolute_percentage_error", mape)
-    mlflow.log_metric(f"{prefix}_r2", r2)
-    
-    # Log adjusted R2 if n_features is provided
-    if adj_r2 is not None:
-        mlflow.log_metric(f"{prefix}_adjusted_r2", adj_r2)
\ No newline at end of file
+    metrics = regression_metrics(y_true, predictions, n_features=n_features)
+    return log_regression_metrics(metrics, prefix=prefix)
@@ -1,15 +1,33 @@
 import mlflow
 import pandas as pd
 from mlflow import MlflowClient
-from typing import Dict, Any
+from mlflow.entities import LifecycleStage, ViewType
+from mlflow.exceptions import MlflowException
+from pathlib import Path
+from typing import Dict, Any, Optional
 import json
+import time
 from loguru import logger
 
+# Metric the best model is selected on (lowest wins)
+SELECTION_METRIC = "test_mean_absolute_error"
+# Runs fetched per search_runs request when listing every run
+PAGE_SIZE = 1000
+# Incremental lookups re-check runs that ended this long before the last
+# lookup, to allow for clock skew between the processes logging runs
+INDEX_OVERLAP_MS = 60_000
+
+
 class ModelHistory:
-    def __init__(self, experiment_name: str):
+    def __init__(self, experiment_name: str, index_path: Optional[str] = None):
         self.experiment_name = experiment_name
         self.client = MlflowClient()
         self.experiment_id = self._get_experiment_id()
+        # Best run per (tracking URI, experiment, parent run), and the time
+        # it was looked up. Kept in memory, and in `index_path` if given, so
+        # later lookups only search runs that ended since.
+        self.index_path = index_path
+        self._index = self._load_index()
 
     def _get_experiment_id(self) -> str:
         experiment = mlflow.get_experiment_by_name(self.experiment_name)
@@ -17,53 +35,126 @@ class ModelHistory:
             raise ValueError(f"Experiment '{self.experiment_name}' not found.")
         return experiment.experiment_id
 
-    def list_all_runs(self) -> pd.DataFrame:
+    def list_all_runs(self, run_view_type: int = ViewType.ALL) -> pd.DataFrame:
         """
         List all runs for the given experiment, with relevant metrics.
+        Runs are fetched `PAGE_SIZE` at a time, so experiments with more
+        runs than one search_runs page are listed in full.
         """
-        runs = self.client.search_runs(self.experiment_id, filter_string="",
-                                       run_view_type=mlflow.entities.ViewType.ALL)
-        
-        # Create a dataframe with run data
         run_data = []
-        for run in runs:
-            run_info = run.info
-            metrics = run.data.metrics
-            run_data.append({
-                "run_id": run_info.run_id,
-                "model_name": run_info.run_name,
-                "status": run_info.status,
-                "start_time": run_info.start_time,
-                "end_time": run_info.end_time,
-                "test_mean_absolute_error": metrics.get("test_mean_absolute_error", None),
-            })
-        
+        page_token = None
+        while True:
+            runs = self.client.search_runs(
+                [self.experiment_id], filter_string="", run_view_type=run_view_type,
+                max_results=PAGE_SIZE, page_token=page_token
+            )
+            # Create a dataframe with run data
+            for run in runs:
+                run_info = run.info
+                metrics = run.data.metrics
+                run_data.append({
+                    "run_id": run_info.run_id,
+                    "model_name": run_info.run_name,
+                    "status": run_info.status,
+                    "start_time": run_info.start_time,
+                    "end_time": run_info.end_time,
+                    "test_mean_absolute_error": metrics.get("test_mean_absolute_error", None),
+                    "parent_run_id": run.data.tags.get("mlflow.parentRunId"),
+                })
+            page_token = runs.token
+            if not page_token:
+                break
+
         df = pd.DataFrame(run_data)
         return df
 
-    def get_best_model(self) -> Dict[str, Any]:
+    def get_best_model(self, parent_run_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get the best model based on test_mean_absolute_error.
+        Get the best model based on test_mean_absolute_error. With a
+        `parent_run_id` (e.g. a hyperparameter search run), only its child
+        runs are considered. Deleted runs are never selected.
+
+        The tracking store does the ordering and returns a single run. Once
+        a best run is indexed, later calls only search runs that ended since
+        the previous lookup and compare them with the indexed one.
         """
-        df = self.list_all_runs()
-        # Filter out runs that don't have 'test_mean_absolute_error'
-        df_filtered = df.dropna(subset=["test_mean_absolute_error"])
-        
-        # Sort by 'test_mean_absolute_error' and get the best run (lowest MAE)
-        best_run = df_filtered.sort_values(by="test_mean_absolute_error").iloc[0]
-        
-        model_metadata = {
-            "model_name": best_run["model_name"],
-            "run_id": best_run["run_id"],
-            "test_mean_absolute_error": best_run["test_mean_absolute_error"]
+        key = self._index_key(parent_run_id)
+        entry = self._index.get(key)
+        lookup_time = int(time.time() * 1000)
+
+        if entry is not None and self._is_active(entry["best"]["run_id"]):
+            best_model = entry["best"]
+            newer = self._search_best_run(parent_run_id, ended_after=entry["looked_up_at"] - INDEX_OVERLAP_MS)
+            if newer is not None and newer[SELECTION_METRIC] < best_model[SELECTION_METRIC]:
+                best_model = newer
+        else:
+            best_model = self._search_best_run(parent_run_id)
+            if best_model is None:
+                raise ValueError(
+                    f"No runs with {SELECTION_METRIC} in experiment '{self.experiment_name}'"
+                    + (f" under parent run {parent_run_id}." if parent_run_id else ".")
+                )
+
+        self._index[key] = {"best": best_model, "looked_up_at": lookup_time}
+        self._save_index()
+        return best_model
+
+    def _search_best_run(self, parent_run_id: Optional[str] = None,
+                         ended_after: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        # Runs without the metric don't match a filter on it
+        filters = [f"metrics.{SELECTION_METRIC} >= 0"]
+        if parent_run_id is not None:
+            filters.append(f"tags.mlflow.parentRunId = '{parent_run_id}'")
+        if ended_after is not None:
+            filters.append(f"attributes.end_time > {ended_after}")
+
+        runs = self.client.search_runs(
+            [self.experiment_id],
+            filter_string=" and ".join(filters),
+            run_view_type=ViewType.ACTIVE_ONLY,
+            max_results=1,
+            order_by=[f"metrics.{SELECTION_METRIC} ASC", "attributes.start_time ASC"]
+        )
+        if not runs:
+            return None
+        best_run = runs[0]
+        return {
+            "model_name": best_run.info.run_name,
+            "run_id": best_run.info.run_id,
+            "test_mean_absolute_error": best_run.data.metrics[SELECTION_METRIC]
         }
-        return model_metadata
 
-    def save_best_model_metadata(self):
+    def _is_active(self, run_id: str) -> bool:
+        try:
+            return self.client.get_run(run_id).info.lifecycle_stage == LifecycleStage.ACTIVE
+        except MlflowException:
+            return False
+
+    def _index_key(self, parent_run_id: Optional[str]) -> str:
+        return f"{mlflow.get_tracking_uri()}|{self.experiment_id}|{parent_run_id or ''}"
+
+    def _load_index(self) -> Dict[str, Any]:
+        if self.index_path is None or not Path(self.index_path).exists():
+            return {}
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable run index {self.index_path}: {e}")
+            return {}
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        Path(self.index_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump(self._index, f, indent=4)
+
+    def save_best_model_metadata(self, parent_run_id: Optional[str] = None):
         """
         Save the best model metadata to a JSON file for later inference.
         """
-        best_model = self.get_best_model()
+        best_model = self.get_best_model(parent_run_id=parent_run_id)
         with open("src/artifacts/best_model.json", "w") as f:
             json.dump(best_model, f, indent=4)
-        logger.info(f"🏆 Best model metadata saved: {best_model['model_name']} (MAE: {best_model['test_mean_absolute_error']})")
\ No newline at end of file
+        logger.info(f"🏆 Best model metadata saved: {best_model['model_name']} (MAE: {best_model['test_mean_absolute_error']})")
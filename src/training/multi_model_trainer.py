@@ -1,12 +1,68 @@
-from typing import Dict, Any, Tuple
+import os
+import tempfile
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
 from sklearn.base import RegressorMixin
 from .trainer import ModelTrainer
 from loguru import logger
 
+# Thread pools sized from the environment when numeric libraries load
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# Memory-mapped training data and trainer, set once per process-pool worker
+# by `_init_worker`
+_worker_data = None
+_worker_trainer = None
+
+
+def _init_worker(data_path: str, experiment_name: str, tracking_uri: str, threads_per_job: int,
+                 train_metrics_sample_size: Optional[int] = None):
+    global _worker_data, _worker_trainer
+    import joblib
+
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads_per_job)
+    # Arrays come back as read-only memmaps of the file written by the
+    # parent, so workers share the page cache instead of holding copies
+    _worker_data = joblib.load(data_path, mmap_mode="r")
+    _worker_trainer = ModelTrainer(
+        experiment_name=experiment_name, tracking_uri=tracking_uri,
+        train_metrics_sample_size=train_metrics_sample_size
+    )
+
+
+def _build_model(model_cls, params: Dict[str, Any], threads: Optional[int]):
+    model = model_cls(**params)
+    # Estimators with their own thread pool (XGBoost, LightGBM, forests)
+    # get the job's share of cores unless n_jobs was set explicitly
+    if threads is not None and "n_jobs" not in params and "n_jobs" in model.get_params():
+        model.set_params(n_jobs=threads)
+    return model
+
+
+def _train_in_worker(model_name: str, model_cls, params: Dict[str, Any], threads_per_job: int) -> str:
+    from threadpoolctl import threadpool_limits
+
+    model = _build_model(model_cls, params, threads_per_job)
+    # BLAS / OpenMP pools already started in this process are capped too
+    with threadpool_limits(limits=threads_per_job):
+        return _worker_trainer.train(model, model_name, *_worker_data)
+
 
 class MultiModelTrainer:
-    def __init__(self, experiment_name: str = "nyc-taxi-experiment"):
-        self.model_trainer = ModelTrainer(experiment_name=experiment_name)
+    def __init__(self, experiment_name: str = "nyc-taxi-experiment",
+                 tracking_uri: str = "sqlite:///mlflow.db",
+                 train_metrics_sample_size: Optional[int] = None):
+        self.experiment_name = experiment_name
+        self.tracking_uri = tracking_uri
+        self.train_metrics_sample_size = train_metrics_sample_size
+        # Also creates the experiment up front, so parallel workers don't race to
+        self.model_trainer = ModelTrainer(
+            experiment_name=experiment_name, tracking_uri=tracking_uri,
+            train_metrics_sample_size=train_metrics_sample_size
+        )
 
     def train_all(
         self,
@@ -14,12 +70,27 @@ class MultiModelTrainer:
         X_train,
         y_train,
         X_test,
-        y_test
-    ):
+        y_test,
+        n_jobs: int = 1,
+        threads_per_job: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Train every model and log one MLflow run each. Returns the run ID of
+        each model name.
+
+        With `n_jobs` > 1 models are trained concurrently on a process pool.
+        Each job gets `threads_per_job` threads (default: the CPU count split
+        evenly between jobs) for its estimator's `n_jobs` and for BLAS/OpenMP,
+        so jobs don't oversubscribe cores.
+        """
+        if n_jobs > 1 and len(models) > 1:
+            return self._train_parallel(models, (X_train, y_train, X_test, y_test), n_jobs, threads_per_job)
+
+        run_ids = {}
         for model_name, (model_cls, params) in models.items():
             logger.info(f"🚀 Training {model_name}...")
-            model = model_cls(**params)
-            self.model_trainer.train(
+            model = _build_model(model_cls, params, threads_per_job)
+            run_ids[model_name] = self.model_trainer.train(
                 model=model,
                 model_name=model_name,
                 X_train=X_train,
@@ -28,3 +99,44 @@ class MultiModelTrainer:
                 y_test=y_test
             )
             logger.info(f"🚀 Finished Training {model_name}...")
+        return run_ids
+
+    def _train_parallel(self, models, data: tuple, n_jobs: int,
+                        threads_per_job: Optional[int]) -> Dict[str, str]:
+        import joblib
+
+        n_jobs = min(n_jobs, len(models))
+        threads_per_job = threads_per_job or max(1, (os.cpu_count() or 1) // n_jobs)
+        logger.info(f"🚀 Training {len(models)} models on {n_jobs} processes, {threads_per_job} threads each...")
+
+        run_ids, errors = {}, []
+        with tempfile.TemporaryDirectory(prefix="training-data-") as tmpdir:
+            # Matrices are written once as raw arrays and memory-mapped by
+            # every worker instead of being pickled into each task
+            data_path = str(Path(tmpdir) / "data.joblib")
+            joblib.dump(data, data_path)
+
+            # spawn: workers start without the parent's thread pools and
+            # open their own MLflow / database connections
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(data_path, self.experiment_name, self.tracking_uri, threads_per_job,
+                          self.train_metrics_sample_size)
+            ) as pool:
+                futures = {
+                    model_name: pool.submit(_train_in_worker, model_name, model_cls, params, threads_per_job)
+                    for model_name, (model_cls, params) in models.items()
+                }
+                for model_name, future in futures.items():
+                    try:
+                        run_ids[model_name] = future.result()
+                        logger.info(f"🚀 Finished Training {model_name}...")
+                    except Exception as e:
+                        logger.error(f"❌ Training {model_name} failed: {e}")
+                        errors.append(e)
+
+        if errors:
+            raise errors[0]
+        return run_ids
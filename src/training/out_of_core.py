@@ -0,0 +1,94 @@
+import os
+import tempfile
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from loguru import logger
+
+# Training data is read from a "shard source": any object with `shape`,
+# `n_shards` and `shard(i) -> (X, y)`, such as the SparseStore written by
+# `read_data.save_processed_data`. Only one shard is held in memory at a time.
+
+
+def iter_shards(shards, order: Optional[np.ndarray] = None) -> Iterator[Tuple]:
+    for i in (range(shards.n_shards) if order is None else order):
+        yield shards.shard(int(i))
+
+
+def is_xgboost_model(model) -> bool:
+    return type(model).__module__.startswith("xgboost")
+
+
+def supports_out_of_core(model) -> bool:
+    return hasattr(model, "partial_fit") or is_xgboost_model(model)
+
+
+def fit_partial(model, shards, epochs: int = 1, shuffle: bool = True, random_state: int = 0):
+    """
+    Train an estimator with `partial_fit` (e.g. SGDRegressor) one shard at
+    a time, for `epochs` passes. Shard order is shuffled per epoch unless
+    `shuffle` is off.
+    """
+    rng = np.random.default_rng(random_state)
+    for epoch in range(epochs):
+        order = rng.permutation(shards.n_shards) if shuffle else None
+        for X, y in iter_shards(shards, order):
+            model.partial_fit(X, y)
+        logger.info(f"Epoch {epoch + 1}/{epochs} done over {shards.n_shards} shards")
+    return model
+
+
+def fit_xgboost_external_memory(model, shards):
+    """
+    Train an XGBoost sklearn model from shards with an external-memory
+    `DataIter`: XGBoost pulls one shard at a time and keeps its quantized
+    pages in a temporary on-disk cache. The model's own parameters and
+    `n_estimators` are used, and the trained booster is loaded back into
+    `model` so it is logged and served like an in-memory fit.
+    """
+    import xgboost as xgb
+
+    class ShardIter(xgb.DataIter):
+        def __init__(self, cache_prefix: str):
+            self._shard = 0
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> bool:
+            if self._shard == shards.n_shards:
+                return False
+            X, y = shards.shard(self._shard)
+            input_data(data=X, label=y)
+            self._shard += 1
+            return True
+
+        def reset(self):
+            self._shard = 0
+
+    params = {name: value for name, value in model.get_xgb_params().items() if value is not None}
+    if "n_jobs" in params:
+        params["nthread"] = params.pop("n_jobs")
+    # External memory needs the hist tree method
+    params.setdefault("tree_method", "hist")
+    num_boost_round = model.n_estimators or 100
+
+    with tempfile.TemporaryDirectory(prefix="xgb-cache-") as cache_dir:
+        dtrain = xgb.ExtMemQuantileDMatrix(
+            ShardIter(os.path.join(cache_dir, "train")), max_bin=params.get("max_bin", 256)
+        )
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+        del dtrain
+
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def evaluate_shards(model, shards):
+    """
+    Regression metrics accumulated over all shards, predicting one shard
+    at a time; see `mlflow_utils.RegressionMetricsAccumulator`.
+    """
+    from .mlflow_utils import RegressionMetricsAccumulator
+
+    accumulator = RegressionMetricsAccumulator()
+    for X, y in iter_shards(shards):
+        accumulator.update(y, model.predict(X))
+    return accumulator
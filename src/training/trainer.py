@@ -4,15 +4,20 @@ import mlflow.lightgbm
 import mlflow.xgboost
 import json
 from pathlib import Path
-from .mlflow_utils import log_regression_metrics_run
+from typing import Optional
+from .mlflow_utils import evaluate_model, log_regression_metrics
 from loguru import logger
 
 
 class ModelTrainer:
     def __init__(self, experiment_name: str = "nyc-taxi-experiment",
-                 tracking_uri: str = "sqlite:///mlflow.db"):
+                 tracking_uri: str = "sqlite:///mlflow.db",
+                 train_metrics_sample_size: Optional[int] = None):
         self.experiment_name = experiment_name
         self.tracking_uri = tracking_uri
+        # Training metrics are scored on a fixed-size random sample of the
+        # training rows instead of all of them (None: all rows)
+        self.train_metrics_sample_size = train_metrics_sample_size
 
         mlflow.set_tracking_uri(self.tracking_uri)
         mlflow.set_experiment(self.experiment_name)
@@ -21,27 +26,63 @@ class ModelTrainer:
         mlflow.xgboost.autolog(log_datasets=False)
         mlflow.lightgbm.autolog(log_datasets=False)
 
-    def train(self, model, model_name: str, X_train, y_train, X_test, y_test):
-        with mlflow.start_run():
+    def train(self, model, model_name: str, X_train, y_train, X_test, y_test,
+              run_name: str = None, nested: bool = False) -> str:
+        with mlflow.start_run(run_name=run_name, nested=nested) as run:
             model.fit(X_train, y_train)
 
-            y_pred_test = model.predict(X_test)
-            y_pred_train = model.predict(X_train)
-
-            log_regression_metrics_run(
-                y_true=y_train, predictions=y_pred_train,
-                prefix="train", n_features=X_train.shape[1]
-            )
-            log_regression_metrics_run(
-                y_true=y_test, predictions=y_pred_test,
-                prefix="test", n_features=X_train.shape[1]
-            )
-
-            mlflow.sklearn.log_model(
-                sk_model=model,
-                artifact_path=model_name,
-                registered_model_name=model_name
-            )
+            n_features = X_train.shape[1]
+            if self.train_metrics_sample_size is not None:
+                mlflow.log_param("train_metrics_sample_size", self.train_metrics_sample_size)
+            train_metrics = evaluate_model(model, X_train, y_train, sample_size=self.train_metrics_sample_size)
+            log_regression_metrics(train_metrics.metrics(n_features=n_features), prefix="train")
+            test_metrics = evaluate_model(model, X_test, y_test)
+            log_regression_metrics(test_metrics.metrics(n_features=n_features), prefix="test")
+
+            self._log_model(model, model_name)
+        return run.info.run_id
+
+    def train_out_of_core(self, model, model_name: str, train_shards, test_shards,
+                          epochs: int = 1, run_name: str = None, nested: bool = False) -> str:
+        """
+        Train from sharded features without loading the whole matrix, e.g.
+        from the SparseStore saved by `save_processed_data`. Estimators with
+        `partial_fit` (SGDRegressor) get one shard at a time for `epochs`
+        passes; XGBoost models train from an external-memory DataIter. The
+        run is logged like `train`, so ModelHistory can select it.
+        """
+        from .out_of_core import (
+            evaluate_shards, fit_partial, fit_xgboost_external_memory, is_xgboost_model,
+            supports_out_of_core
+        )
+
+        if not supports_out_of_core(model):
+            raise ValueError(f"{type(model).__name__} supports neither partial_fit nor external memory.")
+
+        n_features = train_shards.shape[1]
+        with mlflow.start_run(run_name=run_name, nested=nested) as run:
+            mlflow.log_params({"out_of_core": True, "train_shards": train_shards.n_shards, "epochs": epochs})
+            if is_xgboost_model(model):
+                fit_xgboost_external_memory(model, train_shards)
+            else:
+                fit_partial(model, train_shards, epochs=epochs)
+
+            for prefix, shards in (("train", train_shards), ("test", test_shards)):
+                metrics = evaluate_shards(model, shards).metrics(n_features=n_features)
+                log_regression_metrics(metrics, prefix=prefix)
+
+            self._log_model(model, model_name)
+        return run.info.run_id
+
+    def _log_model(self, model, model_name: str):
+        mlflow.sklearn.log_model(
+            sk_model=model,
+            artifact_path=model_name,
+            registered_model_name=model_name,
+            # The format the registered models have always been saved in;
+            # newer MLflow defaults to skops, which rejects tree models
+            serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE
+        )
 
     def _save_best_model_info(self):
         best_model = min(self.run_scores.items(), key=lambda item: item[1]["mae"])
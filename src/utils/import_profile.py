@@ -0,0 +1,75 @@
+import sys
+import json
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def _run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True, text=True, check=True
+    )
+
+
+def profile_imports(module: str) -> List[ImportRecord]:
+    """
+    Import `module` in a fresh interpreter with `-X importtime` and return
+    the per-module import cost.
+    """
+    result = _run_python(f"import {module}", "-X", "importtime")
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return records
+
+
+def loaded_modules(module: str) -> List[str]:
+    """Names of all modules loaded by importing `module` in a fresh interpreter."""
+    result = _run_python(f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))")
+    return json.loads(result.stdout)
+
+
+def total_import_us(records: List[ImportRecord], module: str) -> int:
+    """Cumulative import time of `module` itself, including everything it pulls in."""
+    return next(r.cumulative_us for r in records if r.module == module)
+
+
+def cost_by_package(records: List[ImportRecord]) -> Dict[str, int]:
+    """Self import time aggregated per top-level package, most expensive first."""
+    costs = {}
+    for record in records:
+        package = record.module.split(".")[0]
+        costs[package] = costs.get(package, 0) + record.self_us
+    return dict(sorted(costs.items(), key=lambda item: item[1], reverse=True))
+
+
+def format_report(module: str, records: List[ImportRecord], top: int = 15) -> str:
+    lines = [f"Import profile for {module}: {total_import_us(records, module) / 1000:.1f} ms total"]
+    lines.append("")
+    lines.append(f"{'package':<30} {'self ms':>10}")
+    for package, cost in list(cost_by_package(records).items())[:top]:
+        lines.append(f"{package:<30} {cost / 1000:>10.1f}")
+
+    lines.append("")
+    lines.append(f"{'module':<50} {'cumulative ms':>14}")
+    slowest = sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]
+    for record in slowest:
+        lines.append(f"{record.module:<50} {record.cumulative_us / 1000:>14.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,24 @@
+import asyncio
+import pandas as pd
+import pytest
+from src.features.feature_pipeline import FeatureEngineer
+from src.inference.executor import PredictionExecutor
+from src.inference.simple_predict import SimpleModelPredictor
+
+
+def test_process_backend_matches_inline_predictions():
+    predictor = SimpleModelPredictor(feature_engineer=FeatureEngineer())
+    df = pd.DataFrame({
+        "PULocationID": ["186", "132"],
+        "DOLocationID": ["79", "236"],
+        "trip_distance": [4.0, 17.3]
+    })
+    expected = predictor.predict(df.copy())
+
+    executor = PredictionExecutor(predictor, backend="process", max_workers=1)
+    try:
+        predictions = asyncio.run(executor.predict(df))
+    finally:
+        executor.shutdown()
+
+    assert predictions == pytest.approx(expected)
@@ -0,0 +1,203 @@
+import json
+import asyncio
+import pickle
+import shutil
+import pytest
+from types import SimpleNamespace
+from src.inference.batching import score_rows
+from src.inference.executor import PredictionExecutor
+from src.inference.model_manager import ModelManager
+from src.inference.prediction_cache import PredictionCache
+from src.routes import admin
+
+ROW = ("186", "79", 4.0)
+
+
+def deploy(artifacts, run_id, intercept_shift=0.0):
+    with open("src/artifacts/simple_model.pkl", "rb") as f:
+        model = pickle.load(f)
+    model.intercept_ += intercept_shift
+    with open(artifacts / "simple_model.pkl", "wb") as f:
+        pickle.dump(model, f)
+    (artifacts / "best_model.json").write_text(json.dumps({"run_id": run_id}))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    shutil.copy("src/artifacts/dict_vectorizer.pkl", artifacts)
+    deploy(artifacts, "v1")
+    manager = ModelManager(
+        cache=PredictionCache(max_size=100),
+        distance_source="synthetic",
+        metadata_path=str(artifacts / "best_model.json"),
+        model_path=str(artifacts / "simple_model.pkl"),
+        dv_path=str(artifacts / "dict_vectorizer.pkl"),
+        artifact_path=str(artifacts / "linear_model"),
+        duration_table_path=str(artifacts / "duration_table.npy")
+    )
+    manager.load_current()
+    return manager, artifacts
+
+
+def test_reload_swaps_in_the_new_model(manager):
+    manager, artifacts = manager
+    old = manager.current
+    executor = PredictionExecutor(old.model_predictor, backend="thread", max_workers=1)
+    manager.executor = executor
+    swapped = []
+    manager.on_swap(swapped.append)
+    before = score_rows(old.model_predictor, [ROW])[0]
+
+    async def reload_during_request():
+        # A request that already started keeps its model
+        in_flight = asyncio.create_task(executor.score_rows([ROW]))
+        await asyncio.sleep(0)
+        deploy(artifacts, "v2", intercept_shift=10.0)
+        reloaded = await manager.reload()
+        return reloaded, (await in_flight)[0], (await executor.score_rows([ROW]))[0]
+
+    try:
+        reloaded, in_flight, after = asyncio.run(reload_during_request())
+    finally:
+        executor.shutdown()
+
+    assert reloaded
+    assert swapped == [manager.current] and manager.current.model_version == "v2"
+    assert in_flight == pytest.approx(before)
+    assert after == pytest.approx(before + 10.0)
+    assert score_rows(old.model_predictor, [ROW])[0] == pytest.approx(before)
+    assert manager.current.model_predictor.cache is old.model_predictor.cache
+
+
+def test_failed_reload_keeps_serving_the_current_model(manager):
+    manager, artifacts = manager
+    old = manager.current
+    (artifacts / "simple_model.pkl").write_bytes(b"not a pickle")
+
+    assert asyncio.run(manager.reload()) is False
+    assert manager.current is old and manager.reloads == 0
+
+
+def test_watcher_reloads_changed_files(manager):
+    manager, artifacts = manager
+    manager.poll_interval = 0.01
+
+    async def watch():
+        await manager.start()
+        deploy(artifacts, "v2", intercept_shift=1.0)
+        for _ in range(500):
+            if manager.current.model_version == "v2":
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(watch())
+    assert manager.current.model_version == "v2"
+    assert manager.reloads == 1
+
+
+def test_duration_table_follows_the_model_files(manager):
+    from src.inference.duration_table import build_duration_table, save_duration_table
+    from src.features.zone_distance import ZoneDistanceProvider
+
+    manager, artifacts = manager
+    predictor = manager.current.model_predictor
+    durations = build_duration_table(predictor, ZoneDistanceProvider.synthetic(), n_zones=3)
+    save_duration_table(durations, manager.duration_table_path,
+                        model_fingerprint=predictor.model_fingerprint, model_version="v1",
+                        distance_source="synthetic")
+    manager.load_current()
+    assert manager.current.duration_table is not None
+
+    # New model under the same run_id: the table no longer matches
+    deploy(artifacts, "v1", intercept_shift=10.0)
+    assert asyncio.run(manager.reload())
+    assert manager.current.model_version == "v1"
+    assert manager.current.duration_table is None
+
+    # Without the model file the fingerprint is unknown, so the table is not used either
+    save_duration_table(durations, manager.duration_table_path,
+                        model_fingerprint=None, model_version="v1", distance_source="synthetic")
+    (artifacts / "simple_model.pkl").unlink()
+    assert manager.load(strict=False).duration_table is None
+
+
+def test_challengers_are_rebound_to_each_new_champion(manager, tmp_path):
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LinearRegression
+    from src.features.feature_pipeline import FeatureEngineer
+    from src.inference.model_registry import ModelRegistry
+
+    manager, artifacts = manager
+    challenger_path = tmp_path / "challenger.pkl"
+    shutil.copy(artifacts / "simple_model.pkl", challenger_path)
+    registry = ModelRegistry.load(
+        {"challenger": str(challenger_path)}, manager.current.feature_engineer,
+        traffic={"challenger": 50}, shadow=["challenger"]
+    )
+    manager.attach_registry(registry)
+    assert manager.current.model_registry is registry
+
+    # Same vocabulary: the challenger is reloaded on the new FeatureEngineer
+    deploy(artifacts, "v2")
+    assert asyncio.run(manager.reload())
+    rebound = manager.current.model_registry
+    assert rebound is not registry and rebound.metrics is registry.metrics
+    assert rebound.challengers["challenger"].feature_engineer is manager.current.feature_engineer
+
+    # New vocabulary: the old challenger no longer fits and stops being served
+    rng = np.random.default_rng(0)
+    pickup = pd.Timestamp("2022-01-01 08:00:00") + pd.to_timedelta(rng.integers(0, 3600, 100), unit="s")
+    X, y = FeatureEngineer(dv_path=str(artifacts / "dict_vectorizer.pkl")).fit_transform(pd.DataFrame({
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(60, 3600, 100), unit="s"),
+        "Airport_fee": 0.0,
+        "PULocationID": rng.integers(1, 5, 100),
+        "DOLocationID": rng.integers(1, 5, 100),
+        "trip_distance": rng.uniform(0.5, 20, 100),
+    }))
+    with open(artifacts / "simple_model.pkl", "wb") as f:
+        pickle.dump(LinearRegression().fit(X, y), f)
+    (artifacts / "best_model.json").write_text(json.dumps({"run_id": "v3"}))
+    assert asyncio.run(manager.reload())
+    rebound = manager.current.model_registry
+    assert rebound.challengers == {} and rebound.traffic == {} and rebound.shadow_variants == []
+    assert manager.model_registry is rebound
+
+
+def test_admin_endpoints_check_the_token(manager, monkeypatch):
+    manager, artifacts = manager
+    deploy(artifacts, "v3")
+
+    def request(token=None):
+        return SimpleNamespace(
+            app=SimpleNamespace(state=SimpleNamespace(model_manager=manager)),
+            headers={"X-Admin-Token": token} if token else {}
+        )
+
+    monkeypatch.setattr(admin.settings, "ADMIN_TOKEN", "secret")
+    assert asyncio.run(admin.reload_model(request("wrong"))).status_code == 403
+    assert manager.current.model_version == "v1"
+
+    response = asyncio.run(admin.reload_model(request("secret")))
+    assert response.status_code == 200
+    assert json.loads(response.body)["model_version"] == "v3"
+    assert json.loads(asyncio.run(admin.model_status(request("secret"))).body)["reloads"] == 1
+
+
+def test_admin_endpoints_are_disabled_without_a_token(manager, monkeypatch):
+    manager, artifacts = manager
+    deploy(artifacts, "v3")
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(model_manager=manager)),
+        headers={}
+    )
+
+    monkeypatch.setattr(admin.settings, "ADMIN_TOKEN", None)
+    assert asyncio.run(admin.reload_model(request)).status_code == 404
+    assert asyncio.run(admin.model_status(request)).status_code == 404
+    assert manager.current.model_version == "v1"
+    assert manager.reloads == 0
@@ -0,0 +1,162 @@
+import json
+import asyncio
+import pickle
+import pytest
+from types import SimpleNamespace
+from sklearn.tree import DecisionTreeRegressor
+from src.features.feature_pipeline import FeatureEngineer
+from src.features.zone_distance import ZoneDistanceProvider
+from src.inference.model_registry import CHAMPION, VARIANT_HEADER, ModelRegistry, load_challenger
+from src.inference.simple_predict import SimpleModelPredictor
+from src.routes.taxi import predict, predict_batch
+from src.schemas.taxi_schema import BatchPredictionInput, PredictionInput
+
+TRIP = {"PULocationID": "186", "DOLocationID": "79"}
+
+
+@pytest.fixture(scope="module")
+def feature_engineer():
+    return FeatureEngineer()
+
+
+@pytest.fixture(scope="module")
+def champion(feature_engineer):
+    return SimpleModelPredictor(feature_engineer=feature_engineer)
+
+
+@pytest.fixture
+def shifted_model(tmp_path):
+    """The deployed model with its intercept moved up by 5 minutes."""
+    with open("src/artifacts/simple_model.pkl", "rb") as f:
+        model = pickle.load(f)
+    model.intercept_ += 5.0
+    path = tmp_path / "mlruns" / "1" / "run-b" / "artifacts" / "LinearRegression" / "model.pkl"
+    path.parent.mkdir(parents=True)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return path
+
+
+def tree_model(tmp_path, feature_engineer, name, depth):
+    X = feature_engineer.inference_raw(["186", "132", "1"], ["79", "236", "1"], trip_distance=[4.0, 17.3, 0.5])
+    model = DecisionTreeRegressor(max_depth=depth).fit(X, [20.0, 45.0, 5.0])
+    path = tmp_path / f"{name}.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return str(path)
+
+
+def call(route, request, input_data):
+    async def run():
+        response = await route(request, input_data)
+        registry = getattr(request.app.state, "model_registry", None)
+        if registry is not None:
+            await registry.stop()
+        return response
+
+    response = asyncio.run(run())
+    return response.status_code, json.loads(response.body), response.headers
+
+
+def stub(champion, registry, headers=None):
+    state = SimpleNamespace(
+        model_predictor=champion,
+        zone_distances=ZoneDistanceProvider.synthetic(),
+        model_registry=registry
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=state), headers=headers or {})
+
+
+def test_challengers_load_from_mlruns_or_a_file(feature_engineer, shifted_model, tmp_path):
+    by_run = load_challenger("run-b", feature_engineer, mlruns_dir=str(tmp_path / "mlruns"))
+    by_file = load_challenger(str(shifted_model), feature_engineer)
+    assert by_run.model_version == "run-b"
+    assert by_run.predict_trips(["186"], ["79"], trip_distance=[4.0]) == \
+        by_file.predict_trips(["186"], ["79"], trip_distance=[4.0])
+
+    with pytest.raises(FileNotFoundError):
+        load_challenger("missing-run", feature_engineer, mlruns_dir=str(tmp_path / "mlruns"))
+
+
+def test_unusable_challengers_fail_to_load(feature_engineer, tmp_path):
+    from sklearn.linear_model import LinearRegression
+
+    corrupt = tmp_path / "corrupt.pkl"
+    corrupt.write_bytes(b"not a pickle")
+    with pytest.raises(pickle.UnpicklingError):
+        load_challenger(str(corrupt), feature_engineer)
+
+    unfitted = tmp_path / "unfitted.pkl"
+    with open(unfitted, "wb") as f:
+        pickle.dump(LinearRegression(), f)
+    with pytest.raises(ValueError, match="number of features"):
+        load_challenger(str(unfitted), feature_engineer)
+
+
+def test_routing_by_header_percentage_and_routing_key(feature_engineer, shifted_model):
+    challenger = load_challenger(str(shifted_model), feature_engineer)
+    with pytest.raises(ValueError):
+        ModelRegistry({"challenger": challenger}, shadow=["other"])
+    with pytest.raises(ValueError):
+        ModelRegistry({"challenger": challenger}, traffic={"challenger": 120})
+
+    registry = ModelRegistry({"challenger": challenger}, traffic={"challenger": 25}, random_state=0)
+    assert registry.select("champion") == CHAMPION
+    assert registry.select("challenger") == "challenger"
+    with pytest.raises(KeyError):
+        registry.select("unknown")
+
+    picks = [registry.select() for _ in range(4000)]
+    assert picks.count("challenger") / len(picks) == pytest.approx(0.25, abs=0.03)
+    assert len({registry.select(routing_key="user-42") for _ in range(20)}) == 1
+
+
+def test_routes_serve_the_selected_variant(champion, feature_engineer, shifted_model):
+    registry = ModelRegistry({"challenger": load_challenger(str(shifted_model), feature_engineer)})
+    _, expected, _ = call(predict, stub(champion, None), PredictionInput(**TRIP))
+
+    status_code, body, headers = call(predict, stub(champion, registry), PredictionInput(**TRIP))
+    assert status_code == 200 and headers[VARIANT_HEADER] == CHAMPION
+    assert body["duration"] == pytest.approx(expected["duration"])
+
+    request = stub(champion, registry, {VARIANT_HEADER: "challenger"})
+    _, body, headers = call(predict, request, PredictionInput(**TRIP))
+    assert headers[VARIANT_HEADER] == "challenger"
+    assert body["duration"] == pytest.approx(expected["duration"] + 5.0)
+
+    _, body, _ = call(predict_batch, request, BatchPredictionInput(trips=[TRIP, {"PULocationID": "1"}]))
+    assert body["predictions"][0]["duration"] == pytest.approx(expected["duration"] + 5.0)
+    assert "error" in body["predictions"][1]
+    assert registry.metrics.as_dict()["served"] == {CHAMPION: 1, "challenger": 2}
+
+    status_code, _, _ = call(predict, stub(champion, registry, {VARIANT_HEADER: "nope"}), PredictionInput(**TRIP))
+    assert status_code == 400
+
+
+def test_shadow_models_share_one_transform(champion, feature_engineer, shifted_model, tmp_path, monkeypatch):
+    registry = ModelRegistry(
+        {
+            "shifted": load_challenger(str(shifted_model), feature_engineer),
+            "shallow": load_challenger(tree_model(tmp_path, feature_engineer, "shallow", 1), feature_engineer),
+            "deep": load_challenger(tree_model(tmp_path, feature_engineer, "deep", 3), feature_engineer),
+        },
+        shadow=["shifted", "shallow", "deep"]
+    )
+    transforms = []
+    inference_raw = feature_engineer.inference_raw
+
+    def counting_inference_raw(*args, **kwargs):
+        transforms.append(args)
+        return inference_raw(*args, **kwargs)
+
+    monkeypatch.setattr(feature_engineer, "inference_raw", counting_inference_raw)
+    trips = [TRIP, {"PULocationID": "132", "DOLocationID": "236"}]
+    _, body, headers = call(predict_batch, stub(champion, registry), BatchPredictionInput(trips=trips))
+
+    assert headers[VARIANT_HEADER] == CHAMPION
+    assert len(body["predictions"]) == 2
+    # Both tree models score from one feature matrix; the linear one needs none
+    assert len(transforms) == 1
+    shadow = registry.metrics.as_dict()["shadow"]
+    assert {name: stats["scored"] for name, stats in shadow.items()} == {"shifted": 2, "shallow": 2, "deep": 2}
+    assert shadow["shifted"]["mean_absolute_difference"] == pytest.approx(5.0)
@@ -0,0 +1,103 @@
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.routes.taxi import predict, predict_batch
+from src.schemas.taxi_schema import BatchPredictionInput, PredictionInput
+from src.features.feature_pipeline import FeatureEngineer
+from src.inference.simple_predict import SimpleModelPredictor
+from src.features.zone_distance import ZoneDistanceProvider
+
+
+@pytest.fixture(scope="module")
+def request_stub():
+    feature_engineer = FeatureEngineer()
+    state = SimpleNamespace(
+        feature_engineer=feature_engineer,
+        model_predictor=SimpleModelPredictor(feature_engineer=feature_engineer),
+        zone_distances=ZoneDistanceProvider.synthetic()
+    )
+    return SimpleNamespace(app=SimpleNamespace(state=state))
+
+
+def call(route, request, input_data):
+    response = asyncio.run(route(request, input_data))
+    return response.status_code, json.loads(response.body)
+
+
+def test_predict_batch_matches_single_predictions(request_stub):
+    trips = [
+        {"PULocationID": "186", "DOLocationID": "79"},
+        {"PULocationID": "132", "DOLocationID": "236"},
+        {"PULocationID": "186", "DOLocationID": "79"},
+    ]
+    status_code, body = call(predict_batch, request_stub, BatchPredictionInput(trips=trips))
+
+    assert status_code == 200
+    assert len(body["predictions"]) == len(trips)
+    for trip, result in zip(trips, body["predictions"]):
+        _, single = call(predict, request_stub, PredictionInput(**trip))
+        assert result["duration"] == pytest.approx(single["duration"])
+
+
+def test_predict_batch_reports_invalid_items(request_stub):
+    trips = [
+        {"PULocationID": "186", "DOLocationID": "79"},
+        {"PULocationID": "186"},
+        {"PULocationID": "132", "DOLocationID": "236"},
+    ]
+    status_code, body = call(predict_batch, request_stub, BatchPredictionInput(trips=trips))
+
+    assert status_code == 200
+    predictions = body["predictions"]
+    assert "duration" in predictions[0]
+    assert "error" in predictions[1]
+    assert "duration" in predictions[2]
+
+
+def test_predict_answers_from_duration_table(request_stub, tmp_path):
+    from src.inference.duration_table import DurationTable, build_duration_table, save_duration_table
+
+    predictor = request_stub.app.state.model_predictor
+    zone_distances = request_stub.app.state.zone_distances
+    durations = build_duration_table(predictor, zone_distances, n_zones=3)
+    path = str(tmp_path / "duration_table.npy")
+    save_duration_table(durations, path, model_fingerprint="abc", model_version="v1",
+                        distance_source=zone_distances.source)
+
+    assert DurationTable.load(path, model_fingerprint="def", distance_source=zone_distances.source) is None
+    assert DurationTable.load(path, model_fingerprint="abc", distance_source="centroids:zones.csv") is None
+    # Unknown model files or distances never match a saved table
+    assert DurationTable.load(path, model_fingerprint=None, distance_source=zone_distances.source) is None
+    assert DurationTable.load(path, model_fingerprint="abc", distance_source=None) is None
+    table = DurationTable.load(path, model_fingerprint="abc", distance_source=zone_distances.source)
+    assert table.lookup("2", "3") == durations[1, 2]
+    assert table.lookup("4", "1") is None
+    assert table.lookup("02", "3") is None
+
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(
+        model_predictor=predictor, duration_table=table, zone_distances=zone_distances
+    )))
+    _, body = call(predict, request, PredictionInput(PULocationID="2", DOLocationID="3"))
+    assert body["duration"] == durations[1, 2]
+
+    _, body = call(predict_batch, request, BatchPredictionInput(trips=[
+        {"PULocationID": "1", "DOLocationID": "1"},
+        {"PULocationID": "186", "DOLocationID": "79"},
+    ]))
+    assert body["predictions"][0]["duration"] == durations[0, 0]
+    assert "duration" in body["predictions"][1]
+
+
+def test_duration_table_without_readable_metadata_is_ignored(tmp_path):
+    import numpy as np
+    from src.inference.duration_table import DurationTable, save_duration_table
+
+    path = tmp_path / "duration_table.npy"
+    save_duration_table(np.zeros((3, 3)), str(path), model_fingerprint="abc", distance_source="synthetic")
+    assert DurationTable.load(str(path), model_fingerprint="abc", distance_source="synthetic") is not None
+
+    path.with_suffix(".json").write_text("{not json")
+    assert DurationTable.load(str(path), model_fingerprint="abc", distance_source="synthetic") is None
+    path.with_suffix(".json").unlink()
+    assert DurationTable.load(str(path), model_fingerprint="abc", distance_source="synthetic") is None
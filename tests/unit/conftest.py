@@ -0,0 +1,19 @@
+import mlflow
+import pytest
+
+
+@pytest.fixture
+def tracking_uri(tmp_path, monkeypatch):
+    """A throwaway MLflow tracking database; run artifacts go under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    yield f"sqlite:///{tmp_path / 'mlflow.db'}"
+
+    # ModelTrainer turns on autologging globally; keep it out of later tests.
+    # The universal switch does not cover the flavors enabled one by one.
+    import mlflow.lightgbm
+    import mlflow.xgboost
+
+    mlflow.autolog(disable=True)
+    mlflow.xgboost.autolog(disable=True)
+    mlflow.lightgbm.autolog(disable=True)
+    mlflow.set_tracking_uri("sqlite:///mlflow.db")
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from src.inference.batching import PredictionCoalescer, score_rows
+
+
+class RecordingPredictor:
+    """Fake predictor returning trip_distance * 2, failing on PULocationID 'bad'."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_trips(self, pu_ids, do_ids, trip_distance):
+        self.batch_sizes.append(len(pu_ids))
+        if "bad" in pu_ids:
+            raise ValueError("bad row")
+        return [distance * 2 for distance in trip_distance]
+
+
+def test_score_rows_isolates_failing_rows():
+    predictor = RecordingPredictor()
+    results = score_rows(predictor, [("1", "2", 1.0), ("bad", "2", 2.0), ("3", "4", 3.0)])
+
+    assert results[0] == 2.0
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 6.0
+
+
+def test_coalescer_batches_concurrent_requests():
+    predictor = RecordingPredictor()
+
+    async def run():
+        coalescer = PredictionCoalescer(predictor, max_batch_size=4, max_wait_ms=50)
+        await coalescer.start()
+        results = await asyncio.gather(*[
+            coalescer.predict(str(i), "1", float(i)) for i in range(10)
+        ])
+        await coalescer.stop()
+        return results, coalescer.metrics.as_dict()
+
+    results, metrics = asyncio.run(run())
+
+    assert results == [2.0 * i for i in range(10)]
+    assert predictor.batch_sizes == [4, 4, 2]
+    assert metrics["batches"] == 3
+    assert metrics["requests"] == 10
+    assert metrics["full_batches"] == 2
+    assert metrics["batch_size_histogram"] == {2: 1, 4: 2}
+
+
+def test_coalescer_fails_only_the_bad_request():
+    predictor = RecordingPredictor()
+
+    async def run():
+        coalescer = PredictionCoalescer(predictor, max_batch_size=8, max_wait_ms=20)
+        await coalescer.start()
+        results = await asyncio.gather(
+            coalescer.predict("1", "1", 1.0),
+            coalescer.predict("bad", "1", 1.0),
+            return_exceptions=True
+        )
+        await coalescer.stop()
+        return results
+
+    good, bad = asyncio.run(run())
+
+    assert good == 2.0
+    assert isinstance(bad, ValueError)
+
+
+def test_coalescer_stop_scores_the_batch_being_collected():
+    predictor = RecordingPredictor()
+
+    async def run():
+        coalescer = PredictionCoalescer(predictor, max_batch_size=8, max_wait_ms=10_000)
+        await coalescer.start()
+        requests = [asyncio.create_task(coalescer.predict(str(i), "1", float(i))) for i in range(3)]
+        # Let the collector take the requests off the queue and wait for more
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await coalescer.stop()
+        return await asyncio.wait_for(asyncio.gather(*requests), timeout=1)
+
+    assert asyncio.run(run()) == [0.0, 2.0, 4.0]
+    assert predictor.batch_sizes == [3]
+
+
+def test_coalescer_must_be_started():
+    coalescer = PredictionCoalescer(RecordingPredictor())
+    with pytest.raises(RuntimeError):
+        asyncio.run(coalescer.predict("1", "1", 1.0))
@@ -0,0 +1,160 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction import DictVectorizer
+from src.features.columnar_encoder import ColumnarEncoder, encode_pairs, format_pair, parse_pair
+from src.features.feature_pipeline import FeatureEngineer
+
+
+def frame(rng, n, zones=30):
+    return pd.DataFrame({
+        "PU_DO": [f"{pu}_{do}" for pu, do in rng.integers(1, zones, (n, 2))],
+        "trip_distance": np.where(rng.random(n) < 0.1, 0.0, rng.uniform(0, 30, n)),
+    })
+
+
+def assert_same_csr(X, expected):
+    assert X.shape == expected.shape
+    np.testing.assert_array_equal(X.indptr, expected.indptr)
+    np.testing.assert_array_equal(X.indices, expected.indices)
+    np.testing.assert_array_equal(X.data, expected.data)
+
+
+def records(df):
+    return df[["PU_DO", "trip_distance"]].to_dict(orient="records")
+
+
+def test_matches_dict_vectorizer():
+    rng = np.random.default_rng(0)
+    train, test = frame(rng, 2000), frame(rng, 500, zones=40)
+
+    dv = DictVectorizer()
+    X_train_expected = dv.fit_transform(records(train))
+    encoder = ColumnarEncoder(["PU_DO"], ["trip_distance"])
+    X_train = encoder.fit_transform(train)
+
+    assert encoder.feature_names_ == dv.feature_names_
+    assert encoder.vocabulary_ == dv.vocabulary_
+    assert_same_csr(X_train, X_train_expected)
+    # Unseen PU_DO values are dropped, like DictVectorizer.transform
+    assert_same_csr(encoder.transform(test), dv.transform(records(test)))
+
+
+def test_dict_vectorizer_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    train, test = frame(rng, 500), frame(rng, 200)
+    encoder = ColumnarEncoder(["PU_DO"], ["trip_distance"]).fit(train)
+
+    path = tmp_path / "dict_vectorizer.pkl"
+    joblib.dump(encoder.to_dict_vectorizer(), path)
+    dv = joblib.load(path)
+    assert_same_csr(dv.transform(records(test)), encoder.transform(test))
+
+    restored = ColumnarEncoder.from_dict_vectorizer(dv, ["PU_DO"], ["trip_distance"])
+    assert_same_csr(restored.transform(test), encoder.transform(test))
+
+
+def test_fit_stream_matches_fit_on_all_frames():
+    df = pd.DataFrame({"PU_DO": ["1_2", "3_4", "1_2", "5_6"], "trip_distance": [1.0, 2.0, 3.0, 4.0]})
+    whole = ColumnarEncoder(["PU_DO"], ["trip_distance"]).fit(df)
+    streamed = ColumnarEncoder(["PU_DO"], ["trip_distance"]).fit_stream([df[:2], df[2:]])
+
+    assert streamed.feature_names_ == whole.feature_names_
+    assert (streamed.transform(df) != whole.transform(df)).nnz == 0
+
+
+def test_empty_input():
+    encoder = ColumnarEncoder(["PU_DO"], ["trip_distance"]).fit(frame(np.random.default_rng(2), 10))
+    with pytest.raises(ValueError):
+        encoder.transform(pd.DataFrame({"PU_DO": [], "trip_distance": []}))
+
+
+def test_feature_engineer_vectorizers_agree(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 1000
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s")
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(60, 3600, n), unit="s"),
+        "Airport_fee": 0.0,
+        "PULocationID": rng.integers(1, 30, n),
+        "DOLocationID": rng.integers(1, 30, n),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+    train, test = df.iloc[:800], df.iloc[800:]
+
+    columnar = FeatureEngineer(dv_path=str(tmp_path / "columnar.pkl"), vectorizer="columnar")
+    dict_based = FeatureEngineer(dv_path=str(tmp_path / "dict.pkl"), vectorizer="dict")
+    assert_same_csr(columnar.fit_transform(train)[0], dict_based.fit_transform(train)[0])
+
+    # A fresh instance encodes with the vocabulary loaded from the saved pickle
+    reloaded = FeatureEngineer(dv_path=str(tmp_path / "columnar.pkl"))
+    assert_same_csr(reloaded.transform(test)[0], dict_based.transform(test)[0])
+
+
+def test_pair_codes():
+    codes = encode_pairs(["1", "265", "007", "abc", 12], ["3", "1", "3", "3", 1500])
+    np.testing.assert_array_equal(codes, [1003, 265001, -1, -1, -1])
+    assert format_pair(265001) == "265_1"
+    assert parse_pair("265_1") == 265001
+    assert parse_pair("007_3") is None
+
+
+def test_integer_pairs_match_string_pairs():
+    rng = np.random.default_rng(4)
+    train, test = frame(rng, 2000), frame(rng, 500, zones=40)
+
+    def as_codes(df):
+        pu, do = zip(*(value.split("_") for value in df["PU_DO"]))
+        return df.assign(PU_DO=encode_pairs(list(pu), list(do)))
+
+    strings = ColumnarEncoder(["PU_DO"], ["trip_distance"])
+    codes = ColumnarEncoder(["PU_DO"], ["trip_distance"], pair_codes=["PU_DO"])
+    assert_same_csr(codes.fit_transform(as_codes(train)), strings.fit_transform(train))
+    assert codes.feature_names_ == strings.feature_names_
+    assert_same_csr(codes.transform(as_codes(test)), strings.transform(test))
+
+    restored = ColumnarEncoder.from_dict_vectorizer(
+        strings.to_dict_vectorizer(), ["PU_DO"], ["trip_distance"], pair_codes=["PU_DO"]
+    )
+    assert_same_csr(restored.transform(as_codes(test)), strings.transform(test))
+
+
+@pytest.mark.parametrize("backend", ["pandas", "arrow", "polars"])
+def test_feature_engineer_integer_pair_encoding(tmp_path, backend):
+    if backend == "polars":
+        pytest.importorskip("polars")
+    rng = np.random.default_rng(5)
+    n = 1000
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s")
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(-60, 3600, n), unit="s"),
+        "Airport_fee": 0.0,
+        "PULocationID": rng.integers(1, 30, n),
+        "DOLocationID": rng.integers(1, 30, n),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+    train, test = df.iloc[:800], df.iloc[800:]
+
+    strings = FeatureEngineer(dv_path=str(tmp_path / "string.pkl"), backend=backend)
+    codes = FeatureEngineer(dv_path=str(tmp_path / "integer.pkl"), backend=backend, pair_encoding="integer")
+    X_expected, y_expected = strings.fit_transform(train)
+    X, y = codes.fit_transform(train)
+    assert_same_csr(X, X_expected)
+    np.testing.assert_array_equal(y, y_expected)
+    assert codes.dv.feature_names_ == strings.dv.feature_names_
+    assert_same_csr(codes.transform(test)[0], strings.transform(test)[0])
+
+    trips = pd.DataFrame({
+        "PULocationID": ["1", "5", "007"],
+        "DOLocationID": ["3", "5", "3"],
+        "trip_distance": [2.0, 0.0, 1.0],
+    })
+    assert_same_csr(codes.inference(trips.copy()), strings.inference(trips.copy()))
+
+
+def test_integer_pair_encoding_needs_columnar_vectorizer():
+    with pytest.raises(ValueError):
+        FeatureEngineer(vectorizer="dict", pair_encoding="integer")
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.features.feature_pipeline import FeatureEngineer
+from src.features.compiled_inference import parse_zone_ids
+
+
+@pytest.fixture
+def feature_engineer(tmp_path):
+    feature_engineer = FeatureEngineer(dv_path=str(tmp_path / "test_dict_vectorizer.pkl"))
+    feature_engineer.fit_transform(pd.DataFrame({
+        "tpep_pickup_datetime": ["2022-01-01 08:00:00", "2022-01-01 08:30:00", "2022-01-01 09:00:00"],
+        "tpep_dropoff_datetime": ["2022-01-01 08:15:00", "2022-01-01 08:45:00", "2022-01-01 09:20:00"],
+        "Airport_fee": [1.5, 2.0, 0.0],
+        "PULocationID": [1, 2, 132],
+        "DOLocationID": [3, 4, 10],
+        "trip_distance": [2.5, 3.0, 0.0],
+    }))
+    return feature_engineer
+
+
+def assert_same_matrix(X_fast, X_slow):
+    assert X_fast.shape == X_slow.shape
+    np.testing.assert_array_equal(X_fast.indptr, X_slow.indptr)
+    np.testing.assert_array_equal(X_fast.indices, X_slow.indices)
+    np.testing.assert_array_equal(X_fast.data, X_slow.data)
+
+
+def test_parse_zone_ids():
+    ids = parse_zone_ids(["1", "132", "007", "7.0", "abc", "0"])
+    np.testing.assert_array_equal(ids, [1, 132, -1, -1, -1, 0])
+    np.testing.assert_array_equal(parse_zone_ids([4, 265]), [4, 265])
+
+
+def test_inference_raw_matches_inference(feature_engineer):
+    pu_ids = ["1", "2", "132", "1", "999", "abc"]
+    do_ids = ["3", "4", "10", "4", "3", "3"]
+    distances = [2.5, 0.0, 12.25, 1.0, 3.0, 4.0]
+
+    X_slow = feature_engineer.inference(pd.DataFrame({
+        "PULocationID": pu_ids,
+        "DOLocationID": do_ids,
+        "trip_distance": distances,
+    }))
+    X_fast = feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances)
+
+    assert_same_matrix(X_fast, X_slow)
+
+
+def test_inference_raw_matches_inference_on_deployed_vectorizer():
+    feature_engineer = FeatureEngineer()
+    rng = np.random.default_rng(0)
+    pu_ids = rng.integers(1, 266, size=500)
+    do_ids = rng.integers(1, 266, size=500)
+    distances = rng.uniform(0, 30, size=500).round(2)
+
+    X_slow = feature_engineer.inference(pd.DataFrame({
+        "PULocationID": pu_ids,
+        "DOLocationID": do_ids,
+        "trip_distance": distances,
+    }))
+    X_fast = feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances)
+
+    assert_same_matrix(X_fast, X_slow)
+
+
+def test_inference_raw_requires_numerical_features(feature_engineer):
+    with pytest.raises(ValueError):
+        feature_engineer.inference_raw(["1"], ["3"])
@@ -1,10 +1,15 @@
 import pytest
+import requests
 from pathlib import Path
 import pandas as pd
 from src.config.settings import AppSettings
-from src.data_pulling.download_data import DataDownloader
+from src.data_pulling.download_data import DataDownloader, DownloadError
 import tempfile
 import os
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Fixture to initialize the downloader with real settings
 @pytest.fixture
@@ -83,3 +88,198 @@ def test_download_all(downloader):
         # Verify that the file for April 2022 in the testing set is downloaded
         test_file_path = test_path / "yellow_tripdata_2022-04.parquet"
         assert test_file_path.exists()
+
+
+# ---------------------------------------------------------------------------
+# Local HTTP stand-in for the TLC CDN: serves in-memory parquet files with
+# ETag and Range support and can cut responses short to simulate drops.
+# ---------------------------------------------------------------------------
+class StandInServer:
+    def __init__(self, files):
+        self.files = dict(files)
+        self.requests = []  # (path, Range header) per request
+        self.drop_after = {}  # path -> bytes sent before the connection is cut, once
+        self.fail_with = {}  # path -> status codes answered before serving the file
+        self.corrupt = set()  # paths served once with their bytes flipped
+        self.delay = 0.0  # seconds to wait before answering, so requests overlap
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests.append((self.path, self.headers.get("Range")))
+                    server.concurrent += 1
+                    server.max_concurrent = max(server.max_concurrent, server.concurrent)
+                try:
+                    self._serve()
+                finally:
+                    with server.lock:
+                        server.concurrent -= 1
+
+            def _serve(self):
+                time.sleep(server.delay)
+                name = self.path.lstrip("/")
+                if name not in server.files:
+                    self.send_error(404)
+                    return
+                statuses = server.fail_with.get(name)
+                if statuses:
+                    self.send_error(statuses.pop(0))
+                    return
+                body = server.files[name]
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                start = 0
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if range_header and (if_range is None or if_range == etag):
+                    start = int(range_header.split("=")[1].split("-")[0])
+                    if start >= len(body):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(body)}")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Length", str(len(body) - start))
+                self.send_header("ETag", etag)
+                self.end_headers()
+
+                payload = body[start:]
+                if name in server.corrupt:
+                    server.corrupt.discard(name)
+                    payload = bytes(b ^ 0xFF for b in payload)
+                cut = server.drop_after.pop(name, None)
+                if cut is not None:
+                    self.wfile.write(payload[:cut])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def parquet_bytes(seed):
+    path = Path(tempfile.mkdtemp()) / "month.parquet"
+    pd.DataFrame({"trip_distance": [float(seed)] * 5000, "PULocationID": range(5000)}).to_parquet(path)
+    return path.read_bytes()
+
+
+@pytest.fixture
+def months():
+    return {f"yellow_tripdata_2024-0{m}.parquet": parquet_bytes(m) for m in range(1, 5)}
+
+
+@pytest.fixture
+def local_downloader(tmp_path):
+    settings = AppSettings()
+    settings.RAW_DATA_DIRECTORY = str(tmp_path / "raw")
+    settings.DOWNLOAD_WORKERS = 2
+    settings.DOWNLOAD_RETRIES = 2
+    settings.DOWNLOAD_BACKOFF_SECONDS = 0.0
+    settings.DOWNLOAD_CHUNK_BYTES = 1024
+    settings.DOWNLOAD_TIMEOUT_SECONDS = 10
+    return DataDownloader(settings=settings)
+
+
+def test_parallel_download_split_from_stand_in(local_downloader, months, tmp_path):
+    with StandInServer(months) as server:
+        server.delay = 0.2
+        local_downloader.settings.DATA_URL = server.url + "/yellow_tripdata_{year_month}.parquet"
+        paths = local_downloader.download_split("2024-01", "2024-04", tmp_path)
+
+    assert [path.name for path in paths] == sorted(months)
+    for path in paths:
+        assert path.read_bytes() == months[path.name]
+    assert not list(tmp_path.glob("*.part*"))
+    assert 1 < server.max_concurrent <= 2
+
+
+def test_interrupted_download_is_resumed(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-01.parquet"
+    with StandInServer(months) as server:
+        server.drop_after[name] = 3000
+        local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+
+    assert (tmp_path / name).read_bytes() == months[name]
+    # The second request picks up from what reached the partial file
+    (_, first_range), (_, second_range) = server.requests
+    assert first_range is None
+    assert 0 < int(second_range[len("bytes="):-1]) <= 3000
+
+
+def test_partial_file_from_previous_run_is_resumed(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-02.parquet"
+    (tmp_path / f"{name}.part").write_bytes(months[name][:1000])
+    with StandInServer(months) as server:
+        local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+
+    assert (tmp_path / name).read_bytes() == months[name]
+    assert server.requests == [(f"/{name}", "bytes=1000-")]
+
+
+def test_corrupt_partial_file_fails_checksum_and_is_refetched(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-03.parquet"
+    (tmp_path / f"{name}.part").write_bytes(b"X" * 1000)
+    with StandInServer(months) as server:
+        local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+
+    assert (tmp_path / name).read_bytes() == months[name]
+    assert not (tmp_path / f"{name}.part").exists()
+    # The resumed file failed its checks and was downloaded again from scratch
+    assert server.requests == [(f"/{name}", "bytes=1000-"), (f"/{name}", None)]
+
+
+def test_server_errors_and_corrupt_transfers_are_retried(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-01.parquet"
+    with StandInServer(months) as server:
+        server.fail_with[name] = [503]
+        server.corrupt.add(name)
+        local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+
+    assert (tmp_path / name).read_bytes() == months[name]
+    assert len(server.requests) == 3
+
+
+def test_retries_are_bounded_and_client_errors_are_not_retried(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-02.parquet"
+    with StandInServer(months) as server:
+        server.fail_with[name] = [500, 500, 500]
+        with pytest.raises(DownloadError):
+            local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+        assert len(server.requests) == 3
+
+        with pytest.raises(requests.HTTPError):
+            local_downloader.download_and_save_parquet_file(f"{server.url}/missing.parquet", tmp_path)
+        assert len(server.requests) == 4
+    assert not (tmp_path / name).exists()
+
+
+def test_known_sha256_is_checked(local_downloader, months, tmp_path):
+    name = "yellow_tripdata_2024-04.parquet"
+    local_downloader.checksums = {name: "0" * 64}
+    with StandInServer(months) as server:
+        with pytest.raises(DownloadError):
+            local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+        local_downloader.checksums = {name: hashlib.sha256(months[name]).hexdigest()}
+        local_downloader.download_and_save_parquet_file(f"{server.url}/{name}", tmp_path)
+    assert (tmp_path / name).exists()
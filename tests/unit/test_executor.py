@@ -0,0 +1,59 @@
+import time
+import asyncio
+import pandas as pd
+import pytest
+from src.inference.executor import PredictionExecutor
+
+
+class SlowPredictor:
+    """Fake predictor that blocks like CPU-bound scoring would."""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+
+    def predict(self, data):
+        time.sleep(self.seconds)
+        return list(data["trip_distance"] * 2)
+
+    def predict_trips(self, pu_ids, do_ids, trip_distance):
+        time.sleep(self.seconds)
+        return [distance * 2 for distance in trip_distance]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        PredictionExecutor(SlowPredictor(), backend="gpu")
+
+
+@pytest.mark.parametrize("backend", ["inline", "thread"])
+def test_backends_return_same_predictions(backend):
+    executor = PredictionExecutor(SlowPredictor(), backend=backend, max_workers=2)
+    df = pd.DataFrame({"PULocationID": ["1", "2"], "DOLocationID": ["3", "4"], "trip_distance": [1.0, 2.5]})
+
+    async def run():
+        return await executor.predict(df), await executor.score_rows([("1", "3", 1.0), ("2", "4", 2.5)])
+
+    predictions, scores = asyncio.run(run())
+    executor.shutdown()
+
+    assert predictions == [2.0, 5.0]
+    assert scores == [2.0, 5.0]
+
+
+def test_thread_backend_keeps_event_loop_responsive():
+    executor = PredictionExecutor(SlowPredictor(seconds=0.3), backend="thread", max_workers=1)
+    df = pd.DataFrame({"PULocationID": ["1"], "DOLocationID": ["3"], "trip_distance": [1.0]})
+
+    async def health_check_latency():
+        scoring = asyncio.create_task(executor.predict(df))
+        await asyncio.sleep(0.05)  # scoring is now running on the pool
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        latency = time.perf_counter() - start
+        await scoring
+        return latency
+
+    latency = asyncio.run(health_check_latency())
+    executor.shutdown()
+
+    assert latency < 0.1
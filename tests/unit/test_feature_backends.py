@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from src.features.feature_pipeline import FeatureEngineer
+
+
+@pytest.fixture
+def trips():
+    rng = np.random.default_rng(7)
+    n = 5000
+    # Whole seconds plus sub-second noise, with many tied pickup times
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        rng.integers(0, 600, n) * 1_000_000 + rng.integers(0, 1000, n), unit="us"
+    )
+    fee = rng.choice([0.0, 1.75], n)
+    fee[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "tpep_pickup_datetime": pickup.as_unit("us"),
+        "tpep_dropoff_datetime": (pickup + pd.to_timedelta(rng.integers(-600, 7200, n), unit="s")).as_unit("us"),
+        "Airport_fee": fee,
+        "PULocationID": rng.integers(1, 266, n).astype("int32"),
+        "DOLocationID": rng.integers(1, 266, n).astype("int32"),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+
+
+def backend(name):
+    if name == "polars":
+        pytest.importorskip("polars")
+    return name
+
+
+@pytest.mark.parametrize("name", ["arrow", "polars"])
+@pytest.mark.parametrize("as_table", [False, True])
+def test_backend_matches_pandas(trips, name, as_table):
+    expected = FeatureEngineer(backend="pandas")._clean_and_engineer(trips).reset_index(drop=True)
+
+    data = pa.Table.from_pandas(trips, preserve_index=False) if as_table else trips
+    result = FeatureEngineer(backend=backend(name))._clean_and_engineer(data)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    np.testing.assert_array_equal(result["duration"].to_numpy(), expected["duration"].to_numpy())
+
+
+@pytest.mark.parametrize("name", ["arrow", "polars"])
+def test_backend_fit_transform_matches_pandas(trips, tmp_path, name):
+    X_expected, y_expected = FeatureEngineer(
+        dv_path=str(tmp_path / "pandas_dv.pkl"), backend="pandas"
+    ).fit_transform(trips)
+    X, y = FeatureEngineer(dv_path=str(tmp_path / f"{name}_dv.pkl"), backend=backend(name)).fit_transform(trips)
+
+    assert (X != X_expected).nnz == 0
+    np.testing.assert_array_equal(y, y_expected)
+
+
+def test_pandas_keeps_input_order_for_tied_pickup_times(trips):
+    # About 8 trips per pickup second
+    trips = trips.assign(tpep_pickup_datetime=trips["tpep_pickup_datetime"].dt.floor("s"))
+    result = FeatureEngineer(backend="pandas")._clean_and_engineer(trips).reset_index(drop=True)
+
+    kept = trips[trips["Airport_fee"].notna()].copy()
+    kept["duration"] = (kept["tpep_dropoff_datetime"] - kept["tpep_pickup_datetime"]).dt.total_seconds() / 60
+    kept = kept[(kept["duration"] > 0) & (kept["duration"] <= 90)]
+    stable = kept.sort_values("tpep_pickup_datetime", kind="stable").reset_index(drop=True)
+    np.testing.assert_array_equal(result["trip_distance"].to_numpy(), stable["trip_distance"].to_numpy())
+
+    # Same rows as the original query + default sort; only the order of ties differs
+    baseline = kept.sort_values("tpep_pickup_datetime").reset_index(drop=True)
+    np.testing.assert_array_equal(
+        np.sort(result["trip_distance"].to_numpy()), np.sort(baseline["trip_distance"].to_numpy())
+    )
+
+
+def test_string_datetimes(trips):
+    trips = trips.head(100).astype({
+        "tpep_pickup_datetime": str, "tpep_dropoff_datetime": str
+    })
+    expected = FeatureEngineer(backend="pandas")._clean_and_engineer(trips).reset_index(drop=True)
+    for name in ("arrow", "polars"):
+        result = FeatureEngineer(backend=backend(name))._clean_and_engineer(trips)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        FeatureEngineer(backend="spark")
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from src.data_pulling.feature_cache import FeatureCache
+from src.data_pulling.read_data import save_processed_shards, stream_train_test
+from src.data_pulling.sparse_store import SparseStore
+from src.features.feature_pipeline import FeatureEngineer
+
+
+def month(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    # Whole minutes so pickups tie across months
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, n), unit="min")
+    fee = rng.choice([0.0, 1.75], n)
+    fee[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "tpep_pickup_datetime": pickup.as_unit("us"),
+        "tpep_dropoff_datetime": (pickup + pd.to_timedelta(rng.integers(-600, 7200, n), unit="s")).as_unit("us"),
+        "Airport_fee": fee,
+        "PULocationID": rng.integers(1, 40, n).astype("int32"),
+        "DOLocationID": rng.integers(1, 40, n).astype("int32"),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+
+
+def write_month(folder, seed):
+    folder.mkdir(parents=True, exist_ok=True)
+    pq.write_table(
+        pa.Table.from_pandas(month(seed), preserve_index=False),
+        folder / f"yellow_tripdata_2024-0{seed}.parquet", row_group_size=600
+    )
+
+
+@pytest.fixture
+def raw_data(tmp_path):
+    for folder, seeds in (("train", (1, 2)), ("test", (3,))):
+        for seed in seeds:
+            write_month(tmp_path / "raw" / folder, seed)
+    return tmp_path / "raw"
+
+
+@pytest.mark.parametrize("pair_encoding", ["string", "integer"])
+def test_cached_features_match_streaming(raw_data, tmp_path, pair_encoding):
+    streaming = FeatureEngineer(dv_path=str(tmp_path / "streaming.pkl"), pair_encoding=pair_encoding)
+    train_batches, test_batches = stream_train_test(str(raw_data), streaming, batch_size=500)
+    X_train, y_train = streaming.fit_transform_stream(train_batches)
+    X_test, y_test = streaming.transform_stream(test_batches)
+
+    for _ in range(2):  # cold, then warm cache
+        cached = FeatureEngineer(
+            dv_path=str(tmp_path / "cached.pkl"), backend="arrow", pair_encoding=pair_encoding
+        )
+        cache = FeatureCache(tmp_path / "features", cached, batch_size=500)
+        X_train_cached, y_train_cached = cached.fit_transform_cleaned(cache.folder(raw_data / "train"))
+        X_test_cached, y_test_cached = cached.transform_cleaned(cache.folder(raw_data / "test"))
+
+        assert cached.dv.feature_names_ == streaming.dv.feature_names_
+        assert (X_train_cached != X_train).nnz == 0
+        np.testing.assert_array_equal(y_train_cached, y_train)
+        assert (X_test_cached != X_test).nnz == 0
+        np.testing.assert_array_equal(y_test_cached, y_test)
+    assert (cache.hits, cache.misses) == (3, 0)
+
+
+def test_cached_months_encode_to_shards_without_the_full_matrix(raw_data, tmp_path):
+    in_memory = FeatureEngineer(dv_path=str(tmp_path / "in_memory.pkl"), pair_encoding="integer")
+    cache = FeatureCache(tmp_path / "features", in_memory, batch_size=500)
+    in_memory.fit_transform_cleaned(cache.folder(raw_data / "train"))
+
+    sharded = FeatureEngineer(dv_path=str(tmp_path / "sharded.pkl"), pair_encoding="integer")
+    cache = FeatureCache(tmp_path / "features", sharded, batch_size=500)
+    sharded.fit_vocabulary_cleaned(cache.folder(raw_data / "train"))
+    assert sharded.dv.feature_names_ == in_memory.dv.feature_names_
+
+    path = save_processed_shards(cache.folder(raw_data / "test"), sharded, "test", tmp_path, shard_rows=1000)
+    store = SparseStore(path)
+    expected_X, expected_y = in_memory.transform_cleaned(cache.folder(raw_data / "test"))
+    X, y = store.load()
+    # One month, so the row order is the same as the in-memory path
+    assert store.n_shards == 2
+    assert (X != expected_X).nnz == 0
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_only_new_or_changed_months_are_featurized(raw_data, tmp_path):
+    fe = FeatureEngineer(dv_path=str(tmp_path / "dv.pkl"))
+    cache_dir = tmp_path / "features"
+    cache = FeatureCache(cache_dir, fe)
+    list(cache.folder(raw_data / "train"))
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # A new month is added and an existing one is re-published
+    write_month(raw_data / "train", 4)
+    changed = month(2).iloc[:1500]
+    changed.to_parquet(raw_data / "train" / "yellow_tripdata_2024-02.parquet", index=False)
+
+    cache = FeatureCache(cache_dir, fe)
+    frames = list(cache.folder(raw_data / "train"))
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(frames) == 3
+    # The shard of the old February file was replaced
+    assert len(list(cache_dir.glob("yellow_tripdata_2024-02.*.parquet"))) == 1
+    assert len(list(cache_dir.glob("*.parquet"))) == 3
+
+
+def test_feature_config_is_part_of_the_key(raw_data, tmp_path):
+    cache_dir = tmp_path / "features"
+    string_cache = FeatureCache(cache_dir, FeatureEngineer(pair_encoding="string"))
+    integer_cache = FeatureCache(cache_dir, FeatureEngineer(pair_encoding="integer"))
+    arrow_cache = FeatureCache(cache_dir, FeatureEngineer(backend="arrow", pair_encoding="integer"))
+
+    assert string_cache.config_key != integer_cache.config_key
+    # Backends clean to the same rows, so they share shards
+    assert integer_cache.config_key == arrow_cache.config_key
+
+    path = raw_data / "test" / "yellow_tripdata_2024-03.parquet"
+    string_cache.month(path)
+    integer_cache.month(path)
+    assert (string_cache.misses, integer_cache.misses) == (1, 1)
+    assert len(list(cache_dir.glob("*.parquet"))) == 2
+
+
+def test_missing_folder(tmp_path):
+    cache = FeatureCache(tmp_path / "features", FeatureEngineer())
+    with pytest.raises(FileNotFoundError):
+        next(cache.folder(tmp_path / "missing"))
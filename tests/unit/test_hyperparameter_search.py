@@ -0,0 +1,118 @@
+import math
+import mlflow
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from mlflow import MlflowClient
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.tree import DecisionTreeRegressor
+from src.training.hyperparameter_search import (
+    HyperparameterSearch,
+    hyperband_brackets,
+    successive_halving_schedule,
+)
+from src.training.model_history import ModelHistory
+from src.training.trainer import ModelTrainer
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = sp.csr_matrix(rng.uniform(0, 1, (1200, 4)))
+    y = np.sin(6 * X[:, 0].toarray().ravel()) * 10 + 5 * X[:, 1].toarray().ravel() + rng.normal(0, 0.5, 1200)
+    return X[:1000], y[:1000], X[1000:], y[1000:]
+
+
+@pytest.fixture
+def trainer(tracking_uri):
+    return ModelTrainer(experiment_name="search-test", tracking_uri=tracking_uri)
+
+
+def test_successive_halving_schedule():
+    assert successive_halving_schedule(27, 10, 270, eta=3) == [(27, 10), (9, 30), (3, 90), (1, 270)]
+    # Stops once the full resource is reached
+    assert successive_halving_schedule(27, 100, 270, eta=3) == [(27, 100), (9, 270)]
+    assert successive_halving_schedule(1, 10, 270) == [(1, 270)]
+    assert successive_halving_schedule(9, 10, 270) == [(9, 10), (3, 30), (1, 270)]
+
+
+def test_hyperband_brackets():
+    brackets = hyperband_brackets(1, 81, eta=3)
+    assert [n for n, _ in brackets] == [81, 34, 15, 8, 5]
+    assert [r for _, r in brackets] == pytest.approx([1, 3, 9, 27, 81])
+
+
+def test_unknown_method_and_missing_budget(trainer):
+    with pytest.raises(ValueError):
+        HyperparameterSearch(trainer, "Tree", DecisionTreeRegressor, {}, method="grid")
+    with pytest.raises(ValueError):
+        HyperparameterSearch(trainer, "GBM", GradientBoostingRegressor, {}, resource="n_estimators")
+
+
+def test_search_fails_when_every_trial_fails(trainer, data):
+    search = HyperparameterSearch(
+        trainer, "Tree", DecisionTreeRegressor,
+        {"max_depth": [-1, -2, -3], "random_state": [0]},
+        method="halving", n_candidates=3, eta=3, min_resource=200,
+    )
+    with pytest.raises(RuntimeError, match="finite validation score"):
+        search.fit(*data)
+
+    runs = MlflowClient().search_runs(
+        [mlflow.get_experiment_by_name("search-test").experiment_id],
+        filter_string="tags.mlflow.runName = 'Tree-search'"
+    )
+    assert [run.info.status for run in runs] == ["FAILED"]
+
+
+def test_halving_over_samples_logs_nested_runs(trainer, data):
+    search = HyperparameterSearch(
+        trainer, "Tree", DecisionTreeRegressor,
+        {"max_depth": [1, 2, 3, 4, 6, 8, 10, 12, 16], "random_state": [0]},
+        method="halving", n_candidates=9, eta=3, min_resource=80,
+    )
+    result = search.fit(*data)
+
+    client = MlflowClient()
+    children = client.search_runs(
+        [client.get_run(result.run_id).info.experiment_id],
+        filter_string=f"tags.mlflow.parentRunId = '{result.run_id}'"
+    )
+    trial_runs = [run for run in children if "trial_id" in run.data.tags]
+    assert len(trial_runs) == 9
+    assert len(children) == 10  # trials + refit
+
+    # 9 trials on 80 rows, 3 on 240, 1 on all 800 fit rows (1000 minus 20% validation)
+    assert [len(trial.scores) for trial in result.trials].count(3) == 1
+    assert [len(trial.scores) for trial in result.trials].count(1) == 6
+    assert result.total_resource == 9 * 80 + 3 * 240 + 800
+    stopped = [run for run in trial_runs if "stopped_at_resource" in run.data.tags]
+    assert len(stopped) == 8
+
+    best_run = client.get_run(result.run_id)
+    assert best_run.data.metrics["best_val_mean_absolute_error"] == result.best_val_mae
+    history = client.get_metric_history(
+        next(trial.run_id for trial in result.trials if len(trial.scores) == 3), "val_mean_absolute_error"
+    )
+    assert [metric.step for metric in history] == [0, 1, 2]
+
+    best = ModelHistory("search-test").get_best_model(parent_run_id=result.run_id)
+    assert best["run_id"] == result.refit_run_id
+    assert math.isfinite(best["test_mean_absolute_error"])
+
+
+def test_parallel_hyperband_over_boosting_rounds(trainer, data):
+    search = HyperparameterSearch(
+        trainer, "GBM", GradientBoostingRegressor,
+        {"learning_rate": [0.05, 0.1, 0.3], "max_depth": [2, 3], "random_state": [0]},
+        resource="n_estimators", min_resource=10, max_resource=90, eta=3,
+        method="hyperband", n_jobs=2, threads_per_job=1,
+    )
+    result = search.fit(*data)
+
+    assert result.best_params["n_estimators"] == 90
+    assert all(math.isfinite(trial.val_mae) for trial in result.trials)
+    assert len({trial.run_id for trial in result.trials}) == len(result.trials)
+    refit = MlflowClient().get_run(result.refit_run_id)
+    assert refit.data.tags["mlflow.parentRunId"] == result.run_id
+    assert refit.data.params["n_estimators"] == "90"
@@ -0,0 +1,22 @@
+import os
+from src.utils.import_profile import loaded_modules, profile_imports, total_import_us
+
+# Modules that must stay out of the serving import graph (Lambda cold start)
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "joblib", "mlflow", "pyarrow", "matplotlib"]
+
+# Generous default so slow CI runners don't flake; tighten locally with the env var
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2000))
+
+
+def test_app_import_does_not_load_heavy_modules():
+    modules = loaded_modules("src.app")
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    assert loaded == []
+
+
+def test_app_import_time_within_budget():
+    # Best of three runs to keep the check stable
+    best_ms = min(
+        total_import_us(profile_imports("src.app"), "src.app") / 1000 for _ in range(3)
+    )
+    assert best_ms < IMPORT_TIME_BUDGET_MS
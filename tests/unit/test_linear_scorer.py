@@ -0,0 +1,87 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, PoissonRegressor, Ridge
+from sklearn.tree import DecisionTreeRegressor
+from src.features.feature_pipeline import FeatureEngineer
+from src.inference.linear_scorer import LinearScorer, is_linear_model
+from src.inference.simple_predict import SimpleModelPredictor
+
+
+@pytest.fixture
+def trained(tmp_path):
+    feature_engineer = FeatureEngineer(dv_path=str(tmp_path / "test_dict_vectorizer.pkl"))
+    rng = np.random.default_rng(0)
+    n = 200
+    pickup = pd.Timestamp("2022-01-01 08:00:00") + pd.to_timedelta(rng.integers(0, 3600, n), unit="s")
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(60, 3600, n), unit="s"),
+        "Airport_fee": 0.0,
+        "PULocationID": rng.integers(1, 20, n),
+        "DOLocationID": rng.integers(1, 20, n),
+        "trip_distance": rng.uniform(0.5, 20, n),
+    })
+    X, y = feature_engineer.fit_transform(df)
+    return feature_engineer, X, y
+
+
+@pytest.mark.parametrize("model_cls", [LinearRegression, Ridge])
+def test_scorer_matches_model_predict(trained, model_cls):
+    feature_engineer, X, y = trained
+    model = model_cls().fit(X, y)
+    scorer = LinearScorer.from_model(model, feature_engineer.compile_inference())
+
+    pu_ids = ["1", "5", "19", "300", "abc"]
+    do_ids = ["2", "5", "7", "1", "3"]
+    distances = [1.0, 2.5, 0.0, 4.0, 7.5]
+    expected = model.predict(feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances))
+
+    np.testing.assert_allclose(scorer.predict(pu_ids, do_ids, [distances]), expected, rtol=1e-12)
+
+
+def test_is_linear_model(trained):
+    _, X, y = trained
+    assert is_linear_model(LinearRegression().fit(X, y))
+    assert not is_linear_model(LinearRegression())
+    assert not is_linear_model(DecisionTreeRegressor().fit(X, y))
+    # Log-link GLMs have coef_ and intercept_ but predict exp(X @ coef_ + intercept_)
+    assert not is_linear_model(PoissonRegressor().fit(X, y))
+
+
+def test_predictor_falls_back_to_predict_for_glm(trained, tmp_path):
+    feature_engineer, X, y = trained
+    model = PoissonRegressor().fit(X, y)
+    model_path = tmp_path / "poisson_model.pkl"
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+
+    predictor = SimpleModelPredictor(
+        feature_engineer=feature_engineer,
+        artifact_path=str(tmp_path / "missing_artifact"),
+        model_path=str(model_path)
+    )
+    assert predictor.scorer is None
+
+    pu_ids = ["1", "5", "19"]
+    do_ids = ["2", "5", "7"]
+    distances = [1.0, 2.5, 4.0]
+    expected = model.predict(feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances))
+
+    np.testing.assert_allclose(predictor.predict_trips(pu_ids, do_ids, trip_distance=distances), expected)
+
+
+def test_predictor_uses_scorer_for_deployed_model():
+    feature_engineer = FeatureEngineer()
+    predictor = SimpleModelPredictor(feature_engineer=feature_engineer)
+    assert predictor.scorer is not None
+
+    df = pd.DataFrame({
+        "PULocationID": ["186", "132", "1"],
+        "DOLocationID": ["79", "236", "1"],
+        "trip_distance": [4.0, 17.3, 0.5],
+    })
+    expected = predictor.model.predict(feature_engineer.inference(df.copy()))
+
+    np.testing.assert_allclose(predictor.predict(df), expected, rtol=1e-12)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from mlflow import MlflowClient
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error, r2_score
+from src.training.mlflow_utils import RegressionMetricsAccumulator, evaluate_model, regression_metrics
+from src.training.trainer import ModelTrainer
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = sp.random(1000, 5, density=0.5, format="csr", random_state=0)
+    y = X @ rng.uniform(1, 5, 5) + 1e4 + rng.normal(0, 0.5, 1000)
+    return X, y
+
+
+def test_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    y = rng.uniform(60, 3600, 500)
+    y[:5] = 0  # MAPE uses sklearn's epsilon for zero targets
+    predictions = y + rng.normal(0, 100, 500)
+
+    metrics = regression_metrics(y, predictions, n_features=4)
+    assert metrics["mean_absolute_error"] == pytest.approx(mean_absolute_error(y, predictions))
+    assert metrics["root_mean_squared_error"] == pytest.approx(np.sqrt(mean_squared_error(y, predictions)))
+    assert metrics["mean_absolute_percentage_error"] == pytest.approx(
+        mean_absolute_percentage_error(y, predictions)
+    )
+    r2 = r2_score(y, predictions)
+    assert metrics["r2"] == pytest.approx(r2)
+    assert metrics["adjusted_r2"] == pytest.approx(1 - (1 - r2) * 499 / 495)
+    assert "adjusted_r2" not in regression_metrics(y, predictions)
+
+    assert regression_metrics([3.0, 3.0], [3.0, 3.0])["r2"] == 1.0
+    assert regression_metrics([3.0, 3.0], [2.0, 3.0])["r2"] == 0.0
+
+
+def test_adjusted_r2_is_nan_without_enough_rows():
+    y = np.arange(6, dtype=np.float64)
+    predictions = y + 0.5
+
+    assert np.isfinite(regression_metrics(y, predictions, n_features=4)["adjusted_r2"])
+    assert np.isnan(regression_metrics(y, predictions, n_features=5)["adjusted_r2"])
+    assert np.isnan(regression_metrics(y, predictions, n_features=50)["adjusted_r2"])
+
+
+def test_merged_chunks_equal_one_pass():
+    rng = np.random.default_rng(1)
+    # Large offset: a naive sum of y^2 would lose R2 to cancellation
+    y = 1e8 + rng.normal(0, 1, 10_000)
+    predictions = y + rng.normal(0, 0.1, 10_000)
+
+    chunks = [RegressionMetricsAccumulator().update(y[i:i + 999], predictions[i:i + 999])
+              for i in range(0, 10_000, 999)]
+    merged = RegressionMetricsAccumulator()
+    for chunk in [RegressionMetricsAccumulator()] + chunks:
+        merged.merge(chunk)
+
+    assert merged.n == 10_000
+    one_pass = regression_metrics(y, predictions)
+    assert merged.metrics() == pytest.approx(one_pass)
+    assert one_pass["r2"] == pytest.approx(r2_score(y, predictions), abs=1e-9)
+
+    with pytest.raises(ValueError):
+        RegressionMetricsAccumulator().metrics()
+    with pytest.raises(ValueError):
+        RegressionMetricsAccumulator().update([1.0, 2.0], [1.0])
+
+
+def test_evaluate_model_in_chunks_and_on_a_sample(data):
+    X, y = data
+    model = LinearRegression().fit(X, y)
+
+    chunked = evaluate_model(model, X, y, chunk_rows=128).metrics()
+    assert chunked == pytest.approx(regression_metrics(y, model.predict(X)))
+
+    sample = evaluate_model(model, X, y, sample_size=100, random_state=3, chunk_rows=30)
+    assert sample.n == 100
+    same_rows = evaluate_model(model, X, y, sample_size=100, random_state=3)
+    assert sample.metrics() == pytest.approx(same_rows.metrics())
+    assert evaluate_model(model, X, y, sample_size=5000).n == 1000
+
+
+def test_trainer_scores_train_metrics_on_a_sample(data, tracking_uri):
+    X, y = data
+    trainer = ModelTrainer(experiment_name="metrics-test", tracking_uri=tracking_uri,
+                           train_metrics_sample_size=200)
+    run_id = trainer.train(LinearRegression(), "LinearRegression", X[:800], y[:800], X[800:], y[800:])
+
+    run = MlflowClient().get_run(run_id)
+    model = LinearRegression().fit(X[:800], y[:800])
+    assert run.data.params["train_metrics_sample_size"] == "200"
+    assert run.data.metrics["train_mean_absolute_error"] == pytest.approx(
+        evaluate_model(model, X[:800], y[:800], sample_size=200).metrics()["mean_absolute_error"]
+    )
+    assert run.data.metrics["test_mean_absolute_error"] == pytest.approx(
+        mean_absolute_error(y[800:], model.predict(X[800:]))
+    )
@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from src.features.feature_pipeline import FeatureEngineer
+from src.inference.model_artifact import HEADER_FILE, LinearModelArtifact, export_linear_model
+from src.inference.simple_predict import SimpleModelPredictor
+
+
+@pytest.fixture
+def trained(tmp_path):
+    feature_engineer = FeatureEngineer(dv_path=str(tmp_path / "test_dict_vectorizer.pkl"))
+    rng = np.random.default_rng(0)
+    n = 200
+    pickup = pd.Timestamp("2022-01-01 08:00:00") + pd.to_timedelta(rng.integers(0, 3600, n), unit="s")
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(60, 3600, n), unit="s"),
+        "Airport_fee": 0.0,
+        "PULocationID": rng.integers(1, 20, n),
+        "DOLocationID": rng.integers(1, 20, n),
+        "trip_distance": rng.uniform(0.5, 20, n),
+    })
+    X, y = feature_engineer.fit_transform(df)
+    model = LinearRegression().fit(X, y)
+    path = tmp_path / "linear_model"
+    export_linear_model(
+        model, feature_engineer.compile_inference(), feature_engineer.dv.feature_names_,
+        str(path), model_version="run-1"
+    )
+    return feature_engineer, model, path
+
+
+def test_artifact_round_trip(trained):
+    feature_engineer, model, path = trained
+    artifact = LinearModelArtifact.load(str(path), model_version="run-1")
+
+    assert isinstance(artifact.coef, np.memmap)
+    np.testing.assert_array_equal(artifact.coef, model.coef_)
+    assert list(artifact.feature_names) == list(feature_engineer.dv.feature_names_)
+
+    pu_ids = ["1", "5", "19", "300", "abc"]
+    do_ids = ["2", "5", "7", "1", "3"]
+    distances = [1.0, 2.5, 0.0, 4.0, 7.5]
+    expected = model.predict(feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances))
+    np.testing.assert_array_equal(artifact.scorer().predict(pu_ids, do_ids, [distances]), expected)
+
+
+def test_artifact_rejected_when_stale(trained, tmp_path):
+    _, _, path = trained
+    assert LinearModelArtifact.load(str(path), model_version="run-2") is None
+    assert LinearModelArtifact.load(str(path), numerical=["trip_distance", "hour"]) is None
+    assert LinearModelArtifact.load(str(tmp_path / "missing")) is None
+
+    header = json.loads((path / HEADER_FILE).read_text())
+    header["format"] = "linear-model/999"
+    (path / HEADER_FILE).write_text(json.dumps(header))
+    assert LinearModelArtifact.load(str(path)) is None
+
+
+def test_predictor_prefers_artifact_over_pickle():
+    feature_engineer = FeatureEngineer()
+    predictor = SimpleModelPredictor(feature_engineer=feature_engineer)
+    assert predictor._model is None
+
+    pu_ids, do_ids, distances = ["186", "132", "1"], ["79", "236", "1"], [4.0, 17.3, 0.5]
+    predictions = predictor.predict_trips(pu_ids, do_ids, trip_distance=distances)
+
+    # The pickled model is loaded lazily and agrees with the artifact
+    expected = predictor.model.predict(
+        feature_engineer.inference_raw(pu_ids, do_ids, trip_distance=distances)
+    )
+    np.testing.assert_allclose(predictions, expected, rtol=1e-12)
@@ -0,0 +1,76 @@
+import json
+import mlflow
+import pytest
+from mlflow import MlflowClient
+from src.training import model_history
+from src.training.model_history import ModelHistory
+
+
+@pytest.fixture
+def client(tracking_uri):
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment("history-test")
+    return MlflowClient()
+
+
+def log_run(client, run_name, mae=None, parent_run_id=None):
+    experiment_id = client.get_experiment_by_name("history-test").experiment_id
+    tags = {"mlflow.parentRunId": parent_run_id} if parent_run_id else None
+    run = client.create_run(experiment_id, run_name=run_name, tags=tags)
+    if mae is not None:
+        client.log_metric(run.info.run_id, "test_mean_absolute_error", mae)
+    client.set_terminated(run.info.run_id)
+    return run.info.run_id
+
+
+def test_best_model_query_skips_deleted_and_unscored_runs(client):
+    log_run(client, "Ridge", 5.0)
+    best_id = log_run(client, "XGBoost", 3.0)
+    client.delete_run(log_run(client, "Deleted", 1.0))
+    log_run(client, "NoMetrics")
+    parent_id = log_run(client, "search")
+    child_id = log_run(client, "trial", 4.0, parent_run_id=parent_id)
+
+    history = ModelHistory("history-test")
+    assert history.get_best_model() == {
+        "model_name": "XGBoost", "run_id": best_id, "test_mean_absolute_error": 3.0
+    }
+    assert history.get_best_model(parent_run_id=parent_id)["run_id"] == child_id
+    with pytest.raises(ValueError):
+        history.get_best_model(parent_run_id=child_id)
+
+
+def test_list_all_runs_pages_through_every_run(client, monkeypatch):
+    monkeypatch.setattr(model_history, "PAGE_SIZE", 2)
+    for i in range(4):
+        log_run(client, f"model-{i}", float(i))
+    client.delete_run(log_run(client, "Deleted", 0.5))
+
+    runs = ModelHistory("history-test").list_all_runs()
+    assert len(runs) == 5
+    assert sorted(runs["test_mean_absolute_error"]) == [0.0, 0.5, 1.0, 2.0, 3.0]
+
+
+def test_index_only_searches_runs_ended_since_last_lookup(client, tmp_path):
+    first_id = log_run(client, "LinearRegression", 6.0)
+    index_path = tmp_path / "index" / "run_index.json"
+    history = ModelHistory("history-test", index_path=str(index_path))
+    assert history.get_best_model()["run_id"] == first_id
+
+    better_id = log_run(client, "XGBoost", 2.0)
+    log_run(client, "Worse", 9.0)
+    filters = []
+    search_runs = history.client.search_runs
+
+    def recording_search_runs(*args, **kwargs):
+        filters.append(kwargs["filter_string"])
+        return search_runs(*args, **kwargs)
+
+    history.client.search_runs = recording_search_runs
+    assert history.get_best_model()["run_id"] == better_id
+    assert len(filters) == 1 and "attributes.end_time >" in filters[0]
+
+    # The index is reused by a new instance, and dropped when its run is deleted
+    assert list(json.loads(index_path.read_text()).values())[0]["best"]["run_id"] == better_id
+    client.delete_run(better_id)
+    assert ModelHistory("history-test", index_path=str(index_path)).get_best_model()["run_id"] == first_id
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from mlflow import MlflowClient
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from src.training.multi_model_trainer import MultiModelTrainer, _build_model
+
+
+class BrokenModel(LinearRegression):
+    def fit(self, X, y, sample_weight=None):
+        raise RuntimeError("boom")
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = sp.random(400, 30, density=0.2, format="csr", random_state=0)
+    y = X @ rng.uniform(1, 5, 30) + rng.normal(0, 0.1, 400)
+    return X[:300], y[:300], X[300:], y[300:]
+
+
+def test_build_model_applies_thread_budget():
+    assert _build_model(RandomForestRegressor, {}, 3).n_jobs == 3
+    assert _build_model(RandomForestRegressor, {"n_jobs": 1}, 3).n_jobs == 1
+    assert _build_model(RandomForestRegressor, {}, None).n_jobs is None
+    # Estimators without a thread pool are left alone
+    assert "n_jobs" not in _build_model(Ridge, {}, 3).get_params()
+
+
+def test_parallel_training_logs_every_model(data, tracking_uri):
+    X_train, y_train, X_test, y_test = data
+    models = {
+        "LinearRegression": (LinearRegression, {}),
+        "Broken": (BrokenModel, {}),
+        "Ridge": (Ridge, {"alpha": 0.5}),
+    }
+    trainer = MultiModelTrainer(experiment_name="parallel-test", tracking_uri=tracking_uri)
+    # A failing model is reported once the others have finished
+    with pytest.raises(RuntimeError, match="boom"):
+        trainer.train_all(models, *data, n_jobs=2, threads_per_job=1)
+
+    client = MlflowClient(tracking_uri=tracking_uri)
+    experiment = client.get_experiment_by_name("parallel-test")
+    runs = client.search_runs([experiment.experiment_id], filter_string="attributes.status = 'FINISHED'")
+    assert len(runs) == 2
+
+    logged = sorted(run.data.metrics["test_mean_absolute_error"] for run in runs)
+    expected = sorted(
+        mean_absolute_error(y_test, model_cls(**params).fit(X_train, y_train).predict(X_test))
+        for name, (model_cls, params) in models.items() if name != "Broken"
+    )
+    assert logged == pytest.approx(expected)
@@ -0,0 +1,60 @@
+import mlflow
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import LinearRegression, SGDRegressor
+from sklearn.metrics import r2_score
+from xgboost import XGBRegressor
+from src.data_pulling.sparse_store import SparseStore, save_sparse
+from src.training.model_history import ModelHistory
+from src.training.out_of_core import evaluate_shards, fit_partial, fit_xgboost_external_memory
+from src.training.trainer import ModelTrainer
+
+
+@pytest.fixture
+def stores(tmp_path):
+    rng = np.random.default_rng(0)
+    X = sp.random(4000, 40, density=0.1, format="csr", random_state=0)
+    y = X @ rng.uniform(0, 5, 40) + 10 + rng.normal(0, 0.1, 4000)
+    save_sparse(tmp_path / "train", X[:3000], y[:3000], shard_rows=700)
+    save_sparse(tmp_path / "test", X[3000:], y[3000:], shard_rows=700)
+    return SparseStore(tmp_path / "train"), SparseStore(tmp_path / "test")
+
+
+def test_fit_partial_feeds_every_shard(stores):
+    train, _ = stores
+    model = fit_partial(SGDRegressor(random_state=0), train, epochs=2, shuffle=False)
+
+    expected = SGDRegressor(random_state=0)
+    for _ in range(2):
+        for i in range(train.n_shards):
+            expected.partial_fit(*train.shard(i))
+    np.testing.assert_allclose(model.coef_, expected.coef_)
+
+
+def test_xgboost_external_memory_matches_model_params(stores):
+    train, test = stores
+    model = fit_xgboost_external_memory(XGBRegressor(n_estimators=30, max_depth=3), train)
+
+    assert model.get_booster().num_boosted_rounds() == 30
+    assert model.max_depth == 3
+    X, y = test.load()
+    metrics = evaluate_shards(model, test).metrics()
+    assert metrics["mean_absolute_error"] < np.abs(y - y.mean()).mean() / 2
+    assert metrics["r2"] == pytest.approx(r2_score(y, model.predict(X)))
+
+
+def test_train_out_of_core_logs_a_selectable_run(stores, tracking_uri):
+    trainer = ModelTrainer(experiment_name="out-of-core-test", tracking_uri=tracking_uri)
+    train, test = stores
+    with pytest.raises(ValueError):
+        trainer.train_out_of_core(LinearRegression(), "LinearRegression", train, test)
+
+    run_id = trainer.train_out_of_core(
+        SGDRegressor(random_state=0), "SGDRegressor", train, test, epochs=3
+    )
+    run = mlflow.get_run(run_id)
+    assert run.data.params["train_shards"] == "5"
+    assert {"train_mean_absolute_error", "test_mean_absolute_error"} <= set(run.data.metrics)
+
+    assert ModelHistory("out-of-core-test").get_best_model()["run_id"] == run_id
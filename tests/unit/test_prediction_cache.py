@@ -0,0 +1,72 @@
+import time
+import pandas as pd
+import pytest
+from src.features.feature_pipeline import FeatureEngineer
+from src.inference.prediction_cache import PredictionCache, create_prediction_cache
+from src.inference.simple_predict import SimpleModelPredictor
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    assert cache.get("a") == 1.0  # "b" is now least recently used
+    cache.put("c", 3.0)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3.0
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = PredictionCache(max_size=10, ttl_seconds=0.01)
+    cache.put("a", 1.0)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_create_prediction_cache_can_be_disabled():
+    assert create_prediction_cache(0) is None
+    assert isinstance(create_prediction_cache(5), PredictionCache)
+
+
+def test_predictor_skips_scoring_for_cached_rows():
+    predictor = SimpleModelPredictor(feature_engineer=FeatureEngineer(), cache=PredictionCache(max_size=100))
+    df = pd.DataFrame({
+        "PULocationID": ["186", "132"],
+        "DOLocationID": ["79", "236"],
+        "trip_distance": [4.0, 17.3]
+    })
+    expected = predictor.predict(df)
+
+    scored = []
+    original = predictor._score
+    predictor._score = lambda pu_ids, do_ids, columns: scored.append(len(pu_ids)) or original(pu_ids, do_ids, columns)
+
+    repeated = pd.DataFrame({
+        "PULocationID": ["132", "1", "186"],
+        "DOLocationID": ["236", "1", "79"],
+        "trip_distance": [17.3, 2.0, 4.0]
+    })
+    predictions = predictor.predict(repeated)
+
+    assert scored == [1]  # only the unseen (1, 1) trip was scored
+    assert predictions[0] == pytest.approx(expected[1])
+    assert predictions[2] == pytest.approx(expected[0])
+
+
+def test_cache_keys_include_model_version():
+    predictor = SimpleModelPredictor(feature_engineer=FeatureEngineer(), cache=PredictionCache(max_size=100))
+    df = pd.DataFrame({"PULocationID": ["186"], "DOLocationID": ["79"], "trip_distance": [4.0]})
+    predictor.predict(df)
+
+    predictor.model_version = "new-model"
+    predictor.predict(df)
+
+    assert predictor.cache.stats()["misses"] == 2
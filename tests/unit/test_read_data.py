@@ -5,9 +5,31 @@ import tempfile
 from pathlib import Path
 from src.data_pulling.read_data import (
     load_and_concat_parquet_files,
+    load_processed_data,
     load_train_test,
     save_processed_data,
+    scan_parquet_folder,
 )
+from src.features.feature_pipeline import FeatureEngineer
+
+
+def make_trips(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s")
+    fee = rng.choice([0.0, 1.75], n)
+    fee[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "VendorID": rng.integers(1, 3, n),
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.to_timedelta(rng.integers(-600, 7200, n), unit="s"),
+        "fare_amount": rng.uniform(3, 80, n),
+        "tip_amount": rng.uniform(0, 20, n),
+        "total_amount": rng.uniform(3, 100, n),
+        "Airport_fee": fee,
+        "PULocationID": rng.integers(1, 266, n),
+        "DOLocationID": rng.integers(1, 266, n),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
 
 
 def test_load_and_concat_parquet_files():
@@ -52,6 +74,78 @@ def test_load_train_test():
         pd.testing.assert_frame_equal(test_df, df_test)
 
 
+def test_load_train_test_with_feature_engineer_projection_and_filters():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        raw_data_dir = Path(tmpdir)
+        for folder, seed in (("train", 0), ("test", 1)):
+            (raw_data_dir / folder).mkdir()
+            make_trips(seed=seed).to_parquet(raw_data_dir / folder / f"{folder}.parquet")
+
+        feature_engineer = FeatureEngineer()
+        train_df, _ = load_train_test(str(raw_data_dir), feature_engineer=feature_engineer)
+
+        assert list(train_df.columns) == feature_engineer.input_columns
+        full = make_trips(seed=0)
+        elapsed = full["tpep_dropoff_datetime"] - full["tpep_pickup_datetime"]
+        assert len(train_df) == (
+            full["Airport_fee"].notna() & (elapsed > pd.Timedelta(0)) & (elapsed <= pd.Timedelta(minutes=90))
+        ).sum()
+
+        # Pre-filtered loading does not change the engineered features
+        pd.testing.assert_frame_equal(
+            feature_engineer._clean_and_engineer(train_df).reset_index(drop=True),
+            feature_engineer._clean_and_engineer(full).reset_index(drop=True)
+        )
+
+
+def test_scan_parquet_folder_reports_bytes_read():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir)
+        make_trips().to_parquet(tmp_path / "trips.parquet")
+
+        _, full_report = scan_parquet_folder(tmp_path)
+        _, projected_report = scan_parquet_folder(tmp_path, columns=["trip_distance"])
+
+        assert full_report.files == projected_report.files == 1
+        assert full_report.bytes_on_disk == (tmp_path / "trips.parquet").stat().st_size
+        assert full_report.rows == projected_report.rows == 2000
+        assert 0 < projected_report.bytes_read < full_report.bytes_read
+        assert "MiB on disk" in str(projected_report)
+
+
+def test_scan_parquet_folder_skips_row_groups_ruled_out_by_the_filter():
+    import pyarrow.dataset as ds
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir)
+        trips = make_trips().sort_values("trip_distance")
+        trips.to_parquet(tmp_path / "trips.parquet", row_group_size=500)
+
+        table, full_report = scan_parquet_folder(tmp_path, columns=["trip_distance"])
+        table, filtered_report = scan_parquet_folder(
+            tmp_path, columns=["trip_distance"], filter=ds.field("trip_distance") < 1.0
+        )
+
+        assert table.num_rows == (trips["trip_distance"] < 1.0).sum()
+        assert 0 < filtered_report.bytes_read <= full_report.bytes_read / 4
+
+
+def test_load_and_concat_parquet_files_tolerates_schema_drift():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir)
+        df1 = pd.DataFrame({"col1": [1, 2], "col2": [3, 4]})
+        df2 = pd.DataFrame({"col1": [5.5, 6.5], "col3": ["a", "b"]})
+        df1.to_parquet(tmp_path / "file1.parquet")
+        df2.to_parquet(tmp_path / "file2.parquet")
+
+        result = load_and_concat_parquet_files(tmp_path)
+
+        assert list(result.columns) == ["col1", "col2", "col3"]
+        assert result["col1"].tolist() == [1.0, 2.0, 5.5, 6.5]
+        assert result["col2"].isna().tolist() == [False, False, True, True]
+        assert result["col3"].isna().tolist() == [True, True, False, False]
+
+
 # def test_save_processed_data():
 #     with tempfile.TemporaryDirectory() as tmpdir:
 #         tmp_path = Path(tmpdir)
@@ -72,4 +166,33 @@ def test_load_train_test():
 #         # Load and verify the data
 #         data = np.load(file_path)
 #         np.testing.assert_array_equal(data["X"], X)
-#         np.testing.assert_array_equal(data["y"], y)
\ No newline at end of file
+#         np.testing.assert_array_equal(data["y"], y)
+
+def test_save_and_load_processed_data_round_trip():
+    import scipy.sparse as sp
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir)
+        X = sp.random(500, 40, density=0.1, format="csr", random_state=0)
+        y = np.arange(500, dtype=np.float64)
+
+        save_processed_data(X, y, "train_processed_data", tmp_path, compression="zstd", shard_rows=200)
+        X_loaded, y_loaded = load_processed_data("train_processed_data", tmp_path)
+
+        assert sp.issparse(X_loaded)
+        assert (X_loaded != X).nnz == 0
+        np.testing.assert_array_equal(y_loaded, y)
+
+
+def test_load_processed_data_reads_legacy_npz():
+    import scipy.sparse as sp
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir)
+        X = sp.random(50, 10, density=0.2, format="csr", random_state=0)
+        y = np.arange(50, dtype=np.float64)
+        np.savez_compressed(tmp_path / "old.npz", X=X, y=y)
+
+        X_loaded, y_loaded = load_processed_data("old.npz", tmp_path)
+        assert (X_loaded != X).nnz == 0
+        np.testing.assert_array_equal(y_loaded, y)
@@ -0,0 +1,124 @@
+import json
+import mmap
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.data_pulling.sparse_store import HEADER_FILE, SparseStore, SparseStoreWriter, save_sparse
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(0)
+    X = sp.random(1000, 300, density=0.02, format="csr", random_state=1)
+    # Some empty rows, as after filtering unseen categories
+    X = sp.csr_matrix(sp.diags((np.arange(1000) % 7 != 0).astype(float)) @ X)
+    X.eliminate_zeros()
+    return X, rng.uniform(1, 90, 1000)
+
+
+def assert_same(X, y, expected_X, expected_y):
+    assert X.shape == expected_X.shape
+    assert (X != expected_X).nnz == 0
+    np.testing.assert_array_equal(y, expected_y)
+
+
+@pytest.mark.parametrize("compression", [None, "zstd", "lz4"])
+@pytest.mark.parametrize("shard_rows", [None, 128, 1000])
+def test_round_trip(tmp_path, matrix, compression, shard_rows):
+    X, y = matrix
+    save_sparse(tmp_path / "train", X, y, compression=compression, shard_rows=shard_rows)
+    store = SparseStore(tmp_path / "train")
+
+    assert store.shape == X.shape
+    assert store.n_shards == (8 if shard_rows == 128 else 1)
+    assert_same(*store.load(), X, y)
+    assert_same(*store.rows(100, 700), X[100:700], y[100:700])
+
+    shards = list(store.iter_shards())
+    assert sum(shard.shape[0] for shard, _ in shards) == 1000
+    assert_same(sp.vstack([shard for shard, _ in shards]), np.concatenate([y for _, y in shards]), X, y)
+
+
+def test_nothing_is_pickled(tmp_path, matrix):
+    X, y = matrix
+    save_sparse(tmp_path / "train", X, y)
+    for path in (tmp_path / "train").glob("*.npy"):
+        np.load(path, allow_pickle=False)
+
+
+def test_uncompressed_store_is_memory_mapped(tmp_path, matrix):
+    X, y = matrix
+    save_sparse(tmp_path / "train", X, y)
+    X_loaded, y_loaded = SparseStore(tmp_path / "train").load()
+
+    def is_mapped(array):
+        while array is not None:
+            if isinstance(array, (np.memmap, mmap.mmap)):
+                return True
+            array = getattr(array, "base", None)
+        return False
+
+    for array in (X_loaded.data, X_loaded.indices, X_loaded.indptr, y_loaded):
+        assert is_mapped(array)
+
+
+def test_row_range_reads_only_spanned_shards(tmp_path, matrix, monkeypatch):
+    X, y = matrix
+    save_sparse(tmp_path / "train", X, y, compression="zstd", shard_rows=100)
+    store = SparseStore(tmp_path / "train")
+
+    read = []
+    shard = store.shard
+    monkeypatch.setattr(store, "shard", lambda i: read.append(i) or shard(i))
+    assert_same(*store.rows(250, 420), X[250:420], y[250:420])
+    assert read == [2, 3, 4]
+
+
+def test_compression_shrinks_store(tmp_path):
+    # One-hot features: repeated 1.0 values and small column indices
+    rng = np.random.default_rng(0)
+    X = sp.csr_matrix((np.ones(20000), rng.integers(0, 50, 20000), np.arange(20001)), shape=(20000, 50))
+    y = np.round(rng.uniform(1, 90, 20000))
+
+    def size(path):
+        return sum(file.stat().st_size for file in path.iterdir())
+
+    save_sparse(tmp_path / "plain", X, y)
+    save_sparse(tmp_path / "zstd", X, y, compression="zstd")
+    assert size(tmp_path / "zstd") < size(tmp_path / "plain") / 2
+
+
+def test_overwrite_and_errors(tmp_path, matrix):
+    X, y = matrix
+    save_sparse(tmp_path / "train", X, y, shard_rows=100)
+    save_sparse(tmp_path / "train", X[:10], y[:10], compression="lz4")
+    assert_same(*SparseStore(tmp_path / "train").load(), X[:10], y[:10])
+    assert not list((tmp_path / "train").glob("*.npy"))
+
+    with pytest.raises(ValueError):
+        save_sparse(tmp_path / "bad", X, y[:5])
+    with pytest.raises(ValueError):
+        save_sparse(tmp_path / "bad", X, y, compression="gzip2")
+    with pytest.raises(FileNotFoundError):
+        SparseStore(tmp_path / "missing")
+
+    header_path = tmp_path / "train" / HEADER_FILE
+    header = json.loads(header_path.read_text())
+    header_path.write_text(json.dumps({**header, "format": "something/9"}))
+    with pytest.raises(ValueError):
+        SparseStore(tmp_path / "train")
+
+
+def test_writer_appends_chunks_as_shards(tmp_path, matrix):
+    X, y = matrix
+    writer = SparseStoreWriter(tmp_path / "train", X.shape[1], compression="zstd", shard_rows=250)
+    for start, stop in ((0, 300), (300, 310), (310, 1000)):
+        writer.append(X[start:stop], y[start:stop])
+    with pytest.raises(ValueError):
+        writer.append(X[:10, :5], y[:10])
+    writer.close()
+
+    store = SparseStore(tmp_path / "train")
+    # 300 rows -> 250 + 50, 10 rows -> 10, 690 rows -> 250 + 250 + 190
+    assert [stop - start for start, stop in (shard["rows"] for shard in store.shards)] == [250, 50, 10, 250, 250, 190]
+    assert_same(*store.load(), X, y)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from src.data_pulling.read_data import iter_parquet_batches, stream_train_test
+from src.features.feature_pipeline import FeatureEngineer
+
+
+def month(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    # Whole minutes so many pickups tie across chunks and files
+    pickup = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, n), unit="min")
+    fee = rng.choice([0.0, 1.75], n)
+    fee[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "VendorID": rng.integers(1, 3, n),
+        "tpep_pickup_datetime": pickup.as_unit("us"),
+        "tpep_dropoff_datetime": (pickup + pd.to_timedelta(rng.integers(-600, 7200, n), unit="s")).as_unit("us"),
+        "fare_amount": rng.uniform(3, 80, n),
+        "Airport_fee": fee,
+        "PULocationID": rng.integers(1, 40, n).astype("int32"),
+        "DOLocationID": rng.integers(1, 40, n).astype("int32"),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+
+
+@pytest.fixture
+def raw_data(tmp_path):
+    for folder, seeds in (("train", (1, 2)), ("test", (3,))):
+        (tmp_path / folder).mkdir()
+        for seed in seeds:
+            # Small row groups so each file is streamed in several batches
+            pq.write_table(
+                pa.Table.from_pandas(month(seed), preserve_index=False),
+                tmp_path / folder / f"yellow_tripdata_2024-0{seed}.parquet", row_group_size=700
+            )
+    return tmp_path
+
+
+def test_iter_parquet_batches_projects_and_filters(raw_data):
+    feature_engineer = FeatureEngineer()
+    batches = list(iter_parquet_batches(
+        raw_data / "train", columns=feature_engineer.input_columns,
+        filter=feature_engineer.scan_filter(), batch_size=500
+    ))
+
+    assert len(batches) > 2
+    assert all(batch.schema.names == feature_engineer.input_columns for batch in batches)
+
+    full = pd.concat([month(1), month(2)], ignore_index=True)
+    elapsed = full["tpep_dropoff_datetime"] - full["tpep_pickup_datetime"]
+    expected = full[
+        full["Airport_fee"].notna() & (elapsed > pd.Timedelta(0)) & (elapsed <= pd.Timedelta(minutes=90))
+    ]
+    streamed = pa.Table.from_batches(batches).to_pandas()
+    pd.testing.assert_frame_equal(
+        streamed, expected[feature_engineer.input_columns].reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_iter_parquet_batches_missing_folder(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        next(iter_parquet_batches(tmp_path))
+
+
+@pytest.mark.parametrize("backend", ["pandas", "arrow", "polars"])
+def test_stream_matches_in_memory_pipeline(raw_data, tmp_path, backend):
+    if backend == "polars":
+        pytest.importorskip("polars")
+    train_df = pd.concat([month(1), month(2)], ignore_index=True)
+    test_df = month(3)
+
+    in_memory = FeatureEngineer(dv_path=str(tmp_path / "in_memory.pkl"), backend=backend)
+    X_train, y_train = in_memory.fit_transform(train_df)
+    X_test, y_test = in_memory.transform(test_df)
+
+    streaming = FeatureEngineer(
+        dv_path=str(tmp_path / "streaming.pkl"), backend=backend, pair_encoding="integer"
+    )
+    train_batches, test_batches = stream_train_test(str(raw_data), streaming, batch_size=500)
+    X_train_stream, y_train_stream = streaming.fit_transform_stream(train_batches)
+    X_test_stream, y_test_stream = streaming.transform_stream(test_batches)
+
+    assert (X_train_stream != X_train).nnz == 0
+    np.testing.assert_array_equal(y_train_stream, y_train)
+    assert (X_test_stream != X_test).nnz == 0
+    np.testing.assert_array_equal(y_test_stream, y_test)
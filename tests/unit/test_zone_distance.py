@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+from src.features.zone_distance import ZoneDistanceProvider, synthetic_distances
+
+
+def distance_in_subprocess(pu_id, do_id, hash_seed):
+    code = (
+        "from src.features.zone_distance import ZoneDistanceProvider;"
+        f"print(ZoneDistanceProvider.synthetic().distance('{pu_id}', '{do_id}'))"
+    )
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
+
+def test_synthetic_distances_are_reproducible_across_processes():
+    expected = ZoneDistanceProvider.synthetic().distance("186", "79")
+    assert distance_in_subprocess("186", "79", 1) == expected
+    assert distance_in_subprocess("186", "79", 2) == expected
+
+
+def test_lookup_matches_synthetic_function():
+    provider = ZoneDistanceProvider.synthetic()
+    pu_ids = ["1", "186", "265", "300", "abc"]
+    do_ids = ["1", "79", "264", "1", "xyz"]
+
+    distances = provider.distances_for(pu_ids, do_ids)
+
+    np.testing.assert_array_equal(distances, synthetic_distances(pu_ids, do_ids))
+    assert all(1.0 <= d <= 30.0 for d in distances)
+    assert [provider.distance(pu, do) for pu, do in zip(pu_ids, do_ids)] == list(distances)
+
+
+def test_centroid_distances(tmp_path):
+    centroids_path = tmp_path / "centroids.csv"
+    pd.DataFrame({
+        "LocationID": [1, 2],
+        "latitude": [40.0, 41.0],
+        "longitude": [-74.0, -74.0],
+    }).to_csv(centroids_path, index=False)
+
+    provider = ZoneDistanceProvider.load(str(centroids_path), n_zones=3)
+
+    assert provider.source == "centroids:centroids.csv"
+    assert provider.distance("1", "1") == 0.0
+    # One degree of latitude is about 69 miles
+    assert abs(provider.distance("1", "2") - 69.1) < 0.1
+    # Zone 3 has no centroid, so it falls back to the synthetic distance
+    assert provider.distance("1", "3") == synthetic_distances(["1"], ["3"])[0]